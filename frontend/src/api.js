@@ -92,15 +92,39 @@ export const api = {
   register: (payload) => request("/api/register/", { method: "POST", body: payload }),
   logout: () => request("/api/logout/", { method: "POST", body: {} }),
   hostels: () => request("/api/hostels/"),
+  hostelRooms: (hostelId) => request(`/api/hostels/${hostelId}/rooms/`),
   status: () => request("/api/status/"),
+  statusStreamUrl: (version) => withBase(`/api/status/stream/?version=${encodeURIComponent(version ?? 0)}`),
   apply: (payload) => request("/api/allocate/", { method: "POST", body: payload }),
+  preferences: () => request("/api/preferences/"),
+  submitPreferences: (hostelIds) =>
+    request("/api/preferences/", { method: "POST", body: { hostel_ids: hostelIds } }),
   dashboard: () => request("/api/dashboard/"),
-  adminDashboard: () => request("/api/admin/dashboard/"),
+  changes: (since) => request(`/api/changes/?since=${encodeURIComponent(since ?? 0)}`),
+  adminDashboard: (params = {}) => {
+    const query = new URLSearchParams(Object.entries(params).filter(([, value]) => value)).toString();
+    return request(`/api/admin/dashboard/${query ? `?${query}` : ""}`);
+  },
+  adminAnalytics: (params = {}) => {
+    const query = new URLSearchParams(Object.entries(params).filter(([, value]) => value)).toString();
+    return request(`/api/admin/analytics/${query ? `?${query}` : ""}`);
+  },
   adminDeleteUser: (userId) => request(`/api/admin/users/${userId}/delete/`, { method: "POST", body: {} }),
+  adminBulkDeleteUsers: (selection) => request("/api/admin/users/delete/", { method: "POST", body: selection }),
   adminUpdateRoom: (allocationId, roomNumber) =>
     request(`/api/admin/allocations/${allocationId}/room/`, {
       method: "POST",
       body: { room_number: roomNumber }
     }),
-  exportAllocationsCsv: () => requestBlob("/api/export/allocations.csv")
+  adminBulkAllocate: (items) => request("/api/admin/allocations/bulk/", { method: "POST", body: { items } }),
+  adminMoveRooms: (movesOrRule) =>
+    request("/api/admin/allocations/rooms/", {
+      method: "POST",
+      body: Array.isArray(movesOrRule) ? { moves: movesOrRule } : { rule: movesOrRule }
+    }),
+  exportAllocationsCsv: (filters = {}) => {
+    const params = new URLSearchParams(Object.entries(filters).filter(([, value]) => value));
+    const query = params.toString();
+    return requestBlob(`/api/export/allocations.csv${query ? `?${query}` : ""}`);
+  }
 };
@@ -9,7 +9,7 @@ export default function AdminActivity({ onToast }) {
   const [action, setAction] = useState("all");
 
   useEffect(() => {
-    api.adminDashboard()
+    api.adminDashboard({ section: "activities", limit: 200 })
       .then((res) => {
         setActivities(res.activities || []);
       })
@@ -1,11 +1,26 @@
 import { useEffect, useMemo, useState } from "react";
 import { api } from "../api";
 
+function mergeRows(rows, changed = [], deletedIds = []) {
+  const gone = new Set(deletedIds);
+  const byId = new Map(changed.map((row) => [row.id, row]));
+  const merged = rows.filter((row) => !gone.has(row.id)).map((row) => {
+    const update = byId.get(row.id);
+    byId.delete(row.id);
+    return update ? { ...row, ...update } : row;
+  });
+  return [...byId.values(), ...merged];
+}
+
 export default function AdminDashboard({ onToast }) {
   const [summary, setSummary] = useState(null);
   const [users, setUsers] = useState([]);
   const [allocations, setAllocations] = useState([]);
   const [activities, setActivities] = useState([]);
+  const [nextCursors, setNextCursors] = useState({});
+  const [version, setVersion] = useState(0);
+  const [filters, setFilters] = useState({ search: "", student: "", action: "" });
+  const [loadingMore, setLoadingMore] = useState("");
   const [roomEdits, setRoomEdits] = useState({});
   const [pendingDeleteUserId, setPendingDeleteUserId] = useState(null);
   const [pendingRoomAllocationId, setPendingRoomAllocationId] = useState(null);
@@ -20,16 +35,10 @@ export default function AdminDashboard({ onToast }) {
     );
   }, [allocations, users]);
 
-  async function loadAdminData() {
-    const res = await api.adminDashboard();
-    setSummary(res.summary || {});
-    setUsers(res.users || []);
-    setAllocations(res.allocations || []);
-    setActivities(res.activities || []);
-
+  function rememberRoomEdits(items) {
     setRoomEdits((prev) => {
       const next = { ...prev };
-      for (const item of res.allocations || []) {
+      for (const item of items || []) {
         if (next[item.id] === undefined) {
           next[item.id] = item.room_number || "";
         }
@@ -38,6 +47,78 @@ export default function AdminDashboard({ onToast }) {
     });
   }
 
+  async function loadAdminData(activeFilters = filters) {
+    const res = await api.adminDashboard(activeFilters);
+    setSummary(res.summary || {});
+    setUsers(res.users || []);
+    setAllocations(res.allocations || []);
+    setActivities(res.activities || []);
+    setNextCursors(res.next_cursors || {});
+    setVersion(res.version || 0);
+    rememberRoomEdits(res.allocations);
+  }
+
+  // Applies only what changed since the last load instead of refetching every section.
+  async function applyChanges() {
+    let since = version;
+    for (;;) {
+      const res = await api.changes(since);
+      if (res.reset) {
+        await loadAdminData();
+        return;
+      }
+      if (res.summary) setSummary(res.summary);
+      setUsers((prev) => mergeRows(prev, res.users, res.deleted?.users));
+      setAllocations((prev) => mergeRows(prev, res.allocations, res.deleted?.allocations));
+      rememberRoomEdits(res.allocations);
+      since = res.version;
+      if (!res.has_more) break;
+    }
+    setVersion(since);
+  }
+
+  async function loadMore(section) {
+    setLoadingMore(section);
+    try {
+      const res = await api.adminDashboard({ ...filters, section, cursor: nextCursors[section] });
+      const items = res[section] || [];
+      if (section === "users") setUsers((prev) => [...prev, ...items]);
+      if (section === "allocations") {
+        setAllocations((prev) => [...prev, ...items]);
+        rememberRoomEdits(items);
+      }
+      if (section === "activities") setActivities((prev) => [...prev, ...items]);
+      setNextCursors((prev) => ({ ...prev, [section]: res.next_cursors?.[section] || null }));
+    } catch (err) {
+      setError(err.message);
+      onToast?.(err.message, "error");
+    } finally {
+      setLoadingMore("");
+    }
+  }
+
+  async function handleFilterSubmit(event) {
+    event.preventDefault();
+    setError("");
+    try {
+      await loadAdminData(filters);
+    } catch (err) {
+      setError(err.message);
+      onToast?.(err.message, "error");
+    }
+  }
+
+  function renderLoadMore(section) {
+    if (!nextCursors[section]) return null;
+    return (
+      <div className="actions-row">
+        <button type="button" disabled={loadingMore === section} onClick={() => loadMore(section)}>
+          {loadingMore === section ? "Loading..." : "Load more"}
+        </button>
+      </div>
+    );
+  }
+
   useEffect(() => {
     loadAdminData()
       .catch((err) => {
@@ -56,7 +137,7 @@ export default function AdminDashboard({ onToast }) {
     try {
       const res = await api.adminDeleteUser(user.id);
       onToast?.(res.message || "User deleted", "success");
-      await loadAdminData();
+      await applyChanges();
     } catch (err) {
       setError(err.message);
       onToast?.(err.message, "error");
@@ -77,7 +158,7 @@ export default function AdminDashboard({ onToast }) {
     try {
       const res = await api.adminUpdateRoom(allocation.id, roomNumber);
       onToast?.(res.message || "Room updated", "success");
-      await loadAdminData();
+      await applyChanges();
     } catch (err) {
       setError(err.message);
       onToast?.(err.message, "error");
@@ -109,6 +190,28 @@ export default function AdminDashboard({ onToast }) {
         <div className="card"><h3>Activities</h3><p>{summary?.total_activities || 0}</p></div>
       </div>
 
+      <form className="actions-row" onSubmit={handleFilterSubmit}>
+        <input
+          type="text"
+          value={filters.search}
+          onChange={(e) => setFilters((prev) => ({ ...prev, search: e.target.value }))}
+          placeholder="Search users"
+        />
+        <input
+          type="text"
+          value={filters.student}
+          onChange={(e) => setFilters((prev) => ({ ...prev, student: e.target.value }))}
+          placeholder="Allocation student"
+        />
+        <input
+          type="text"
+          value={filters.action}
+          onChange={(e) => setFilters((prev) => ({ ...prev, action: e.target.value }))}
+          placeholder="Activity action"
+        />
+        <button type="submit">Filter</button>
+      </form>
+
       <h2>Users</h2>
       <div className="table-wrap">
         <table className="data-table">
@@ -151,6 +254,7 @@ export default function AdminDashboard({ onToast }) {
           </tbody>
         </table>
       </div>
+      {renderLoadMore("users")}
 
       <h2>Allocations</h2>
       <div className="table-wrap">
@@ -201,6 +305,7 @@ export default function AdminDashboard({ onToast }) {
           </tbody>
         </table>
       </div>
+      {renderLoadMore("allocations")}
 
       <h2>Recent Activities</h2>
       <div className="table-wrap">
@@ -231,6 +336,7 @@ export default function AdminDashboard({ onToast }) {
           </tbody>
         </table>
       </div>
+      {renderLoadMore("activities")}
     </section>
   );
 }
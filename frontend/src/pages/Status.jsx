@@ -12,16 +12,38 @@ export default function Status() {
     const res = await api.status();
     setAllocation(res.allocation);
     setError("");
+    return res.version;
   }
 
   useEffect(() => {
-    loadStatus().catch((err) => setError(err.message));
+    let source = null;
+    let intervalId = null;
+    let closed = false;
 
-    const intervalId = window.setInterval(() => {
-      loadStatus().catch(() => {});
-    }, 15000);
+    loadStatus()
+      .then((version) => {
+        if (closed) return;
+        if (typeof window.EventSource !== "function") {
+          intervalId = window.setInterval(() => {
+            loadStatus().catch(() => {});
+          }, 15000);
+          return;
+        }
+        // The server pushes one "allocation" event per change; EventSource reconnects on its own.
+        source = new window.EventSource(api.statusStreamUrl(version), { withCredentials: true });
+        source.addEventListener("allocation", (event) => {
+          const data = JSON.parse(event.data);
+          setAllocation(data.allocation);
+          setError("");
+        });
+      })
+      .catch((err) => setError(err.message));
 
-    return () => window.clearInterval(intervalId);
+    return () => {
+      closed = true;
+      if (source) source.close();
+      if (intervalId) window.clearInterval(intervalId);
+    };
   }, []);
 
   async function handleRefreshNow() {
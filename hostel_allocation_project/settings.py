@@ -59,13 +59,15 @@ TEMPLATES = [
 
 
 MIDDLEWARE = [
+    'hostel_app.metrics.MetricsMiddleware',
+    'hostel_app.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hostel_app.auth_cache.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,6 +87,15 @@ DATABASES = {
     )
 }
 
+# Per-process memory by default. Run several workers against a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) so cache invalidation reaches all of them.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
 AUTH_USER_MODEL = 'hostel_app.CustomUser'
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -101,9 +112,66 @@ STATICFILES_DIRS = [BASE_DIR / 'frontend' / 'dist']
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# "django.contrib.sessions.backends.signed_cookies" (or a cache backend) lets /api/session/
+# answer without any database query.
+SESSION_ENGINE = os.getenv("DJANGO_SESSION_ENGINE", "django.contrib.sessions.backends.db")
+# Per-process LRU of authenticated users; other processes see user changes after at most the TTL (0 disables).
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "2048"))
+
 SESSION_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_SAMESITE = "None" if not DEBUG else "Lax"
 CSRF_COOKIE_SAMESITE = "None" if not DEBUG else "Lax"
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# "sync" writes each ActivityLog row inline; "buffered" queues them and bulk inserts off the request path.
+ACTIVITY_LOG_MODE = os.getenv("ACTIVITY_LOG_MODE", "sync")
+ACTIVITY_LOG_BUFFER_SIZE = int(os.getenv("ACTIVITY_LOG_BUFFER_SIZE", "100"))
+ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", "2.0"))
+ACTIVITY_LOG_MAX_QUEUE = int(os.getenv("ACTIVITY_LOG_MAX_QUEUE", "10000"))
+# manage.py archive_activity moves whole months older than this into gzipped JSONL files.
+ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv("ACTIVITY_LOG_RETENTION_DAYS", "180"))
+ACTIVITY_LOG_ARCHIVE_DIR = Path(os.getenv("ACTIVITY_LOG_ARCHIVE_DIR", BASE_DIR / "archive" / "activity"))
+
+# Summary counters and activity rollups are summed in each process and written at most this often
+# (0 writes after every commit).
+SUMMARY_FLUSH_INTERVAL = float(os.getenv("SUMMARY_FLUSH_INTERVAL", "1.0"))
+
+# /api/changes/ waits this long for a gap in the change sequence to fill before skipping it;
+# manage.py prune_change_feed drops events older than the retention.
+CHANGE_FEED_SETTLE_SECONDS = float(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "5"))
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "7"))
+
+# Each ASGI worker checks the change feed this often for the allocation status streams it holds open.
+STATUS_STREAM_POLL_INTERVAL = float(os.getenv("STATUS_STREAM_POLL_INTERVAL", "1.0"))
+
+# "auto" encodes API responses with orjson when it is installed; "stdlib" forces the json module.
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+# Brotli (when installed) or gzip for compressible responses of at least COMPRESSION_MIN_BYTES.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# "direct" reserves a room per request; "batched" groups concurrent applications per hostel
+# into one transaction (needs threaded workers to take effect).
+ADMISSION_MODE = os.getenv("ADMISSION_MODE", "direct")
+ADMISSION_BATCH_WINDOW_MS = float(os.getenv("ADMISSION_BATCH_WINDOW_MS", "5"))
+ADMISSION_MAX_BATCH = int(os.getenv("ADMISSION_MAX_BATCH", "100"))
+
+# ISO datetimes bounding when students may submit ranked hostel preferences; empty leaves that side open.
+HOSTEL_PREFERENCE_WINDOW_OPENS = os.getenv("HOSTEL_PREFERENCE_WINDOW_OPENS", "")
+HOSTEL_PREFERENCE_WINDOW_CLOSES = os.getenv("HOSTEL_PREFERENCE_WINDOW_CLOSES", "")
+HOSTEL_PREFERENCE_MAX_CHOICES = int(os.getenv("HOSTEL_PREFERENCE_MAX_CHOICES", "50"))
+
+# "true" routes login, register, session, status and dashboard to async views. Only pays off
+# under an ASGI server (uvicorn, see README); under gunicorn's sync workers keep it off.
+API_ASYNC_VIEWS = os.getenv("API_ASYNC_VIEWS", "False").lower() == "true"
+# Threads that hash and verify passwords for the async views. Hashing is CPU-bound, so more
+# threads than cores only makes every login slower.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# Per-view request metrics served at /api/metrics/ (admins, or "Authorization: Bearer $METRICS_TOKEN").
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
@@ -0,0 +1,154 @@
+"""Activity logging, either synchronous or buffered off the request path.
+
+``ACTIVITY_LOG_MODE = "sync"`` (the default) writes each entry as it happens.
+``"buffered"`` queues entries in process and a background thread writes them with
+``bulk_create`` once ``ACTIVITY_LOG_BUFFER_SIZE`` entries are waiting or
+``ACTIVITY_LOG_FLUSH_INTERVAL`` seconds have passed. Whatever is queued is flushed
+at interpreter exit, which covers gunicorn's graceful worker shutdown.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, IntegrityError, close_old_connections
+from django.utils import timezone
+
+from . import counters, rollups
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    def __init__(self, max_size=100, flush_interval=2.0, max_queue=10000):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._entries = deque(maxlen=max_queue)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def add(self, entry):
+        with self._lock:
+            if len(self._entries) == self._entries.maxlen:
+                self.dropped += 1
+            self._entries.append(entry)
+            depth = len(self._entries)
+        self._ensure_worker()
+        if depth >= self.max_size:
+            self._wakeup.set()
+
+    def _ensure_worker(self):
+        # Started lazily and restarted after a fork, since threads do not survive into the child.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="activity-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._entries)
+                self._entries.clear()
+            if not entries:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                self._write(entries)
+            except DatabaseError:
+                logger.exception("Dropping %d buffered activity log entries", len(entries))
+                self.dropped += len(entries)
+                return 0
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushed += len(entries)
+            self.flush_count += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            return len(entries)
+
+    def _write(self, entries):
+        try:
+            ActivityLog.objects.bulk_create(entries, batch_size=500)
+        except IntegrityError:
+            # A user was deleted while their entries were queued; keep the entries without the user.
+            user_ids = {entry.user_id for entry in entries if entry.user_id}
+            existing = set(get_user_model().objects.filter(id__in=user_ids).values_list("id", flat=True))
+            for entry in entries:
+                if entry.user_id not in existing:
+                    entry.user_id = None
+            ActivityLog.objects.bulk_create(entries, batch_size=500)
+        counters.bump("total_activities", len(entries))
+        rollups.count_activity((entry.action, entry.created_at) for entry in entries)
+
+    def stats(self):
+        return {
+            "queue_depth": len(self._entries),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "flush_count": self.flush_count,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+buffer = ActivityBuffer(
+    max_size=getattr(settings, "ACTIVITY_LOG_BUFFER_SIZE", 100),
+    flush_interval=getattr(settings, "ACTIVITY_LOG_FLUSH_INTERVAL", 2.0),
+    max_queue=getattr(settings, "ACTIVITY_LOG_MAX_QUEUE", 10000),
+)
+atexit.register(buffer.flush)
+
+
+def is_buffered():
+    return getattr(settings, "ACTIVITY_LOG_MODE", "sync") == "buffered"
+
+
+def log(user, action, details=""):
+    user_id = user.pk if user is not None else None
+    if is_buffered():
+        buffer.add(ActivityLog(user_id=user_id, action=action, details=details[:255], created_at=timezone.now()))
+    else:
+        ActivityLog.objects.create(user_id=user_id, action=action, details=details[:255])
+
+
+def log_many(entries):
+    """Log several (user_id, action, details) entries with one insert."""
+    rows = [
+        ActivityLog(user_id=user_id, action=action, details=details[:255], created_at=timezone.now())
+        for user_id, action, details in entries
+    ]
+    if is_buffered():
+        for row in rows:
+            buffer.add(row)
+    elif rows:
+        ActivityLog.objects.bulk_create(rows, batch_size=500)
+        counters.bump("total_activities", len(rows))
+        rollups.count_activity((row.action, row.created_at) for row in rows)
+
+
+def stats():
+    return {"mode": "buffered" if is_buffered() else "sync", **buffer.stats()}
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, Hostel, Allocation, ActivityLog
+from .models import CustomUser, Hostel, Allocation, ActivityLog, Room
 
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
@@ -13,6 +13,12 @@ class HostelAdmin(admin.ModelAdmin):
     search_fields = ("name", "location")
 
 
+@admin.register(Room)
+class RoomAdmin(admin.ModelAdmin):
+    list_display = ("hostel", "number", "floor", "capacity", "occupancy")
+    list_filter = ("hostel", "floor")
+
+
 @admin.register(Allocation)
 class AllocationAdmin(admin.ModelAdmin):
     list_display = ("student", "hostel", "room_number", "allocated_on")
@@ -0,0 +1,158 @@
+"""Batched admission for student applications.
+
+With ``ADMISSION_MODE = "batched"`` concurrent applications for the same hostel
+queue up in arrival order. The first request in line becomes the leader: it waits
+``ADMISSION_BATCH_WINDOW_MS`` for the burst to gather, then admits up to
+``ADMISSION_MAX_BATCH`` applicants in one transaction (one hostel row lock, one
+``total_rooms`` update, one room reservation and one bulk insert) and hands the
+lead to the next request still waiting. Followers just wait for their outcome.
+
+Batching happens inside one worker process, so it needs threaded workers
+(e.g. ``gunicorn --threads``); separate processes still serialize on the row lock.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from . import activity, changes, counters, hostel_cache, rollups
+from .models import Allocation, Hostel
+from .rooms import reserve_rooms
+
+logger = logging.getLogger(__name__)
+
+APPLIED = "applied"
+ALREADY_ALLOCATED = "already_allocated"
+FULL = "full"
+FAILED = "failed"
+
+
+@dataclass
+class Ticket:
+    student_id: int
+    outcome: str = None
+    room_number: str = ""
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class _Lane:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.leader = None
+
+
+_lanes = {}
+_lanes_lock = threading.Lock()
+
+
+def is_batched():
+    return getattr(settings, "ADMISSION_MODE", "direct") == "batched"
+
+
+def _lane(hostel_id):
+    with _lanes_lock:
+        return _lanes.setdefault(hostel_id, _Lane())
+
+
+def submit(student_id, hostel_id):
+    """Queue an application and block until its batch is decided; returns the Ticket."""
+    ticket = Ticket(student_id)
+    lane = _lane(hostel_id)
+    with lane.lock:
+        lane.pending.append(ticket)
+        if lane.leader is None:
+            lane.leader = ticket
+            ticket.done.set()
+
+    ticket.done.wait()
+    if ticket.outcome is None:
+        # Woken without an outcome: this request leads the next batch.
+        _lead(lane, hostel_id)
+    return ticket
+
+
+def _lead(lane, hostel_id):
+    time.sleep(getattr(settings, "ADMISSION_BATCH_WINDOW_MS", 5) / 1000)
+    max_batch = getattr(settings, "ADMISSION_MAX_BATCH", 100)
+    with lane.lock:
+        batch, lane.pending = lane.pending[:max_batch], lane.pending[max_batch:]
+    try:
+        admit_batch(hostel_id, batch)
+    except Exception:
+        logger.exception("Admission batch for hostel %s failed", hostel_id)
+    finally:
+        for ticket in batch:
+            if ticket.outcome is None:
+                ticket.outcome = FAILED
+            ticket.done.set()
+        with lane.lock:
+            lane.leader = lane.pending[0] if lane.pending else None
+            if lane.leader is not None:
+                lane.leader.done.set()
+
+
+def admit_batch(hostel_id, tickets):
+    """Admit tickets in arrival order while rooms last, with one write of each kind."""
+    try:
+        with transaction.atomic():
+            hostel_name = _admit(hostel_id, tickets)
+    except IntegrityError:
+        # A student in the batch got an allocation from another process meanwhile; decide one by one.
+        for ticket in tickets:
+            ticket.outcome = None
+            try:
+                with transaction.atomic():
+                    hostel_name = _admit(hostel_id, [ticket])
+            except IntegrityError:
+                ticket.outcome = ALREADY_ALLOCATED
+
+    # Logged after commit so a rolled back batch leaves no entries behind in the buffered log.
+    activity.log_many(
+        (t.student_id, "apply", f"Applied for {hostel_name} ({t.room_number})") for t in tickets if t.outcome == APPLIED
+    )
+
+
+def _admit(hostel_id, tickets):
+    hostel = Hostel.objects.select_for_update().filter(id=hostel_id).first()
+    if hostel is None:
+        for ticket in tickets:
+            ticket.outcome = FAILED
+        return None
+
+    already = set(
+        Allocation.objects.filter(student_id__in=[t.student_id for t in tickets]).values_list("student_id", flat=True)
+    )
+    eligible = []
+    for ticket in tickets:
+        if ticket.student_id in already:
+            ticket.outcome = ALREADY_ALLOCATED
+        else:
+            already.add(ticket.student_id)
+            eligible.append(ticket)
+
+    admitted = eligible[: max(hostel.total_rooms or 0, 0)]
+    for ticket in eligible[len(admitted):]:
+        ticket.outcome = FULL
+    if not admitted:
+        return hostel.name
+
+    Hostel.objects.filter(id=hostel_id).update(total_rooms=F("total_rooms") - len(admitted))
+    rooms = reserve_rooms(hostel_id, len(admitted))
+    created = Allocation.objects.bulk_create(
+        [Allocation(student_id=t.student_id, hostel_id=hostel_id, room_number=room) for t, room in zip(admitted, rooms)]
+    )
+    # bulk_create skips post_save, so counters, rollups and the change feed (which drives status streams) are updated here.
+    counters.bump("total_allocations", len(admitted))
+    rollups.count_allocations((a.hostel_id, a.allocated_on) for a in created)
+    changes.record_many(changes.ALLOCATION, changes.CREATED, [(a.pk, a.student_id) for a in created])
+    changes.record(changes.HOSTEL, changes.UPDATED, hostel_id)
+    for ticket, room in zip(admitted, rooms):
+        ticket.outcome = APPLIED
+        ticket.room_number = room
+    hostel_cache.invalidate()
+    return hostel.name
@@ -4,3 +4,5 @@ class HostelAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hostel_app'
 
+    def ready(self):
+        from . import checks, signals  # noqa: F401
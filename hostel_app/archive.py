@@ -0,0 +1,261 @@
+"""Activity log archive: old rows move to one gzipped JSONL file per month.
+
+Only whole months are archived (the cutoff is rounded down to the first of its
+month), so each month file holds its rows in id order. ``archive_activity``
+appends each batch to the month files of its rows as one complete gzip member
+per month, fsyncs them and only then deletes the batch, so a row is never
+deleted before it is archived; ``gzip`` reads the members back as one stream.
+A crash between writing a batch and deleting it archives that batch again on the
+next run, and ``read`` skips the repeated ids. A crash while a member is being
+written leaves it unfinished at the end of the file; the next run rewrites its
+whole lines as a finished member before appending. ``read`` keeps the whole
+lines of an unfinished member and resumes at the next one, so files written
+before members were finished per batch stay readable.
+"""
+import gzip
+import json
+import os
+import mmap
+import re
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ActivityLog
+
+FILE_PATTERN = re.compile(r"^activity-(\d{4})-(\d{2})\.jsonl\.gz$")
+FIELDS = ("id", "user_id", "user__username", "action", "details", "created_at")
+GZIP_MAGIC = b"\x1f\x8b\x08"
+
+
+def archive_dir():
+    return Path(getattr(settings, "ACTIVITY_LOG_ARCHIVE_DIR", Path(settings.BASE_DIR) / "archive" / "activity"))
+
+
+def retention_cutoff(days=None):
+    days = getattr(settings, "ACTIVITY_LOG_RETENTION_DAYS", 180) if days is None else days
+    return month_start(timezone.now() - timedelta(days=days))
+
+
+def month_start(moment):
+    moment = timezone.localtime(moment) if timezone.is_aware(moment) else moment
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def month_path(directory, year, month):
+    return Path(directory) / f"activity-{year:04d}-{month:02d}.jsonl.gz"
+
+
+def _month_of(moment):
+    moment = timezone.localtime(moment) if timezone.is_aware(moment) else moment
+    return moment.year, moment.month
+
+
+def _record(row):
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "username": row["user__username"],
+        "action": row["action"],
+        "details": row["details"],
+        "created_at": row["created_at"].isoformat(),
+    }
+
+
+def _members(data, chunk_size=1 << 16):
+    """Yield (start, end, decompressed bytes) per gzip member of ``data``; ``end`` is None if unfinished.
+
+    After an unfinished or corrupt member the walk resumes at the next gzip header.
+    """
+    view = memoryview(data)
+    start = 0
+    while 0 <= start < len(data):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        pieces, position, end = [], start, None
+        while position < len(data):
+            block = view[position:position + chunk_size]
+            saved = decompressor.copy()
+            try:
+                pieces.append(decompressor.decompress(block))
+            except zlib.error:
+                # Replay the block byte by byte to keep what decodes before the damage.
+                for i in range(len(block)):
+                    try:
+                        pieces.append(saved.decompress(block[i:i + 1]))
+                    except zlib.error:
+                        break
+                break
+            if decompressor.eof:
+                end = position + len(block) - len(decompressor.unused_data)
+                break
+            position += len(block)
+        yield start, end, b"".join(pieces)
+        start = end if end is not None else data.find(GZIP_MAGIC, start + 1)
+
+
+def _map(handle):
+    # An empty file cannot be mapped.
+    return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(handle.fileno()).st_size else b""
+
+
+class _MonthWriters:
+    # One append-only file per month touched by this run; each sync adds one complete gzip member per month.
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.files = {}
+        self.lines = {}
+
+    def write(self, month, line):
+        self.lines.setdefault(month, []).append(line)
+
+    def _open(self, month):
+        handle = self.files.get(month)
+        if handle is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handle = self.files[month] = open(month_path(self.directory, *month), "ab")
+            with open(handle.name, "rb") as existing:
+                data = _map(existing)
+                last = None
+                for last in _members(data):
+                    pass
+                if last is not None and last[1] is None:
+                    # A crash left the last member unfinished: rewrite its whole lines as a finished one.
+                    salvaged = last[2][: last[2].rfind(b"\n") + 1]
+                    handle.truncate(last[0])
+                    if salvaged:
+                        handle.write(gzip.compress(salvaged))
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                if data:
+                    data.close()
+        return handle
+
+    def sync(self):
+        for month, lines in self.lines.items():
+            handle = self._open(month)
+            handle.write(gzip.compress(b"".join(lines)))
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.lines.clear()
+
+    def close(self):
+        for handle in self.files.values():
+            handle.close()
+        self.files.clear()
+
+
+def archive_activity(before, directory=None, batch_size=5000, dry_run=False):
+    """Move activity rows created before ``before`` into monthly archive files.
+
+    ``before`` is rounded down to the start of its month. Returns {"YYYY-MM": rows
+    archived}. Rows are read by id in batches; each batch is written and fsynced,
+    then deleted in the same transaction that read it.
+    """
+    before = month_start(before)
+    directory = Path(directory or archive_dir())
+    queryset = ActivityLog.objects.filter(created_at__lt=before).order_by("id")
+    archived = {}
+    if dry_run:
+        for created_at in queryset.values_list("created_at", flat=True).iterator(chunk_size=batch_size):
+            key = "%04d-%02d" % _month_of(created_at)
+            archived[key] = archived.get(key, 0) + 1
+        return archived
+
+    writers = _MonthWriters(directory)
+    last_id = 0
+    try:
+        while True:
+            with transaction.atomic():
+                rows = list(queryset.filter(id__gt=last_id).values(*FIELDS)[:batch_size])
+                if not rows:
+                    break
+                for row in rows:
+                    month = _month_of(row["created_at"])
+                    writers.write(month, json.dumps(_record(row), ensure_ascii=False).encode() + b"\n")
+                    key = "%04d-%02d" % month
+                    archived[key] = archived.get(key, 0) + 1
+                writers.sync()
+                ids = [row["id"] for row in rows]
+                # post_delete counts the rows off the summary counter; the bumps collapse into one delta.
+                ActivityLog.objects.filter(id__in=ids).delete()
+                last_id = ids[-1]
+    finally:
+        writers.close()
+    return archived
+
+
+def archived_months(directory=None):
+    """(year, month, path) for every archive file, oldest first."""
+    directory = Path(directory or archive_dir())
+    if not directory.is_dir():
+        return []
+    months = []
+    for path in directory.iterdir():
+        match = FILE_PATTERN.match(path.name)
+        if match:
+            months.append((int(match[1]), int(match[2]), path))
+    return sorted(months)
+
+
+def read(directory=None, since=None, until=None, action=None, user=None):
+    """Stream archived entries as dicts, oldest month first.
+
+    ``since``/``until`` bound created_at (aware datetimes, until exclusive) and also
+    select which month files are opened; ``user`` matches a user id or a username.
+    """
+    first = _month_of(since) if since else None
+    last = _month_of(until) if until else None
+    for year, month, path in archived_months(directory):
+        if (first and (year, month) < first) or (last and (year, month) > last):
+            continue
+        with open(path, "rb") as handle:
+            data = _map(handle)
+            entries = _entries(data)
+            try:
+                yield from _matching(entries, since, until, action, user)
+            finally:
+                # The mapping can only close once nothing reads from it any more.
+                entries.close()
+                if data:
+                    data.close()
+
+
+def _entries(data):
+    for _start, end, raw in _members(data):
+        # Only whole lines count; an unfinished member ends in a cut-off one.
+        for line in raw.split(b"\n")[:-1]:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                if end is not None:
+                    raise
+
+
+def _matching(entries, since, until, action, user):
+    last_id = 0
+    for entry in entries:
+        if entry["id"] <= last_id:
+            continue
+        last_id = entry["id"]
+        if action and entry["action"] != action:
+            continue
+        if user is not None and str(user) not in (str(entry["user_id"]), entry["username"]):
+            continue
+        if since or until:
+            created_at = parse_datetime(entry["created_at"])
+            if (since and created_at < since) or (until and created_at >= until):
+                continue
+        yield entry
+
+
+def parse_moment(value):
+    """Parse an ISO date or datetime from the command line as an aware datetime."""
+    moment = parse_datetime(value)
+    if moment is None:
+        moment = datetime.fromisoformat(value)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
@@ -0,0 +1,175 @@
+"""Per-process LRU of authenticated users for API requests.
+
+Polling endpoints (dashboard, status, change feed) resolve the same few users
+over and over; each resolution is a ``SELECT`` of the user row. Entries are keyed
+by the session's user id, auth backend and session auth hash, the same values
+Django's ``get_user`` checks, so a password change (new hash) or logout (no key)
+never matches an old entry. Every save or delete of a user drops its entries in
+this process; other worker processes serve the old row for at most
+``AUTH_USER_CACHE_TTL`` seconds. ``AUTH_USER_CACHE_TTL = 0`` turns the cache off.
+
+The session row is still read on every request unless the session engine keeps
+sessions out of the database (``DJANGO_SESSION_ENGINE``, e.g. ``cached_db``).
+
+Each user also has a version in the shared cache, moved after every committed
+save or delete of the user. The profile ``session_api`` keeps in the session
+records it and is re-read from the database once it no longer matches. A
+version missing from the cache is replaced by a new one, so eviction only costs
+a re-read.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+class UserCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Each request gets its own copy, so a view changing request.user cannot leak into others.
+        return copy.copy(entry[0])
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (copy.copy(user), time.monotonic() + settings.AUTH_USER_CACHE_TTL)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+users = UserCache()
+
+
+def is_enabled():
+    return settings.AUTH_USER_CACHE_TTL > 0 and settings.AUTH_USER_CACHE_SIZE > 0
+
+
+def _version_key(user_id):
+    return f"user:version:{user_id}"
+
+
+def user_version(user_id):
+    current = cache.get(_version_key(user_id))
+    if current is None:
+        current = int(time.time() * 1000)
+        if not cache.add(_version_key(user_id), current, timeout=None):
+            current = cache.get(_version_key(user_id), current)
+    return current
+
+
+async def auser_version(user_id):
+    current = await cache.aget(_version_key(user_id))
+    if current is None:
+        current = int(time.time() * 1000)
+        if not await cache.aadd(_version_key(user_id), current, timeout=None):
+            current = await cache.aget(_version_key(user_id), current)
+    return current
+
+
+def _changed(user_id):
+    users.invalidate(user_id)
+    key = _version_key(user_id)
+    cache.set(key, max(int(time.time() * 1000), (cache.get(key) or 0) + 1), timeout=None)
+
+
+def forget(user_id):
+    """Drop cached copies of a user now, then again with a new version once the change commits.
+
+    The version moves only after commit, so no reader records it next to the old row.
+    """
+    users.invalidate(user_id)
+    transaction.on_commit(partial(_changed, user_id))
+
+
+def _key(user_id, backend_path, session_hash):
+    if user_id is None or not session_hash or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    return (str(user_id), backend_path, session_hash)
+
+
+def _verified(user, key):
+    # Only cache a user Django accepted for exactly this session hash (not a fallback-secret match).
+    return (
+        key is not None
+        and user.is_authenticated
+        and str(user.pk) == key[0]
+        and constant_time_compare(user.get_session_auth_hash(), key[2])
+    )
+
+
+def get_user(request):
+    if not hasattr(request, "_cached_user"):
+        session = request.session
+        key = _key(session.get(auth.SESSION_KEY), session.get(auth.BACKEND_SESSION_KEY), session.get(auth.HASH_SESSION_KEY))
+        user = users.get(key) if key else None
+        if user is None:
+            user = auth.get_user(request)
+            if _verified(user, key):
+                users.set(key, user)
+        request._cached_user = user
+    return request._cached_user
+
+
+async def aget_user(request):
+    if not hasattr(request, "_acached_user"):
+        session = request.session
+        key = _key(
+            await session.aget(auth.SESSION_KEY),
+            await session.aget(auth.BACKEND_SESSION_KEY),
+            await session.aget(auth.HASH_SESSION_KEY),
+        )
+        user = users.get(key) if key else None
+        if user is None:
+            user = await auth.aget_user(request)
+            if _verified(user, key):
+                users.set(key, user)
+        request._acached_user = user
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that resolves request.user through the LRU above."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        if is_enabled():
+            request.user = SimpleLazyObject(lambda: get_user(request))
+            request.auser = partial(aget_user, request)
@@ -0,0 +1,84 @@
+"""Small helpers shared by the ``bench_*`` management commands."""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._errors = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, name, seconds, ok=True):
+        with self._lock:
+            self._samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        outcome = {"ok": True}
+        try:
+            yield outcome
+        except Exception:
+            outcome["ok"] = False
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, outcome["ok"])
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        for name, samples in sorted(self._samples.items()):
+            ordered = sorted(samples)
+            endpoints[name] = {
+                "requests": len(ordered),
+                "errors": self._errors.get(name, 0),
+                "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else None,
+                "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        total = sum(item["requests"] for item in endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+            "endpoints": endpoints,
+        }
+
+
+def write_report(path, report):
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2, default=str)
+
+
+def compare_reports(previous, current):
+    """Yield one line per endpoint comparing p95 latency and throughput with an earlier run."""
+    before = previous.get("endpoints", {})
+    for name, stats in current.get("endpoints", {}).items():
+        old = before.get(name)
+        if not old:
+            yield f"{name}: new endpoint"
+            continue
+        yield (
+            f"{name}: p95 {old['p95_ms']} -> {stats['p95_ms']} ms, "
+            f"throughput {old['throughput_rps']} -> {stats['throughput_rps']} req/s"
+        )
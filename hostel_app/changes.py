@@ -0,0 +1,126 @@
+"""Change feed: hostels, allocations and users changed after a given version.
+
+Every committed create, update or delete appends a ChangeEvent whose id is the
+feed's version. Events are written after the transaction commits (one insert per
+transaction, with repeated changes to a row collapsed), so a client holding
+version N asks for ``id > N`` and gets work proportional to what changed.
+
+Sequence values are handed out before their insert commits, so a concurrent
+writer can briefly leave a hole below a visible id. ``feed`` stops before a hole
+younger than ``CHANGE_FEED_SETTLE_SECONDS`` and the client picks it up on the next
+poll; older holes are ids of failed inserts and are skipped.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from . import deferred
+from .models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+HOSTEL, ALLOCATION, USER = "hostel", "allocation", "user"
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+
+
+def _write(changes):
+    try:
+        ChangeEvent.objects.bulk_create(
+            [
+                ChangeEvent(kind=kind, object_id=object_id, op=op, owner_id=owner_id)
+                for (kind, object_id), (op, owner_id) in changes.items()
+            ],
+            batch_size=1000,
+        )
+    except DatabaseError:
+        logger.exception("Could not write %d change feed event(s)", len(changes))
+
+
+def _merge(previous, op):
+    # Folds two changes to one row within a transaction; None drops the row entirely.
+    if previous is None:
+        return op
+    if op == DELETED:
+        return None if previous == CREATED else DELETED
+    if op == CREATED:
+        return UPDATED if previous == DELETED else CREATED
+    return previous
+
+
+def record_many(kind, op, objects):
+    """Record ``op`` for (object_id, owner_id) pairs once the current transaction commits."""
+    changes = deferred.pending(_write, dict)
+    immediate = changes is None
+    if immediate:
+        changes = {}
+    for object_id, owner_id in objects:
+        if object_id is None:
+            continue
+        key = (kind, object_id)
+        previous = changes.get(key)
+        merged = _merge(previous and previous[0], op)
+        if merged is None:
+            changes.pop(key, None)
+        else:
+            changes[key] = (merged, owner_id if owner_id is not None else previous and previous[1])
+    if immediate and changes:
+        _write(changes)
+
+
+def record(kind, op, object_id, owner_id=None):
+    record_many(kind, op, [(object_id, owner_id)])
+
+
+def latest():
+    return ChangeEvent.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def _first_open_hole(since):
+    """First missing id above ``since`` that an insert still in flight may fill, or None."""
+    settle = timezone.now() - timedelta(seconds=getattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 5))
+    recent = list(
+        ChangeEvent.objects.filter(id__gt=since, created_at__gt=settle).order_by("id").values_list("id", flat=True)
+    )
+    if not recent:
+        return None
+    expected = since
+    if recent[0] > since + 1:
+        expected = ChangeEvent.objects.filter(id__gt=since, id__lt=recent[0]).aggregate(last=Max("id"))["last"] or since
+    for event_id in recent:
+        if event_id != expected + 1:
+            return expected + 1
+        expected = event_id
+    return None
+
+
+def feed(since, limit, owner_id=None):
+    """Return (events, version, reset) for up to ``limit`` events after ``since``.
+
+    ``owner_id`` limits allocation and user events to that student's own rows; the
+    version still advances past other students' events. ``reset`` means ``since``
+    is outside the retained events (pruned, or from another database) and the
+    client must reload instead.
+    """
+    bounds = ChangeEvent.objects.aggregate(oldest=Min("id"), newest=Max("id"))
+    newest = bounds["newest"] or 0
+    if since and (bounds["oldest"] is None or not bounds["oldest"] - 1 <= since <= newest):
+        return [], newest, True
+
+    hole = _first_open_hole(since)
+    through = min(newest, hole - 1) if hole else newest
+    events = ChangeEvent.objects.filter(id__gt=since, id__lte=through)
+    if owner_id is not None:
+        events = events.filter(Q(kind=HOSTEL) | Q(owner_id=owner_id))
+    events = list(events.order_by("id").values("id", "kind", "object_id", "op")[:limit])
+    version = events[-1]["id"] if len(events) == limit else max(through, since)
+    return events, version, False
+
+
+def prune(before):
+    """Delete events older than ``before``, always keeping the newest so the sequence position stays known."""
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=before, id__lt=latest()).delete()
+    return deleted
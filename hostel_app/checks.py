@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # Session profiles and the hostel catalogue are invalidated through versions in the default cache.
+    if settings.CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache":
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process, so a change to a user or a hostel is only "
+            "seen by the worker process that made it until cached entries expire.",
+            hint="Set DJANGO_CACHE_BACKEND to a shared backend (e.g. Redis) when running more than one worker.",
+            id="hostel_app.W001",
+        )
+    ]
@@ -0,0 +1,144 @@
+"""Negotiated brotli/gzip compression for API responses.
+
+Responses of a compressible type (JSON, CSV, plain text, HTML) are compressed
+when they are at least ``COMPRESSION_MIN_BYTES`` long: brotli when the client
+accepts ``br`` and the ``brotli`` package is installed, gzip otherwise. Streaming
+CSV exports are compressed chunk by chunk; event streams and static files (which
+WhiteNoise serves precompressed) pass through untouched. ``COMPRESSION_ENABLED =
+False`` removes the middleware.
+
+Both encodings get 0-99 bytes of random-length padding against BREACH-style
+length attacks: gzip in the header's file name field (as GZipMiddleware does),
+brotli in a metadata meta-block, which decoders skip. The brotli stream is
+flushed to a byte boundary, then the padding and the closing empty last
+meta-block are appended.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+MAX_RANDOM_BYTES = 100
+# ISLAST=1, ISLASTEMPTY=1: the empty meta-block that ends a brotli stream.
+_BROTLI_LAST = b"\x03"
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts, from an Accept-Encoding header (q=0 excluded)."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _brotli_padding():
+    # A metadata meta-block (RFC 7932 9.2) at a byte boundary: ISLAST=0, MNIBBLES=0,
+    # reserved bit, MSKIPBYTES and MSKIPLEN-1, zero bits to the next byte, then the bytes.
+    size = secrets.randbelow(MAX_RANDOM_BYTES)
+    if not size:
+        return bytes([3 << 1])
+    skip = size - 1
+    return bytes([(3 << 1) | (1 << 4) | ((skip & 0x3) << 6), skip >> 2]) + b"\0" * size
+
+
+def _brotli_close(compressor):
+    return compressor.flush() + _brotli_padding() + _BROTLI_LAST
+
+
+def _brotli_quality():
+    return getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5)
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=_brotli_quality())
+        return compressor.process(content) + _brotli_close(compressor)
+    return compress_string(content, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def _brotli_sequence(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield _brotli_close(compressor)
+
+
+def compress_stream(chunks, encoding):
+    if encoding == "br":
+        return _brotli_sequence(chunks, _brotli_quality())
+    return compress_sequence(chunks, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        if not getattr(settings, "COMPRESSION_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.min_bytes = getattr(settings, "COMPRESSION_MIN_BYTES", 1024)
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if response.streaming:
+            # Async streams are event streams or similar long-lived responses; leave them alone.
+            if response.is_async:
+                return response
+        elif len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A strong ETag names the uncompressed bytes; weaken it as GZipMiddleware does.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
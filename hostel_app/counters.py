@@ -0,0 +1,71 @@
+"""Maintained row counts behind the admin dashboard summary.
+
+Deltas are summed per transaction and, once it commits, added to an in-process
+accumulator (dropped if it rolls back). A background thread writes what has
+gathered every ``SUMMARY_FLUSH_INTERVAL`` seconds with one UPDATE per counter,
+so the counter rows are not written by every request. ``read`` adds this
+process's pending deltas; other processes' show up within the interval. A crash
+before a flush can leave counters off (a failed flush is logged and retried);
+``manage.py recompute_summary_counters`` repairs that. It counts rows whose deltas
+other processes have not flushed yet, so run it while writes are quiet.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from . import deferred
+from .models import ActivityLog, Allocation, Hostel, SummaryCounter
+
+COUNTERS = ("total_users", "total_students", "total_hostels", "total_allocations", "total_activities")
+
+
+def apply_deltas(deltas):
+    with transaction.atomic():
+        for name, delta in sorted(deltas.items()):
+            SummaryCounter.objects.filter(name=name).update(value=F("value") + delta)
+
+
+pending = deferred.Accumulator(apply_deltas, "summary-counter")
+
+
+def bump(name, delta=1):
+    if not delta:
+        return
+    deltas = deferred.pending(pending.add, dict)
+    if deltas is None:
+        pending.add({name: delta})
+    else:
+        deltas[name] = deltas.get(name, 0) + delta
+
+
+def compute():
+    User = get_user_model()
+    return {
+        "total_users": User.objects.count(),
+        "total_students": User.objects.filter(role="student").count(),
+        "total_hostels": Hostel.objects.count(),
+        "total_allocations": Allocation.objects.count(),
+        "total_activities": ActivityLog.objects.count(),
+    }
+
+
+def recompute():
+    pending.discard()
+    with transaction.atomic():
+        # Hold the counter rows so flushes from concurrent commits wait for the new totals.
+        list(SummaryCounter.objects.select_for_update().filter(name__in=COUNTERS))
+        values = compute()
+        for name, value in values.items():
+            SummaryCounter.objects.update_or_create(name=name, defaults={"value": value})
+    return values
+
+
+def read():
+    """Return (counters, as_of) in one query, seeding the table on first use."""
+    rows = list(SummaryCounter.objects.filter(name__in=COUNTERS).values_list("name", "value", "updated_at"))
+    if len(rows) < len(COUNTERS):
+        recompute()
+        rows = list(SummaryCounter.objects.filter(name__in=COUNTERS).values_list("name", "value", "updated_at"))
+    unflushed = pending.pending()
+    values = {name: value + unflushed.get(name, 0) for name, value, _ in rows}
+    return values, max(updated_at for _, _, updated_at in rows)
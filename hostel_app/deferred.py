@@ -0,0 +1,143 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class _Pending:
+    def __init__(self, apply, data):
+        self.apply = apply
+        self.data = data
+        self.applied = False
+
+    def __call__(self):
+        self.applied = True
+        self.apply(self.data)
+
+
+def pending(apply, factory, using=None):
+    """Return the container ``apply`` receives once the current transaction commits.
+
+    Repeated calls inside one transaction share a container, so many writes turn
+    into a single ``apply`` call. The container is registered with
+    ``transaction.on_commit`` and only referenced weakly here: a rollback drops the
+    callback and with it the container, and the next call starts a new one. Data
+    added inside a savepoint that rolls back stays in a container registered
+    before that savepoint. Outside a transaction this returns None and the caller
+    applies immediately.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    if not transaction.get_connection(using).in_atomic_block:
+        return None
+
+    # Connections are per thread, so a thread-local map is per connection.
+    containers = getattr(_local, "containers", None)
+    if containers is None:
+        containers = _local.containers = {}
+    ref = containers.get((using, apply))
+    callback = ref() if ref is not None else None
+    # An applied container is done with; captureOnCommitCallbacks runs callbacks without removing them.
+    if callback is None or callback.applied:
+        callback = _Pending(apply, factory())
+        containers[(using, apply)] = weakref.ref(callback)
+        # robust: the write already committed, a failing follow-up must not turn it into an error.
+        transaction.on_commit(callback, robust=True, using=using)
+    return callback.data
+
+
+def reset():
+    """Forget this thread's open containers; the next ``pending`` call starts a new one."""
+    _local.containers = {}
+
+
+class Accumulator:
+    """Deltas summed per key in this process and handed to ``apply`` together.
+
+    Callers add what their transaction changed once it commits. A background
+    thread applies everything gathered every ``SUMMARY_FLUSH_INTERVAL`` seconds,
+    so a hot row takes one write per interval instead of one per transaction;
+    with an interval of 0 each ``add`` is applied at once. Whatever is still
+    pending is applied at interpreter exit. A failed ``apply`` keeps the deltas
+    for the next flush.
+    """
+
+    def __init__(self, apply, name):
+        self.apply = apply
+        self.name = name
+        self._deltas = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def add(self, deltas):
+        self._merge(deltas)
+        if _flush_interval() > 0 and self._ensure_worker():
+            return
+        self.flush()
+
+    def _merge(self, deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self._deltas[key] = self._deltas.get(key, 0) + delta
+
+    def pending(self):
+        with self._lock:
+            return {key: delta for key, delta in self._deltas.items() if delta}
+
+    def discard(self):
+        """Drop the deltas not applied yet, e.g. before the totals are recomputed."""
+        with self._lock:
+            self._deltas = {}
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                deltas = {key: delta for key, delta in self._deltas.items() if delta}
+                self._deltas = {}
+            if not deltas:
+                return 0
+            try:
+                self.apply(deltas)
+            except DatabaseError:
+                logger.exception("Could not apply %d %s delta(s); keeping them for the next flush", len(deltas), self.name)
+                self._merge(deltas)
+                return 0
+            return len(deltas)
+
+    def _ensure_worker(self):
+        # Started lazily and restarted after a fork, since threads do not survive into the child.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return True
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return True
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True)
+            try:
+                self._thread.start()
+            except RuntimeError:
+                # Interpreter shutdown: the exit hook applies what is left.
+                self._thread = None
+                return False
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(_flush_interval())
+            close_old_connections()
+            self.flush()
+
+
+def _flush_interval():
+    return getattr(settings, "SUMMARY_FLUSH_INTERVAL", 1.0)
@@ -0,0 +1,137 @@
+"""Per-student allocation versions that drive the status event stream.
+
+A student's version is the id of the newest change feed event for their
+allocation, read from the database, so every worker process sees the same
+value. Each committed change to an allocation appends one event (repeated writes
+in a transaction collapse into it), so a stream sends one message per change.
+Ids only grow; a version that drops because the feed was pruned is not a change.
+
+Open streams do not query the feed themselves. One poller per event loop reads
+the feed's newest id every ``STATUS_STREAM_POLL_INTERVAL`` seconds and, only when
+there is something new, the allocation events of the students being watched; it
+then wakes just their streams. Events are re-read until they are
+``CHANGE_FEED_SETTLE_SECONDS`` old, since an insert that started earlier can
+commit after a higher id.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Max
+from django.utils import timezone
+
+from . import changes
+from .models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _events(student_id):
+    return ChangeEvent.objects.filter(owner_id=student_id, kind=changes.ALLOCATION)
+
+
+def allocation_version(student_id):
+    return _events(student_id).aggregate(version=Max("id"))["version"] or 0
+
+
+async def aallocation_version(student_id):
+    return (await _events(student_id).aaggregate(version=Max("id")))["version"] or 0
+
+
+def poll_interval():
+    return getattr(settings, "STATUS_STREAM_POLL_INTERVAL", 1.0)
+
+
+def _settle_seconds():
+    return getattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 5)
+
+
+class Poller:
+    def __init__(self):
+        self.watchers = {}  # student_id -> set of asyncio.Event
+        self.versions = {}  # student_id -> newest allocation event id seen
+        self.newest = None
+        self.settled = None  # every event up to this id has committed
+        self._recent = deque()  # (monotonic time, newest id) not settled yet
+        self.task = None
+        self.ready = None
+
+    def version(self, student_id):
+        return self.versions.get(student_id, 0)
+
+    def _read(self, since, student_ids):
+        newest = changes.latest()
+        if since is None:
+            # Start from the events old enough to have settled; younger ones are read below.
+            settled_at = timezone.now() - timedelta(seconds=_settle_seconds())
+            since = ChangeEvent.objects.filter(created_at__lt=settled_at).aggregate(last=Max("id"))["last"] or 0
+        elif newest == self.newest and since == newest:
+            return newest, since, []
+        rows = (
+            ChangeEvent.objects.filter(kind=changes.ALLOCATION, owner_id__in=student_ids, id__gt=since, id__lte=newest)
+            .values_list("owner_id", "id")
+        )
+        return newest, since, list(rows)
+
+    async def poll(self):
+        newest, self.settled, rows = await sync_to_async(self._read)(self.settled, list(self.watchers))
+        now = time.monotonic()
+        for student_id, event_id in rows:
+            if event_id > self.versions.get(student_id, 0) and student_id in self.watchers:
+                self.versions[student_id] = event_id
+                for event in self.watchers[student_id]:
+                    event.set()
+        if newest != self.newest:
+            self._recent.append((now, newest))
+            self.newest = newest
+        while self._recent and self._recent[0][0] <= now - _settle_seconds():
+            self.settled = self._recent.popleft()[1]
+
+    async def run(self):
+        try:
+            await self.poll()
+        except DatabaseError:
+            logger.exception("Could not read the change feed for status streams")
+        finally:
+            self.ready.set()
+        while self.watchers:
+            await asyncio.sleep(poll_interval())
+            try:
+                await self.poll()
+            except DatabaseError:
+                logger.exception("Could not read the change feed for status streams")
+
+    @asynccontextmanager
+    async def watch(self, student_id):
+        """Register a stream; the yielded event is set when the student's version moves."""
+        event = asyncio.Event()
+        self.watchers.setdefault(student_id, set()).add(event)
+        if self.task is None or self.task.done():
+            self.ready = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+        try:
+            await self.ready.wait()
+            yield event
+        finally:
+            watchers = self.watchers.get(student_id)
+            watchers.discard(event)
+            if not watchers:
+                del self.watchers[student_id]
+                self.versions.pop(student_id, None)
+
+
+_pollers = {}
+
+
+def poller():
+    """The poller of the running event loop (an ASGI worker runs one)."""
+    loop = asyncio.get_running_loop()
+    for other in [other for other in _pollers if other.is_closed()]:
+        del _pollers[other]
+    return _pollers.setdefault(loop, Poller())
@@ -0,0 +1,68 @@
+"""JSON encoding for API responses: orjson when installed, the standard library otherwise.
+
+``JSON_ENCODER = "auto"`` (the default) picks orjson if it imports, ``"orjson"``
+requires it and ``"stdlib"`` forces the fallback. Both backends write the same
+text: compact separators, UTF-8 rather than \\u escapes, and datetimes in full
+RFC 3339 (microseconds kept, UTC as ``Z``), which orjson produces natively.
+DjangoJSONEncoder cut datetimes to milliseconds; JavaScript's Date parses both
+forms alike. Decimals, durations and lazy strings still go through
+DjangoJSONEncoder.
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class _Encoder(DjangoJSONEncoder):
+    # Formats datetimes and times the way orjson does.
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            value = o.isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return super().default(o)
+
+
+_django_default = DjangoJSONEncoder().default
+
+
+def _stdlib_dumps(data):
+    return json.dumps(data, cls=_Encoder, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _orjson_dumps(data):
+    return orjson.dumps(data, default=_django_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def backend():
+    choice = getattr(settings, "JSON_ENCODER", "auto")
+    if choice == "stdlib" or (choice == "auto" and orjson is None):
+        return "stdlib"
+    if choice in ("orjson", "auto"):
+        if orjson is None:
+            raise ImproperlyConfigured("JSON_ENCODER is 'orjson' but orjson is not installed.")
+        return "orjson"
+    raise ImproperlyConfigured(f"Unknown JSON_ENCODER {choice!r}; use 'auto', 'orjson' or 'stdlib'.")
+
+
+def dumps(data):
+    """Encode ``data`` to UTF-8 JSON bytes with the configured backend."""
+    return _orjson_dumps(data) if backend() == "orjson" else _stdlib_dumps(data)
+
+
+class JsonResponse(HttpResponse):
+    """Drop-in for django.http.JsonResponse that encodes with ``dumps``."""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
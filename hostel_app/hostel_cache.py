@@ -0,0 +1,51 @@
+"""Versioned cache of the hostel catalogue.
+
+The version is a millisecond timestamp bumped whenever a hostel row or its room
+count changes. It doubles as the ETag and Last-Modified of ``hostels_api``, so a
+conditional GET is answered from the cache without touching the database.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Hostel
+
+VERSION_KEY = "hostels:version"
+LIST_TIMEOUT = 60 * 60
+
+
+def version():
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        current = int(time.time() * 1000)
+        if not cache.add(VERSION_KEY, current, timeout=None):
+            current = cache.get(VERSION_KEY, current)
+    return current
+
+
+def _bump():
+    cache.set(VERSION_KEY, max(int(time.time() * 1000), (cache.get(VERSION_KEY) or 0) + 1), timeout=None)
+
+
+def invalidate():
+    # Deferred to commit so readers never cache a catalogue that is about to roll back.
+    transaction.on_commit(_bump)
+
+
+def hostel_list():
+    key = f"hostels:list:{version()}"
+    hostels = cache.get(key)
+    if hostels is None:
+        hostels = list(Hostel.objects.values("id", "name", "location", "total_rooms").order_by("id"))
+        cache.set(key, hostels, LIST_TIMEOUT)
+    return hostels
+
+
+def etag(request=None):
+    return f'"hostels-{version()}"'
+
+
+def last_modified(request=None):
+    return datetime.fromtimestamp(version() / 1000, tz=timezone.utc)
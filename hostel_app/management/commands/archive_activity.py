@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hostel_app import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move activity log rows older than the retention period into gzipped JSONL files, one per month, "
+        "deleting them from the database in batches. Only whole months are archived."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Retention in days (default: ACTIVITY_LOG_RETENTION_DAYS).")
+        parser.add_argument("--before", help="Archive months before this date instead (YYYY-MM-DD).")
+        parser.add_argument("--dir", help="Archive directory (default: ACTIVITY_LOG_ARCHIVE_DIR).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Count what would be archived.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+        try:
+            before = archive.parse_moment(options["before"]) if options["before"] else None
+        except ValueError:
+            raise CommandError("--before must be a date like 2025-01-01.")
+        before = archive.month_start(before) if before else archive.retention_cutoff(options["days"])
+        directory = options["dir"] or archive.archive_dir()
+
+        archived = archive.archive_activity(
+            before, directory=directory, batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        for month, count in sorted(archived.items()):
+            self.stdout.write(f"{month}: {count}")
+        total = sum(archived.values())
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {total} row(s) before {before:%Y-%m-%d} would be archived."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archived {total} row(s) before {before:%Y-%m-%d} to {directory}."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hostel_app.models import Hostel, Room
+from hostel_app.rooms import room_occupancy
+
+
+class Command(BaseCommand):
+    help = "Recount room occupancy from existing allocations, adding rooms that allocations use but the inventory lacks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hostel", type=int, action="append", dest="hostels", help="Only rebuild this hostel id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        hostels = Hostel.objects.order_by("id")
+        if options["hostels"]:
+            hostels = hostels.filter(id__in=options["hostels"])
+
+        for hostel in hostels:
+            with transaction.atomic():
+                # Lock the hostel row so applies and claims wait for the recount.
+                Hostel.objects.select_for_update().filter(id=hostel.id).first()
+                occupancy = room_occupancy(hostel.id)
+                rooms = list(Room.objects.select_for_update().filter(hostel=hostel))
+                known = set()
+                for room in rooms:
+                    known.add(room.number)
+                    room.occupancy = occupancy.get(room.number, 0)
+                    room.capacity = max(room.capacity, room.occupancy)
+                Room.objects.bulk_update(rooms, ["occupancy", "capacity"], batch_size=options["batch_size"])
+                Room.objects.bulk_create(
+                    [
+                        Room(hostel=hostel, number=number, capacity=n, occupancy=n)
+                        for number, n in occupancy.items()
+                        if number not in known
+                    ],
+                    batch_size=options["batch_size"],
+                )
+
+            free = sum(room.capacity - room.occupancy for room in rooms)
+            self.stdout.write(
+                f"{hostel.name}: {sum(occupancy.values())} place(s) in use across {len(occupancy)} room(s), {free} free"
+            )
+        self.stdout.write(self.style.SUCCESS("Room inventory backfilled."))
@@ -0,0 +1,266 @@
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hostel_app import activity
+from hostel_app.bench import LatencyRecorder, compare_reports, write_report
+from hostel_app.models import ActivityLog, Allocation, Hostel
+from hostel_app.rooms import seed_rooms
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate the allocation-day rush in process against the configured database: students register, "
+        "log in and apply while admins load the dashboard and export CSV. Reports per-endpoint throughput "
+        "and p50/p95/p99 latency, checks that no room was oversold, and can save the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--hostels", type=int, default=5)
+        parser.add_argument("--rooms", type=int, help="Rooms per hostel (default: enough for 90%% of students).")
+        parser.add_argument("--admins", type=int, default=2, help="Admin sessions polling dashboard and export.")
+        parser.add_argument("--admin-pause", type=float, default=0.25, help="Seconds between admin requests.")
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Register and log everyone in first, then fire all applications at once (hostel opening rush).",
+        )
+        parser.add_argument("--admission-mode", choices=["direct", "batched"], help="Override ADMISSION_MODE.")
+        parser.add_argument("--fast-hasher", action="store_true", help="Use MD5 password hashing to isolate DB costs.")
+        parser.add_argument("--label", default="", help="Free-form label stored in the report.")
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+        parser.add_argument("--compare", help="Earlier JSON report to compare p95 and throughput against.")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated users and hostels.")
+
+    def handle(self, *args, **options):
+        self.prefix = f"bench{int(time.time())}_"
+        students = options["students"]
+        rooms = options["rooms"] or max(1, math.ceil(students * 0.9 / options["hostels"]))
+
+        overrides = {"ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if options["admission_mode"]:
+            overrides["ADMISSION_MODE"] = options["admission_mode"]
+        if options["fast_hasher"]:
+            overrides["PASSWORD_HASHERS"] = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+        with override_settings(**overrides):
+            hostels = Hostel.objects.bulk_create(
+                [
+                    Hostel(name=f"{self.prefix}hostel{i}", location="Benchmark", total_rooms=rooms)
+                    for i in range(options["hostels"])
+                ]
+            )
+            hostel_ids = list(Hostel.objects.filter(name__startswith=self.prefix).values_list("id", flat=True))
+            for hostel_id in hostel_ids:
+                seed_rooms(hostel_id, rooms)
+            get_user_model().objects.create_user(username=f"{self.prefix}admin", password="bench-pass", role="admin")
+
+            recorder = LatencyRecorder()
+            stop = threading.Event()
+            admin_threads = [
+                threading.Thread(target=self._admin_loop, args=(recorder, stop, options["admin_pause"]), daemon=True)
+                for _ in range(options["admins"])
+            ]
+            for thread in admin_threads:
+                thread.start()
+
+            outcomes = {"applied": 0, "full": 0, "failed": 0}
+            outcomes_lock = threading.Lock()
+
+            def count(outcome):
+                with outcomes_lock:
+                    outcomes[outcome] += 1
+
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                if options["burst"]:
+                    clients = list(pool.map(lambda index: self._sign_up(recorder, index), range(students)))
+                    ready = [client for client in clients if client is not None]
+                    outcomes["failed"] += students - len(ready)
+                    for outcome in pool.map(lambda client: self._apply(recorder, client, hostel_ids), ready):
+                        count(outcome)
+                else:
+                    for outcome in pool.map(lambda index: self._student_flow(recorder, index, hostel_ids), range(students)):
+                        count(outcome)
+
+            stop.set()
+            for thread in admin_threads:
+                thread.join()
+            recorder.stop()
+            activity.buffer.flush()
+
+            checks = self._checks(hostel_ids, rooms)
+            report = {
+                "label": options["label"],
+                "finished_at": timezone.now().isoformat(),
+                "config": {
+                    "students": students,
+                    "concurrency": options["concurrency"],
+                    "hostels": len(hostels),
+                    "rooms_per_hostel": rooms,
+                    "admins": options["admins"],
+                    "fast_hasher": options["fast_hasher"],
+                    "burst": options["burst"],
+                    "database": connections["default"].vendor,
+                    "activity_log_mode": activity.stats()["mode"],
+                    "admission_mode": settings.ADMISSION_MODE,
+                },
+                "outcomes": outcomes,
+                **recorder.summary(),
+                "checks": checks,
+            }
+
+            if not options["keep"]:
+                self._cleanup()
+
+        self._print(report)
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as handle:
+                for line in compare_reports(json.load(handle), report):
+                    self.stdout.write(line)
+        if options["output"]:
+            write_report(options["output"], report)
+            self.stdout.write(f"Report written to {options['output']}")
+        if not checks["passed"]:
+            raise CommandError("Oversell check failed, see checks in the report.")
+
+    def _timed(self, recorder, name, expected, call):
+        started = time.perf_counter()
+        try:
+            response = call()
+            if getattr(response, "streaming", False):
+                for _chunk in response.streaming_content:
+                    pass
+        except Exception:
+            recorder.record(name, time.perf_counter() - started, ok=False)
+            return None
+        recorder.record(name, time.perf_counter() - started, ok=response.status_code in expected)
+        return response
+
+    def _student_flow(self, recorder, index, hostel_ids):
+        client = self._sign_up(recorder, index)
+        if client is None:
+            return "failed"
+        return self._apply(recorder, client, hostel_ids)
+
+    def _sign_up(self, recorder, index):
+        client = Client()
+        credentials = {"username": f"{self.prefix}student{index}", "password": "bench-pass"}
+        try:
+            registered = self._timed(
+                recorder,
+                "register_api",
+                {200},
+                lambda: client.post(
+                    reverse("register_api"),
+                    json.dumps({**credentials, "name": f"Student {index}"}),
+                    content_type="application/json",
+                ),
+            )
+            if registered is None or registered.status_code != 200:
+                return None
+            self._timed(
+                recorder,
+                "login_api",
+                {200},
+                lambda: client.post(reverse("login_api"), json.dumps(credentials), content_type="application/json"),
+            )
+            return client
+        finally:
+            connections.close_all()
+
+    def _apply(self, recorder, client, hostel_ids):
+        try:
+            applied = self._timed(
+                recorder,
+                "allocate_api",
+                {200, 409},
+                lambda: client.post(
+                    reverse("allocate_api"),
+                    json.dumps({"hostel_id": random.choice(hostel_ids)}),
+                    content_type="application/json",
+                ),
+            )
+            if applied is None or applied.status_code not in (200, 409):
+                return "failed"
+            return "applied" if applied.status_code == 200 else "full"
+        finally:
+            connections.close_all()
+
+    def _admin_loop(self, recorder, stop, pause):
+        client = Client()
+        client.post(
+            reverse("login_api"),
+            json.dumps({"username": f"{self.prefix}admin", "password": "bench-pass"}),
+            content_type="application/json",
+        )
+        try:
+            while not stop.is_set():
+                self._timed(recorder, "admin_dashboard_api", {200}, lambda: client.get(reverse("admin_dashboard_api")))
+                self._timed(
+                    recorder, "export_allocations_csv", {200}, lambda: client.get(reverse("export_allocations_csv"))
+                )
+                stop.wait(pause)
+        finally:
+            connections.close_all()
+
+    def _checks(self, hostel_ids, rooms):
+        negative = list(Hostel.objects.filter(id__in=hostel_ids, total_rooms__lt=0).values_list("name", flat=True))
+        duplicates = list(
+            Allocation.objects.filter(hostel_id__in=hostel_ids)
+            .values("hostel__name", "room_number")
+            .annotate(holders=Count("id"))
+            .filter(holders__gt=1)
+        )
+        allocated = dict(
+            Allocation.objects.filter(hostel_id__in=hostel_ids)
+            .values("hostel_id")
+            .annotate(n=Count("id"))
+            .values_list("hostel_id", "n")
+        )
+        remaining = dict(Hostel.objects.filter(id__in=hostel_ids).values_list("id", "total_rooms"))
+        oversold = [hostel_id for hostel_id in hostel_ids if allocated.get(hostel_id, 0) > rooms]
+        mismatched = [
+            hostel_id for hostel_id in hostel_ids if allocated.get(hostel_id, 0) + remaining[hostel_id] != rooms
+        ]
+        return {
+            "passed": not (negative or duplicates or oversold or mismatched),
+            "hostels_below_zero": negative,
+            "duplicate_rooms": duplicates,
+            "oversold_hostels": oversold,
+            "room_count_mismatches": mismatched,
+            "allocations": sum(allocated.values()),
+        }
+
+    def _cleanup(self):
+        User = get_user_model()
+        ActivityLog.objects.filter(user__username__startswith=self.prefix).delete()
+        User.objects.filter(username__startswith=self.prefix).delete()
+        Hostel.objects.filter(name__startswith=self.prefix).delete()
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{report['total_requests']} requests in {report['elapsed_s']}s ({report['throughput_rps']} req/s); "
+            f"outcomes {report['outcomes']}"
+        )
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"  {name:<24} n={stats['requests']:<6} err={stats['errors']:<4} "
+                f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+                f"{stats['throughput_rps']} req/s"
+            )
+        status = self.style.SUCCESS("passed") if report["checks"]["passed"] else self.style.ERROR("FAILED")
+        self.stdout.write(f"Oversell check {status}: {report['checks']['allocations']} allocation(s)")
@@ -0,0 +1,125 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hostel_app.bench import LatencyRecorder, compare_reports, write_report
+
+ENDPOINTS = {
+    "login_api": ("POST", "/api/login/"),
+    "session_api": ("GET", "/api/session/"),
+    "allocation_status_api": ("GET", "/api/status/"),
+    "dashboard_api": ("GET", "/api/dashboard/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server over HTTP with a mix of login, session, status and dashboard requests "
+        "(e.g. gunicorn vs uvicorn with API_ASYNC_VIEWS) and report per-endpoint throughput and latency. "
+        "Bench users are created in the configured database, so point it at the server's database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run.")
+        parser.add_argument(
+            "--mix",
+            default="login_api=1,session_api=4,allocation_status_api=4,dashboard_api=1",
+            help="Comma-separated endpoint=weight pairs.",
+        )
+        parser.add_argument("--label", default="", help="Free-form label stored in the report.")
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+        parser.add_argument("--compare", help="Earlier JSON report to compare p95 and throughput against.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = {name: float(weight) for name, weight in (pair.split("=") for pair in options["mix"].split(","))}
+        except ValueError:
+            raise CommandError("--mix must look like login_api=1,session_api=4")
+        unknown = set(mix) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s) in --mix: {', '.join(sorted(unknown))}")
+
+        self.base_url = options["base_url"].rstrip("/")
+        prefix = f"httpbench{int(time.time())}_"
+        User = get_user_model()
+        credentials = [(f"{prefix}{i}", "bench-pass") for i in range(options["users"])]
+        for username, password in credentials:
+            User.objects.create_user(username=username, password=password, first_name="Bench")
+
+        recorder = LatencyRecorder()
+        deadline = time.perf_counter() + options["duration"]
+        names, weights = list(mix), list(mix.values())
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                for worker in range(options["concurrency"]):
+                    pool.submit(self._worker, recorder, credentials[worker % len(credentials)], names, weights, deadline)
+            recorder.stop()
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+        report = {
+            "label": options["label"],
+            "finished_at": timezone.now().isoformat(),
+            "config": {
+                "base_url": self.base_url,
+                "users": options["users"],
+                "concurrency": options["concurrency"],
+                "duration_s": options["duration"],
+                "mix": mix,
+            },
+            **recorder.summary(),
+        }
+        self._print(report)
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as handle:
+                for line in compare_reports(json.load(handle), report):
+                    self.stdout.write(line)
+        if options["output"]:
+            write_report(options["output"], report)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _worker(self, recorder, credentials, names, weights, deadline):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        body = json.dumps({"username": credentials[0], "password": credentials[1]}).encode()
+        self._call(recorder, opener, "login_api", body)
+        rng = random.Random(threading.get_ident())
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            self._call(recorder, opener, name, body if name == "login_api" else None)
+
+    def _call(self, recorder, opener, name, body):
+        method, path = ENDPOINTS[name]
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method=method, headers={"Content-Type": "application/json"}
+        )
+        started = time.perf_counter()
+        try:
+            with opener.open(request, timeout=60) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        recorder.record(name, time.perf_counter() - started, ok=ok)
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{report['total_requests']} requests in {report['elapsed_s']}s ({report['throughput_rps']} req/s)"
+        )
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"  {name:<24} n={stats['requests']:<6} err={stats['errors']:<4} "
+                f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+                f"{stats['throughput_rps']} req/s"
+            )
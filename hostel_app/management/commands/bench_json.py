@@ -0,0 +1,117 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from hostel_app import compression, fastjson
+from hostel_app.bench import write_report
+
+
+def _best_of(repeat, func, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def _django_default(data):
+    # What django.http.JsonResponse did before: DjangoJSONEncoder with json.dumps defaults.
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large admin-dashboard-style payload and compare JSON serialization time and bytes "
+        "sent: Django's default encoder, the stdlib and orjson backends of hostel_app.fastjson, and "
+        "gzip/brotli compression of the result. Runs in process, no database needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--allocations", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=20000)
+        parser.add_argument("--hostels", type=int, default=40)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is reported.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] <= 0:
+            raise CommandError("--repeat must be positive.")
+        payload = self._payload(options)
+        repeat = options["repeat"]
+
+        encoders = {"django_default": _django_default, "fastjson_stdlib": fastjson._stdlib_dumps}
+        if fastjson.orjson is not None:
+            encoders["fastjson_orjson"] = fastjson._orjson_dumps
+        else:
+            self.stdout.write("orjson is not installed; skipping the orjson backend.")
+
+        serialization = {}
+        for name, dumps in encoders.items():
+            ms, body = _best_of(repeat, dumps, payload)
+            serialization[name] = {"ms": round(ms, 2), "bytes": len(body)}
+        body = fastjson.dumps(payload)
+
+        codecs = {"gzip": lambda: compression.compress(body, "gzip")}
+        if compression.brotli is not None:
+            for quality in (1, 5, 11):
+                codecs[f"br_q{quality}"] = lambda quality=quality: compression.brotli.compress(body, quality=quality)
+        else:
+            self.stdout.write("brotli is not installed; skipping brotli.")
+        compressed = {}
+        for name, func in codecs.items():
+            ms, data = _best_of(repeat, func)
+            compressed[name] = {"ms": round(ms, 2), "bytes": len(data), "ratio": round(len(body) / len(data), 2)}
+
+        report = {
+            "finished_at": timezone.now().isoformat(),
+            "config": {key: options[key] for key in ("allocations", "users", "hostels", "repeat", "seed")},
+            "backend": fastjson.backend(),
+            "serialization": serialization,
+            "compression": compressed,
+        }
+        self._print(report)
+        if options["output"]:
+            write_report(options["output"], report)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _payload(self, options):
+        # Shaped like /api/admin/dashboard/ with every allocation and user on one page.
+        rng = random.Random(options["seed"])
+        now = timezone.now()
+        hostels = [
+            {"id": i, "name": f"Hostel {i}", "location": rng.choice(["Main campus", "Town", "Mabibo"]), "total_rooms": rng.randint(0, 500)}
+            for i in range(1, options["hostels"] + 1)
+        ]
+        users = [
+            {"id": i, "username": f"student{i:06d}", "first_name": rng.choice(["Amina", "Baraka", "Neema", "Juma"]), "role": "student", "is_staff": False}
+            for i in range(1, options["users"] + 1)
+        ]
+        allocations = [
+            {
+                "id": i,
+                "student__username": f"student{i:06d}",
+                "hostel__name": f"Hostel {rng.randint(1, options['hostels'])}",
+                "room_number": f"R{rng.randint(1, 500):03d}",
+                "allocated_on": now - timedelta(seconds=rng.randint(0, 90 * 86400), microseconds=rng.randint(0, 999999)),
+            }
+            for i in range(1, options["allocations"] + 1)
+        ]
+        return {"status": "success", "hostels": hostels, "users": users, "allocations": allocations}
+
+    def _print(self, report):
+        baseline = report["serialization"]["django_default"]
+        self.stdout.write("Serialization (best of %d):" % report["config"]["repeat"])
+        for name, stats in report["serialization"].items():
+            speedup = baseline["ms"] / stats["ms"] if stats["ms"] else 0
+            self.stdout.write(f"  {name:<18} {stats['ms']:>9.2f} ms  {stats['bytes']:>10} bytes  x{speedup:.1f}")
+        self.stdout.write(f"Compression of the {report['backend']} output:")
+        for name, stats in report["compression"].items():
+            self.stdout.write(f"  {name:<18} {stats['ms']:>9.2f} ms  {stats['bytes']:>10} bytes  {stats['ratio']}:1")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hostel_app import activity, archive, purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete users chosen by id, role and/or allocation date in batches, releasing their rooms with "
+        "grouped updates, and report rows deleted per second. Superusers are never deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", help="Comma-separated user ids.")
+        parser.add_argument("--role", choices=["student", "admin"])
+        parser.add_argument("--allocated-before", help="Users whose allocation is older than this date (YYYY-MM-DD).")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Count the matching users without deleting.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+        try:
+            user_ids = [int(value) for value in options["ids"].split(",") if value.strip()] if options["ids"] else None
+        except ValueError:
+            raise CommandError("--ids must be comma-separated integers.")
+        try:
+            allocated_before = archive.parse_moment(options["allocated_before"]) if options["allocated_before"] else None
+        except ValueError:
+            raise CommandError("--allocated-before must be a date like 2025-07-01.")
+        try:
+            users = purge.select_users(user_ids, options["role"], allocated_before)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {users.count()} user(s) would be deleted."))
+            return
+
+        totals = purge.delete_users(users, batch_size=options["batch_size"], progress=self._progress)
+        activity.log(None, "delete_users", f"Bulk deleted {totals['users']} user(s) and released {totals['rooms_released']} room(s)")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {totals['users']} user(s) and {totals['allocations']} allocation(s), released "
+                f"{totals['rooms_released']} room(s): {totals['rows']} row(s) in {totals['seconds']:.1f}s "
+                f"({totals['rows_per_second']:.0f} rows/s)."
+            )
+        )
+
+    def _progress(self, totals):
+        self.stdout.write(f"{totals['users']} user(s), {totals['rows']} row(s), {totals['rows_per_second']:.0f} rows/s")
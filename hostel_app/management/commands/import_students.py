@@ -0,0 +1,169 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from hostel_app import activity, changes, counters
+
+FIELDS = ("username", "name", "password", "email", "adress", "phone_number")
+
+
+def _init_worker(settings_module):
+    # Spawned workers (Windows, macOS) start without Django; forked ones already have it.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def _hash(password):
+    # Rows without a password get an unusable one; those students set it through a reset.
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream students from a CSV or JSONL file (username, name, password, email, adress, phone_number) "
+        "and insert them in chunks, hashing passwords across a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes.")
+        parser.add_argument("--duplicates-report", help="Write skipped duplicate usernames to this file.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and check duplicates without writing.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0 or options["workers"] <= 0:
+            raise CommandError("--chunk-size and --workers must be positive.")
+        fmt = options["format"] or ("jsonl" if options["path"].endswith((".jsonl", ".ndjson")) else "csv")
+
+        self.stats = {"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+        self.duplicates = []
+        self.seen = set()
+        started = time.perf_counter()
+
+        with open(options["path"], newline="", encoding="utf-8-sig") as handle:
+            rows = self._read(handle, fmt)
+            if options["dry_run"]:
+                for chunk in self._chunks(rows, options["chunk_size"]):
+                    self._prepare(chunk)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=options["workers"],
+                    initializer=_init_worker,
+                    initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "hostel_allocation_project.settings"),),
+                ) as pool:
+                    self._import(rows, pool, options["chunk_size"], options["workers"])
+
+        elapsed = time.perf_counter() - started
+        if self.stats["imported"]:
+            activity.log(None, "import", f"Imported {self.stats['imported']} student(s) from {os.path.basename(options['path'])}")
+
+        if options["duplicates_report"]:
+            with open(options["duplicates_report"], "w", encoding="utf-8") as report:
+                report.writelines(f"{username}\n" for username in self.duplicates)
+        elif self.duplicates:
+            shown = ", ".join(self.duplicates[:10])
+            more = f" and {len(self.duplicates) - 10} more" if len(self.duplicates) > 10 else ""
+            self.stdout.write(f"Skipped duplicate usernames: {shown}{more}")
+
+        rate = self.stats["rows"] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{self.stats['rows']} row(s) in {elapsed:.2f}s ({rate:.0f} rows/s): "
+            f"{self.stats['imported']} imported, {self.stats['duplicates']} duplicate, {self.stats['invalid']} invalid"
+        )
+        self.stdout.write(self.style.SUCCESS("Dry run, nothing written." if options["dry_run"] else "Import finished."))
+
+    def _read(self, handle, fmt):
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+            return
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                self.stderr.write(f"Line {line_number}: invalid JSON")
+                yield None
+
+    def _chunks(self, rows, size):
+        rows = iter(rows)
+        while chunk := list(islice(rows, size)):
+            yield chunk
+
+    def _prepare(self, chunk):
+        """Validate a chunk and drop usernames that exist already or repeat in the file."""
+        valid = []
+        for row in chunk:
+            self.stats["rows"] += 1
+            row = {field: str((row or {}).get(field) or "").strip() for field in FIELDS}
+            row["username"] = row["username"] or row["email"]
+            if not (row["username"] and row["name"]) or len(row["username"]) > 150 or len(row["phone_number"]) > 15:
+                self.stats["invalid"] += 1
+                continue
+            valid.append(row)
+
+        existing = set(
+            get_user_model().objects.filter(username__in=[row["username"] for row in valid]).values_list("username", flat=True)
+        )
+        fresh = []
+        for row in valid:
+            if row["username"] in existing or row["username"] in self.seen:
+                self.stats["duplicates"] += 1
+                self.duplicates.append(row["username"])
+                continue
+            self.seen.add(row["username"])
+            fresh.append(row)
+        return fresh
+
+    def _import(self, rows, pool, chunk_size, workers):
+        # Hash the next chunk in the pool while the previous one is inserted.
+        pending = None
+        for chunk in self._chunks(rows, chunk_size):
+            fresh = self._prepare(chunk)
+            hashed = pool.map(_hash, [row["password"] for row in fresh], chunksize=max(1, len(fresh) // (workers * 4)))
+            if pending:
+                self._insert(*pending)
+            pending = (fresh, hashed)
+        if pending:
+            self._insert(*pending)
+
+    def _insert(self, fresh, hashed):
+        User = get_user_model()
+        users = [
+            User(
+                username=row["username"],
+                email=row["email"] or row["username"],
+                password=password,
+                first_name=row["name"],
+                role="student",
+                adress=row["adress"],
+                phone_number=row["phone_number"],
+            )
+            for row, password in zip(fresh, hashed)
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=1000)
+        except IntegrityError:
+            # Someone registered one of these usernames since the lookup; insert the rest.
+            taken = set(User.objects.filter(username__in=[u.username for u in users]).values_list("username", flat=True))
+            self.stats["duplicates"] += len(taken)
+            self.duplicates.extend(sorted(taken))
+            users = [user for user in users if user.username not in taken]
+            User.objects.bulk_create(users, batch_size=1000)
+        # bulk_create skips post_save, so the summary counters and the change feed are updated here.
+        counters.bump("total_users", len(users))
+        counters.bump("total_students", len(users))
+        changes.record_many(changes.USER, changes.CREATED, [(user.pk, user.pk) for user in users])
+        self.stats["imported"] += len(users)
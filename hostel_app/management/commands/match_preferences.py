@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from hostel_app import activity, matching
+from hostel_app.models import Hostel
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign every student who ranked hostels and has no allocation yet in one batch, "
+        "using deferred acceptance with earliest submission (or a seeded lottery) as priority."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, help="Break priority with a reproducible lottery instead of submission time.")
+        parser.add_argument("--dry-run", action="store_true", help="Solve and report without writing allocations.")
+        parser.add_argument("--force", action="store_true", help="Run even while the preference window is still open.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--json", action="store_true", help="Print the statistics as JSON.")
+
+    def handle(self, *args, **options):
+        _opens, closes = matching.preference_window()
+        if closes and timezone.now() < closes and not options["force"]:
+            raise CommandError(f"The preference window closes at {closes.isoformat()}; pass --force to match now.")
+
+        with transaction.atomic():
+            # Lock every hostel so direct applications wait until the match is written.
+            locked = list(Hostel.objects.select_for_update().order_by("id").values_list("id", "name", "total_rooms"))
+            hostels = {hostel_id: name for hostel_id, name, _ in locked}
+            capacity = {hostel_id: total_rooms for hostel_id, _, total_rooms in locked}
+            choices, submitted = matching.load_intake()
+            priority = matching.priority_order(submitted, seed=options["seed"])
+            result = matching.solve(choices, capacity, priority)
+            written = [] if options["dry_run"] else matching.write_assignments(result.assignments, options["batch_size"])
+
+        activity.log_many(
+            (student_id, "apply", f"Matched to {hostels[hostel_id]} ({room})") for student_id, hostel_id, room in written
+        )
+
+        stats = {**result.stats(), "written": len(written), "dry_run": options["dry_run"]}
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+        self.stdout.write(
+            f"{stats['students']} student(s): {stats['matched']} matched, {stats['unmatched']} unmatched "
+            f"in {stats['solve_ms']} ms"
+        )
+        if stats["matched"]:
+            self.stdout.write(
+                f"First choice {stats['first_choice']}, top three {stats['top_three']}, mean rank {stats['mean_rank']}"
+            )
+            self.stdout.write(f"Rank histogram: {stats['rank_histogram']}")
+        message = "Dry run, nothing written." if options["dry_run"] else f"{len(written)} allocation(s) written."
+        self.stdout.write(self.style.SUCCESS(message))
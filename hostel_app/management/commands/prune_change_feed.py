@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hostel_app import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change feed events older than the retention period. Clients holding an older "
+        "version get reset=true from /api/changes/ and reload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Retention in days (default: CHANGE_FEED_RETENTION_DAYS).")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else getattr(settings, "CHANGE_FEED_RETENTION_DAYS", 7)
+        if days < 0:
+            raise CommandError("--days must not be negative.")
+        deleted = changes.prune(timezone.now() - timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change feed event(s) older than {days} day(s)."))
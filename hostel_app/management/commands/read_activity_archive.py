@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hostel_app import archive
+
+
+class Command(BaseCommand):
+    help = "Stream archived activity log entries as JSON lines, optionally filtered by time, action or user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="since", help="Earliest created_at, inclusive (YYYY-MM-DD or ISO datetime).")
+        parser.add_argument("--to", dest="until", help="Latest created_at, exclusive.")
+        parser.add_argument("--action")
+        parser.add_argument("--user", help="User id or username.")
+        parser.add_argument("--dir", help="Archive directory (default: ACTIVITY_LOG_ARCHIVE_DIR).")
+        parser.add_argument("--count", action="store_true", help="Print only the number of matching entries.")
+
+    def handle(self, *args, **options):
+        try:
+            since = archive.parse_moment(options["since"]) if options["since"] else None
+            until = archive.parse_moment(options["until"]) if options["until"] else None
+        except ValueError:
+            raise CommandError("--from and --to must be dates like 2025-01-01.")
+
+        entries = archive.read(options["dir"], since=since, until=until, action=options["action"], user=options["user"])
+        if options["count"]:
+            self.stdout.write(str(sum(1 for _ in entries)))
+            return
+        for entry in entries:
+            self.stdout.write(json.dumps(entry, ensure_ascii=False))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hostel_app import archive, rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the analytics rollups (allocations per hostel per day, activity per action per hour) "
+        "from the Allocation and ActivityLog tables, one transaction per chunk of days. Activity hours "
+        "before the oldest log row still in the database (archived history) are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=["allocations", "activity"], help="Rebuild one table only.")
+        parser.add_argument("--since", help="Rebuild activity from this date (default: the oldest log row).")
+        parser.add_argument("--chunk-days", type=int, default=7)
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        if options["chunk_days"] <= 0:
+            raise CommandError("--chunk-days must be positive.")
+        try:
+            since = archive.parse_moment(options["since"]) if options["since"] else None
+        except ValueError:
+            raise CommandError("--since must be a date like 2025-01-01.")
+
+        if options["only"] != "activity":
+            written = rollups.rebuild_allocations(chunk_days=options["chunk_days"], progress=self._progress)
+            self.stdout.write(self.style.SUCCESS(f"Allocations: {written} hostel-day row(s)."))
+        if options["only"] != "allocations":
+            written = rollups.rebuild_activity(since=since, chunk_days=options["chunk_days"], progress=self._progress)
+            self.stdout.write(self.style.SUCCESS(f"Activity: {written} action-hour row(s)."))
+
+    def _progress(self, table, start, end, written):
+        if self.verbosity > 1:
+            self.stdout.write(f"{table} {start} .. {end}: {written} row(s)")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from hostel_app import counters
+
+
+class Command(BaseCommand):
+    help = "Recount users, students, hostels, allocations and activities from scratch."
+
+    def handle(self, *args, **options):
+        for name, value in counters.recompute().items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS("Summary counters recomputed."))
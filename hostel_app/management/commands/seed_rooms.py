@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from hostel_app import changes, hostel_cache
+from hostel_app.models import Hostel
+from hostel_app.rooms import format_room_number, seed_rooms
+
+
+class Command(BaseCommand):
+    help = "Add rooms to hostels in bulk and raise their available places to match."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hostel", type=int, action="append", dest="hostels", help="Hostel id (repeatable).")
+        parser.add_argument("--all", action="store_true", help="Seed every hostel.")
+        parser.add_argument("--count", type=int, required=True, help="Rooms to add per hostel.")
+        parser.add_argument("--capacity", type=int, default=1, help="Places per room.")
+        parser.add_argument("--per-floor", type=int, help="Rooms per floor, numbering floors from 1.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options["hostels"] and not options["all"]:
+            raise CommandError("Pass --hostel ID (repeatable) or --all.")
+        if options["count"] <= 0 or options["capacity"] <= 0:
+            raise CommandError("--count and --capacity must be positive.")
+
+        hostels = Hostel.objects.order_by("id")
+        if options["hostels"]:
+            hostels = hostels.filter(id__in=options["hostels"])
+
+        for hostel in hostels:
+            with transaction.atomic():
+                numbers = seed_rooms(
+                    hostel.id,
+                    options["count"],
+                    capacity=options["capacity"],
+                    per_floor=options["per_floor"],
+                    batch_size=options["batch_size"],
+                )
+                Hostel.objects.filter(id=hostel.id).update(
+                    total_rooms=F("total_rooms") + len(numbers) * options["capacity"]
+                )
+                hostel_cache.invalidate()
+                changes.record(changes.HOSTEL, changes.UPDATED, hostel.id)
+            self.stdout.write(
+                f"{hostel.name}: added {format_room_number(numbers[0])}-{format_room_number(numbers[-1])} "
+                f"({len(numbers) * options['capacity']} place(s))"
+            )
+        self.stdout.write(self.style.SUCCESS("Rooms seeded."))
@@ -0,0 +1,202 @@
+"""Per-view request metrics in Prometheus text format.
+
+``MetricsMiddleware`` records, for every request, the URL name it resolved to,
+latency (as a histogram), database queries and database time on the default
+connection, and response size. Updates are a few dict operations under one lock,
+so it is cheap enough to leave on; ``METRICS_ENABLED = False`` removes it.
+
+Metrics live in process memory: each gunicorn/uvicorn worker reports its own, so
+scrape every worker or run one worker per instance.
+"""
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ViewStats:
+    __slots__ = ("buckets", "latency_sum", "count", "queries", "db_seconds", "response_bytes")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._requests = {}
+        self.started = time.time()
+
+    def observe(self, view, method, status, seconds, queries, db_seconds, response_bytes):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = _ViewStats()
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[index] += 1
+                    break
+            stats.latency_sum += seconds
+            stats.count += 1
+            stats.queries += queries
+            stats.db_seconds += db_seconds
+            stats.response_bytes += response_bytes
+            key = (view, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            views = {}
+            for view, stats in self._views.items():
+                copy = _ViewStats()
+                for name in _ViewStats.__slots__:
+                    value = getattr(stats, name)
+                    setattr(copy, name, list(value) if isinstance(value, list) else value)
+                views[view] = copy
+            return views, dict(self._requests)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._requests.clear()
+
+
+registry = Registry()
+
+
+def is_enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+class _QueryTimer:
+    # connection.execute_wrapper hook: counts queries and their time for one request.
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match and match.view_name else "unmatched"
+
+
+def _response_bytes(response):
+    if getattr(response, "streaming", False):
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+def _observe(request, response, started, timer):
+    registry.observe(
+        _view_name(request),
+        request.method,
+        response.status_code,
+        time.perf_counter() - started,
+        timer.queries,
+        timer.seconds,
+        _response_bytes(response),
+    )
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        _observe(request, response, started, timer)
+        return response
+
+    async def __acall__(self, request):
+        # Async ORM calls run in worker threads with their own wrappers, so only
+        # queries made on this request's context are counted.
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = await self.get_response(request)
+        _observe(request, response, started, timer)
+        return response
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(extra_gauges=None):
+    """Return all metrics in Prometheus text exposition format (version 0.0.4)."""
+    views, requests = registry.snapshot()
+    lines = [
+        "# HELP hostel_http_requests_total Requests by view, method and status code.",
+        "# TYPE hostel_http_requests_total counter",
+    ]
+    for (view, method, status), count in sorted(requests.items()):
+        lines.append(
+            f'hostel_http_requests_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {count}'
+        )
+
+    lines += [
+        "# HELP hostel_http_request_duration_seconds Time spent handling requests, by view.",
+        "# TYPE hostel_http_request_duration_seconds histogram",
+    ]
+    for view, stats in sorted(views.items()):
+        label = _escape(view)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+            cumulative += count
+            lines.append(f'hostel_http_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'hostel_http_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {stats.count}')
+        lines.append(f'hostel_http_request_duration_seconds_sum{{view="{label}"}} {_format(stats.latency_sum)}')
+        lines.append(f'hostel_http_request_duration_seconds_count{{view="{label}"}} {stats.count}')
+
+    for name, attribute, help_text in (
+        ("hostel_db_queries_total", "queries", "Database queries issued while handling requests, by view."),
+        ("hostel_db_query_seconds_total", "db_seconds", "Time spent in database queries, by view."),
+        ("hostel_http_response_bytes_total", "response_bytes", "Response body bytes sent, by view."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for view, stats in sorted(views.items()):
+            lines.append(f'{name}{{view="{_escape(view)}"}} {_format(getattr(stats, attribute))}')
+
+    lines += [
+        "# HELP hostel_process_start_time_seconds Unix time the metrics registry started.",
+        "# TYPE hostel_process_start_time_seconds gauge",
+        f"hostel_process_start_time_seconds {_format(registry.started)}",
+    ]
+    for name, (help_text, value) in sorted((extra_gauges or {}).items()):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format(value)}"]
+    return "\n".join(lines) + "\n"
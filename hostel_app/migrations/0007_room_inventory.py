@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0006_remove_unique_allocation_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSequence',
+            fields=[
+                ('hostel', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='room_sequence', serialize=False, to='hostel_app.hostel')),
+                ('next_number', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FreeRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('hostel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='free_rooms', to='hostel_app.hostel')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hostel', 'number'), name='unique_free_room_per_hostel')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0007_room_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:07
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Q
+
+
+def dedupe_allocations(apps, schema_editor):
+    # Keep each student's most recent allocation, in one set-based DELETE.
+    Allocation = apps.get_model("hostel_app", "Allocation")
+    newer = Allocation.objects.filter(student_id=OuterRef("student_id")).filter(
+        Q(allocated_on__gt=OuterRef("allocated_on"))
+        | Q(allocated_on=OuterRef("allocated_on"), id__gt=OuterRef("id"))
+    )
+    Allocation.objects.filter(Exists(newer)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0008_summarycounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_allocations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['created_at', 'id'], name='activitylog_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', 'created_at'], name='activitylog_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='allocation',
+            index=models.Index(fields=['allocated_on', 'id'], name='allocation_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='allocation',
+            index=models.Index(fields=['hostel', 'room_number'], name='allocation_hostel_room_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='allocation',
+            constraint=models.UniqueConstraint(fields=('student',), name='unique_allocation_per_student'),
+        ),
+    ]
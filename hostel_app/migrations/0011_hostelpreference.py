@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0010_activitylog_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostelPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('hostel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='preferences', to='hostel_app.hostel')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hostel_preferences', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['student', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('student', 'rank'), name='unique_preference_rank_per_student'), models.UniqueConstraint(fields=('student', 'hostel'), name='unique_preference_hostel_per_student')],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:28
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _parse_room_number(value):
+    raw = str(value or "").strip().upper()
+    if raw.startswith("R"):
+        raw = raw[1:]
+    return int(raw) if raw.isdigit() else None
+
+
+def derive_rooms(apps, schema_editor):
+    # One room per number in use (capacity = its allocations), plus the old free list,
+    # topped up with empty single rooms until free places match total_rooms.
+    Hostel = apps.get_model("hostel_app", "Hostel")
+    Allocation = apps.get_model("hostel_app", "Allocation")
+    FreeRoom = apps.get_model("hostel_app", "FreeRoom")
+    Room = apps.get_model("hostel_app", "Room")
+
+    for hostel_id, total_rooms in Hostel.objects.values_list("id", "total_rooms").iterator():
+        occupancy = Counter()
+        for label in Allocation.objects.filter(hostel_id=hostel_id).values_list("room_number", flat=True).iterator():
+            number = _parse_room_number(label)
+            if number:
+                occupancy[number] += 1
+        free_numbers = set(FreeRoom.objects.filter(hostel_id=hostel_id).values_list("number", flat=True)) - set(occupancy)
+
+        rooms = [Room(hostel_id=hostel_id, number=n, capacity=count, occupancy=count) for n, count in occupancy.items()]
+        rooms += [Room(hostel_id=hostel_id, number=n) for n in sorted(free_numbers)]
+        next_number = max([*occupancy, *free_numbers], default=0) + 1
+        missing = max(total_rooms or 0, 0) - len(free_numbers)
+        rooms += [Room(hostel_id=hostel_id, number=n) for n in range(next_number, next_number + max(missing, 0))]
+        Room.objects.bulk_create(rooms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0011_hostelpreference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Room',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('floor', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('capacity', models.PositiveSmallIntegerField(default=1)),
+                ('occupancy', models.PositiveSmallIntegerField(default=0)),
+                ('hostel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='hostel_app.hostel')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('occupancy__lt', models.F('capacity'))), fields=['hostel', 'number'], name='room_free_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['hostel', 'floor'], name='room_floor_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='room',
+            constraint=models.UniqueConstraint(fields=('hostel', 'number'), name='unique_room_per_hostel'),
+        ),
+        migrations.RunPython(derive_rooms, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='FreeRoom',
+        ),
+        migrations.DeleteModel(
+            name='RoomSequence',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0012_room'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('hostel', 'Hostel'), ('allocation', 'Allocation'), ('user', 'User')], max_length=12)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=8)),
+                ('owner_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
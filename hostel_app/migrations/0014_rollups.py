@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate, TruncHour
+
+
+def fill_rollups(apps, schema_editor):
+    # One grouped query per table; later changes are kept up by hostel_app.rollups.
+    Allocation = apps.get_model("hostel_app", "Allocation")
+    ActivityLog = apps.get_model("hostel_app", "ActivityLog")
+    HostelDayStat = apps.get_model("hostel_app", "HostelDayStat")
+    ActivityHourStat = apps.get_model("hostel_app", "ActivityHourStat")
+
+    days = Allocation.objects.annotate(day=TruncDate("allocated_on")).values("hostel_id", "day").annotate(allocations=Count("id")).order_by()
+    HostelDayStat.objects.bulk_create((HostelDayStat(**row) for row in days.iterator()), batch_size=1000)
+    hours = ActivityLog.objects.annotate(hour=TruncHour("created_at")).values("action", "hour").annotate(entries=Count("id")).order_by()
+    ActivityHourStat.objects.bulk_create((ActivityHourStat(**row) for row in hours.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0013_changeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityHourStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('register', 'Register'), ('login', 'Login'), ('logout', 'Logout'), ('apply', 'Apply Hostel'), ('allocate', 'Allocate Hostel')], max_length=20)),
+                ('hour', models.DateTimeField()),
+                ('entries', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='activityhourstat_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('action', 'hour'), name='unique_activity_hour_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HostelDayStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('allocations', models.IntegerField(default=0)),
+                ('hostel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_stats', to='hostel_app.hostel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='hosteldaystat_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hostel', 'day'), name='unique_hostel_day_stat')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0014_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activityhourstat',
+            name='action',
+            field=models.CharField(choices=[('register', 'Register'), ('login', 'Login'), ('logout', 'Logout'), ('apply', 'Apply Hostel'), ('allocate', 'Allocate Hostel'), ('preferences', 'Rank Hostels'), ('import', 'Import Students'), ('delete_users', 'Delete Users')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='action',
+            field=models.CharField(choices=[('register', 'Register'), ('login', 'Login'), ('logout', 'Logout'), ('apply', 'Apply Hostel'), ('allocate', 'Allocate Hostel'), ('preferences', 'Rank Hostels'), ('import', 'Import Students'), ('delete_users', 'Delete Users')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel_app', '0015_activity_actions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['owner_id', 'kind', 'id'], name='changeevent_owner_idx'),
+        ),
+    ]
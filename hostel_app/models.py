@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class Hostel(models.Model):
@@ -28,16 +29,50 @@ class CustomUser(AbstractUser):
 
     
 
+class AllocationQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        # QuerySet.create() forces an INSERT; save without it so create() also takes the upsert in save().
+        allocation = self.model(**kwargs)
+        allocation.save(using=self.db)
+        return allocation
+
+
 class Allocation(models.Model):
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     hostel = models.ForeignKey('Hostel', on_delete=models.CASCADE)
     room_number = models.CharField(max_length=10)
     allocated_on = models.DateTimeField(auto_now_add=True)
 
+    objects = AllocationQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("student",), name="unique_allocation_per_student"),
+        ]
+        indexes = [
+            models.Index(fields=["allocated_on", "id"], name="allocation_recent_idx"),
+            models.Index(fields=["hostel", "room_number"], name="allocation_hostel_room_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The (hostel, allocation day) the analytics rollups counted this row under.
+        instance._counted_as = (instance.__dict__.get("hostel_id"), instance.__dict__.get("allocated_on"))
+        return instance
+
     def save(self, *args, **kwargs):
-        # Keep exactly one allocation per student by removing older rows first.
-        if self.student_id:
-            Allocation.objects.filter(student_id=self.student_id).exclude(pk=self.pk).delete()
+        # One allocation per student: a new allocation for a student who already has one
+        # overwrites that row (upsert on student) instead of deleting it and inserting again.
+        if self._state.adding and self.student_id and not kwargs.get("force_insert"):
+            existing = (
+                Allocation.objects.filter(student_id=self.student_id).values_list("pk", "hostel_id", "allocated_on").first()
+            )
+            if existing is not None:
+                self.pk = existing[0]
+                self._counted_as = existing[1:]
+                self._state.adding = False
+                self.allocated_on = timezone.now()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -52,16 +87,140 @@ class ActivityLog(models.Model):
         ("logout", "Logout"),
         ("apply", "Apply Hostel"),
         ("allocate", "Allocate Hostel"),
+        ("preferences", "Rank Hostels"),
+        ("import", "Import Students"),
+        ("delete_users", "Delete Users"),
     ]
 
     user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     details = models.CharField(max_length=255, blank=True, default="")
-    created_at = models.DateTimeField(auto_now_add=True)
+    # default rather than auto_now_add so buffered entries keep the time they happened.
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="activitylog_recent_idx"),
+            models.Index(fields=["user", "created_at"], name="activitylog_user_recent_idx"),
+        ]
 
     def __str__(self):
         username = self.user.username if self.user else "unknown"
         return f"{username} - {self.action} - {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class Room(models.Model):
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name="rooms")
+    number = models.PositiveIntegerField()
+    floor = models.PositiveSmallIntegerField(null=True, blank=True)
+    capacity = models.PositiveSmallIntegerField(default=1)
+    occupancy = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("hostel", "number"), name="unique_room_per_hostel"),
+        ]
+        indexes = [
+            # Serves "next free room in hostel X" without touching full rooms.
+            models.Index(
+                fields=("hostel", "number"),
+                condition=models.Q(occupancy__lt=models.F("capacity")),
+                name="room_free_idx",
+            ),
+            models.Index(fields=("hostel", "floor"), name="room_floor_idx"),
+        ]
+
+    @property
+    def label(self):
+        return f"R{self.number:03d}"
+
+    def __str__(self):
+        return f"{self.hostel_id} - {self.label} ({self.occupancy}/{self.capacity})"
+
+
+class SummaryCounter(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class HostelPreference(models.Model):
+    student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="hostel_preferences")
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name="preferences")
+    rank = models.PositiveSmallIntegerField()
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["student", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=("student", "rank"), name="unique_preference_rank_per_student"),
+            models.UniqueConstraint(fields=("student", "hostel"), name="unique_preference_hostel_per_student"),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} #{self.rank} -> {self.hostel_id}"
+
+
+class ChangeEvent(models.Model):
+    """One entry of the change feed; the id is the feed's sequence number."""
+
+    KIND_CHOICES = [("hostel", "Hostel"), ("allocation", "Allocation"), ("user", "User")]
+    OP_CHOICES = [("created", "Created"), ("updated", "Updated"), ("deleted", "Deleted")]
+
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=8, choices=OP_CHOICES)
+    # The student an allocation or user row belongs to; not a foreign key so deletes keep it.
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Serves the newest allocation event per student (hostel_app.events).
+            models.Index(fields=["owner_id", "kind", "id"], name="changeevent_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.object_id} {self.op}"
+
+
+class HostelDayStat(models.Model):
+    """Allocations per hostel by allocation day; maintained by hostel_app.rollups."""
+
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name="day_stats")
+    day = models.DateField()
+    allocations = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("hostel", "day"), name="unique_hostel_day_stat"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="hosteldaystat_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.hostel_id} {self.day}: {self.allocations}"
+
+
+class ActivityHourStat(models.Model):
+    """Activity log entries per action per hour; maintained by hostel_app.rollups and kept after archiving."""
+
+    action = models.CharField(max_length=20, choices=ActivityLog.ACTION_CHOICES)
+    hour = models.DateTimeField()
+    entries = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("action", "hour"), name="unique_activity_hour_stat"),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="activityhourstat_hour_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.hour:%Y-%m-%d %H}:00: {self.entries}"
@@ -0,0 +1,232 @@
+"""Analytics rollups: allocations per hostel per day and activity per action per hour.
+
+HostelDayStat mirrors ``Allocation`` grouped by hostel and allocation day, so it
+goes up and down as allocations are created, moved and removed. ActivityHourStat
+only counts up: it keeps the history of activity rows after they are archived.
+
+Changes are collected per transaction and written as a single
+``INSERT ... ON CONFLICT DO UPDATE`` that adds the deltas (PostgreSQL and SQLite
+both accept it). Allocation days are written right after the transaction
+commits; a failed write is logged rather than raised. Activity hours, touched by
+nearly every request, go through a per-process accumulator like the summary
+counters: one upsert per ``SUMMARY_FLUSH_INTERVAL`` for all the (action, hour)
+pairs seen since, so reports show new activity within the interval.
+``manage.py rebuild_rollups`` recomputes the tables in chunks of days.
+Activity hours older than the oldest row still in the log are left as they are.
+Run the rebuild while writes are quiet: an increment that commits inside a
+window while that window is being rebuilt can be counted twice or lost.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from . import deferred
+from .models import ActivityHourStat, ActivityLog, Allocation, HostelDayStat, Room
+
+logger = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 500
+
+
+def day_of(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def hour_of(moment):
+    moment = timezone.localtime(moment) if timezone.is_aware(moment) else moment
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _increment(model, key_fields, field, deltas):
+    rows = [(*key, delta) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in (*key_fields, field)]
+    table, column = quote(model._meta.db_table), quote(fields[-1].column)
+    placeholders = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        sql = (
+            f"INSERT INTO {table} ({', '.join(quote(f.column) for f in fields)}) "
+            f"VALUES {', '.join([placeholders] * len(batch))} "
+            f"ON CONFLICT ({', '.join(quote(f.column) for f in fields[:-1])}) "
+            f"DO UPDATE SET {column} = {table}.{column} + EXCLUDED.{column}"
+        )
+        params = [f.get_db_prep_value(value, connection) for row in batch for f, value in zip(fields, row)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def _apply_allocations(deltas):
+    try:
+        _increment(HostelDayStat, ("hostel_id", "day"), "allocations", deltas)
+    except DatabaseError:
+        logger.exception("Could not apply %d allocation rollup delta(s)", len(deltas))
+
+
+def _apply_activity(deltas):
+    with transaction.atomic():
+        _increment(ActivityHourStat, ("action", "hour"), "entries", deltas)
+
+
+activity = deferred.Accumulator(_apply_activity, "activity-rollup")
+
+
+def _collect(apply, keys, delta):
+    deltas = deferred.pending(apply, dict)
+    immediate = deltas is None
+    if immediate:
+        deltas = {}
+    for key in keys:
+        deltas[key] = deltas.get(key, 0) + delta
+    if immediate:
+        apply(deltas)
+
+
+def count_allocations(rows, delta=1):
+    """Add ``delta`` for each (hostel_id, allocated_on) pair once the current transaction commits."""
+    _collect(_apply_allocations, [(hostel_id, day_of(allocated_on)) for hostel_id, allocated_on in rows], delta)
+
+
+def count_moves(allocations):
+    """Re-count allocations whose hostel or allocation time changed since they were loaded or last counted."""
+    before, after = [], []
+    for allocation in allocations:
+        current = (allocation.hostel_id, allocation.allocated_on)
+        previous = getattr(allocation, "_counted_as", None)
+        if previous and None not in previous and previous != current:
+            before.append(previous)
+            after.append(current)
+        allocation._counted_as = current
+    count_allocations(before, -1)
+    count_allocations(after, +1)
+
+
+def count_activity(rows):
+    """Add one per (action, created_at) pair to the accumulator once the current transaction commits."""
+    _collect(activity.add, [(action, hour_of(created_at)) for action, created_at in rows], 1)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _windows(first, last, chunk_days):
+    day = first
+    while day <= last:
+        yield day, min(day + timedelta(days=chunk_days), last + timedelta(days=1))
+        day += timedelta(days=chunk_days)
+
+
+def rebuild_allocations(chunk_days=7, progress=None):
+    """Recompute HostelDayStat from Allocation, one transaction per ``chunk_days`` days. Returns rows written."""
+    bounds = Allocation.objects.aggregate(first=Min("allocated_on"), last=Max("allocated_on"))
+    stats = HostelDayStat.objects.aggregate(first=Min("day"), last=Max("day"))
+    days = [day_of(bounds["first"]), day_of(bounds["last"])] if bounds["first"] else []
+    days += [day for day in (stats["first"], stats["last"]) if day]
+    written = 0
+    if not days:
+        return written
+    for start, end in _windows(min(days), max(days), chunk_days):
+        with transaction.atomic():
+            HostelDayStat.objects.filter(day__gte=start, day__lt=end).delete()
+            rows = (
+                Allocation.objects.filter(allocated_on__gte=_day_start(start), allocated_on__lt=_day_start(end))
+                .annotate(day=TruncDate("allocated_on"))
+                .values("hostel_id", "day")
+                .annotate(allocations=Count("id"))
+                .order_by()
+            )
+            created = HostelDayStat.objects.bulk_create([HostelDayStat(**row) for row in rows], batch_size=1000)
+        written += len(created)
+        if progress:
+            progress("allocations", start, end, len(created))
+    return written
+
+
+def rebuild_activity(since=None, chunk_days=7, progress=None):
+    """Recompute ActivityHourStat from ActivityLog from ``since`` (default: the oldest row) on. Returns rows written."""
+    # Hours before ``since`` are kept, so this process's pending counts go in first.
+    activity.flush()
+    if since is None:
+        since = ActivityLog.objects.aggregate(first=Min("created_at"))["first"]
+        if since is None:
+            return 0
+    written = 0
+    for start, end in _windows(day_of(since), timezone.localdate(), chunk_days):
+        with transaction.atomic():
+            ActivityHourStat.objects.filter(hour__gte=_day_start(start), hour__lt=_day_start(end)).delete()
+            rows = (
+                ActivityLog.objects.filter(created_at__gte=_day_start(start), created_at__lt=_day_start(end))
+                .annotate(hour=TruncHour("created_at"))
+                .values("action", "hour")
+                .annotate(entries=Count("id"))
+                .order_by()
+            )
+            created = ActivityHourStat.objects.bulk_create([ActivityHourStat(**row) for row in rows], batch_size=1000)
+        written += len(created)
+        if progress:
+            progress("activity", start, end, len(created))
+    return written
+
+
+def occupancy():
+    """Rooms, places and occupied places per hostel, from the room inventory."""
+    rows = (
+        Room.objects.values("hostel_id", "hostel__name")
+        .annotate(rooms=Count("id"), capacity=Sum("capacity"), occupied=Sum("occupancy"))
+        .order_by("hostel__name", "hostel_id")
+    )
+    return [
+        {
+            **row,
+            "free_places": max(row["capacity"] - row["occupied"], 0),
+            "occupancy_rate": round(row["occupied"] / row["capacity"], 4) if row["capacity"] else 0.0,
+        }
+        for row in rows
+    ]
+
+
+def allocations_per_day(since, until, hostel_id=None):
+    """Current allocations per hostel by allocation day, ``since`` to ``until`` inclusive."""
+    rows = HostelDayStat.objects.filter(day__gte=since, day__lte=until, allocations__gt=0)
+    if hostel_id:
+        rows = rows.filter(hostel_id=hostel_id)
+    return list(rows.order_by("day", "hostel_id").values("day", "hostel_id", "allocations"))
+
+
+def _hours(since, until):
+    return ActivityHourStat.objects.filter(hour__gte=_day_start(since), hour__lt=_day_start(until + timedelta(days=1)))
+
+
+def activity_per_day(since, until):
+    return list(
+        _hours(since, until)
+        .annotate(day=TruncDate("hour"))
+        .values("day", "action")
+        .annotate(entries=Sum("entries"))
+        .order_by("day", "action")
+    )
+
+
+def peak_hours(since, until):
+    """Per action: the busiest hour in the range, its entries and the range total."""
+    hours = _hours(since, until)
+    totals = {row["action"]: row for row in hours.values("action").annotate(peak=Max("entries"), total=Sum("entries")).order_by()}
+    if not totals:
+        return []
+    at_peak = Q()
+    for action, row in totals.items():
+        at_peak |= Q(action=action, entries=row["peak"])
+    first_at_peak = {}
+    for action, hour in hours.filter(at_peak).order_by("hour").values_list("action", "hour"):
+        first_at_peak.setdefault(action, hour)
+    return [
+        {"action": action, "hour": first_at_peak.get(action), "entries": row["peak"], "total": row["total"]}
+        for action, row in sorted(totals.items())
+    ]
@@ -0,0 +1,212 @@
+"""Room inventory: each Room row tracks capacity and occupancy for one numbered room.
+
+Allocations still store the room as a label ("R007"); every path that creates,
+moves or removes an allocation keeps Room.occupancy in step through the helpers
+below. Labels that are not of the R<number> form stay outside the inventory.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+
+from . import changes, hostel_cache
+from .models import Allocation, Hostel, Room
+
+
+def parse_room_number(value):
+    raw = str(value or "").strip().upper()
+    if raw.startswith("R"):
+        raw = raw[1:]
+    if raw.isdigit():
+        return int(raw)
+    return None
+
+
+def format_room_number(number):
+    return f"R{number:03d}"
+
+
+def room_occupancy(hostel_id):
+    """Count allocations per room number of a hostel, parsed from their labels."""
+    labels = Allocation.objects.filter(hostel_id=hostel_id).values_list("room_number", flat=True).iterator()
+    occupancy = Counter()
+    for label in labels:
+        number = parse_room_number(label)
+        if number:
+            occupancy[number] += 1
+    return occupancy
+
+
+def seed_rooms(hostel_id, count, capacity=1, per_floor=None, occupancy=0, batch_size=1000):
+    """Append ``count`` rooms after the highest existing number; returns the new numbers."""
+    if count <= 0:
+        return []
+    with transaction.atomic():
+        # The hostel row lock serializes numbering of new rooms.
+        Hostel.objects.select_for_update().filter(id=hostel_id).first()
+        start = (Room.objects.filter(hostel_id=hostel_id).aggregate(highest=Max("number"))["highest"] or 0) + 1
+        numbers = list(range(start, start + count))
+        Room.objects.bulk_create(
+            [
+                Room(
+                    hostel_id=hostel_id,
+                    number=number,
+                    capacity=capacity,
+                    occupancy=occupancy,
+                    floor=(number - 1) // per_floor + 1 if per_floor else None,
+                )
+                for number in numbers
+            ],
+            batch_size=batch_size,
+        )
+        return numbers
+
+
+def reserve_rooms(hostel_id, count):
+    """Hand out ``count`` places in a hostel: lowest-numbered rooms with space first, then new rooms."""
+    if count <= 0:
+        return []
+    with transaction.atomic():
+        numbers = []
+        while len(numbers) < count:
+            # Wait for rooms other transactions hold rather than skipping them, which would send
+            # the request to seed_rooms below and grow the hostel past its capacity. Locks are
+            # taken in room order, so reservations cannot deadlock. A room that filled up while
+            # we waited drops out of the result, so look again until no room has space.
+            rooms = list(
+                Room.objects.select_for_update()
+                .filter(hostel_id=hostel_id, occupancy__lt=F("capacity"))
+                .order_by("number")[: count - len(numbers)]
+            )
+            if not rooms:
+                break
+            for room in rooms:
+                taken = min(room.capacity - room.occupancy, count - len(numbers))
+                room.occupancy += taken
+                numbers.extend([room.number] * taken)
+            # The rows are locked, so absolute values are safe to write back.
+            Room.objects.bulk_update(rooms, ["occupancy"])
+
+        remaining = count - len(numbers)
+        if remaining:
+            # Inventory ran out (or was never seeded): grow the hostel by single rooms already taken.
+            numbers.extend(seed_rooms(hostel_id, remaining, occupancy=1))
+        return [format_room_number(number) for number in numbers]
+
+
+def next_room_number(hostel_id):
+    """Hand out the lowest-numbered room of a hostel that still has space."""
+    return reserve_rooms(hostel_id, 1)[0]
+
+
+def _count_rooms(rooms):
+    counts = Counter()
+    for hostel_id, room_number in rooms:
+        number = parse_room_number(room_number)
+        if hostel_id and number:
+            counts[(hostel_id, number)] += 1
+    return counts
+
+
+def _adjust(counts, sign):
+    by_delta = {}
+    for (hostel_id, number), n in counts.items():
+        by_delta.setdefault(n, {}).setdefault(hostel_id, []).append(number)
+    for n, hostels in by_delta.items():
+        for hostel_id, numbers in hostels.items():
+            rooms = Room.objects.filter(hostel_id=hostel_id, number__in=numbers)
+            if sign > 0:
+                rooms.update(occupancy=F("occupancy") + n)
+            else:
+                rooms.filter(occupancy__gte=n).update(occupancy=F("occupancy") - n)
+
+
+def claim_rooms(rooms):
+    """Count explicitly chosen (hostel_id, room_number) pairs as occupied, adding rooms the inventory lacks."""
+    counts = _count_rooms(rooms)
+    if not counts:
+        return
+    with transaction.atomic():
+        for hostel_id in sorted({hostel_id for hostel_id, _ in counts}):
+            Hostel.objects.select_for_update().filter(id=hostel_id).first()
+        existing = set(
+            Room.objects.filter(
+                hostel_id__in={hostel_id for hostel_id, _ in counts},
+                number__in={number for _, number in counts},
+            ).values_list("hostel_id", "number")
+        )
+        Room.objects.bulk_create(
+            [
+                Room(hostel_id=hostel_id, number=number, capacity=max(n, 1), occupancy=n)
+                for (hostel_id, number), n in counts.items()
+                if (hostel_id, number) not in existing
+            ]
+        )
+        _adjust({key: n for key, n in counts.items() if key in existing}, +1)
+
+
+def claim_room(hostel_id, room_number):
+    claim_rooms([(hostel_id, room_number)])
+
+
+def overbooked_rooms(arriving, leaving=()):
+    """Rooms that would exceed capacity once ``arriving`` pairs are claimed and ``leaving`` pairs released.
+
+    Reads (and locks) the target rooms in one query. A room missing from the
+    inventory counts as an empty single room. Returns (hostel_id, number,
+    capacity, occupancy after the move) per overbooked room.
+    """
+    incoming = _count_rooms(arriving)
+    if not incoming:
+        return []
+    outgoing = _count_rooms(leaving)
+    rows = (
+        Room.objects.select_for_update()
+        .filter(hostel_id__in={hostel_id for hostel_id, _ in incoming}, number__in={number for _, number in incoming})
+        .values_list("hostel_id", "number", "capacity", "occupancy")
+    )
+    current = {(hostel_id, number): (capacity, occupancy) for hostel_id, number, capacity, occupancy in rows}
+    overbooked = []
+    for (hostel_id, number), n in sorted(incoming.items()):
+        capacity, occupancy = current.get((hostel_id, number), (1, 0))
+        after = occupancy - outgoing.get((hostel_id, number), 0) + n
+        if after > capacity:
+            overbooked.append((hostel_id, number, capacity, after))
+    return overbooked
+
+
+def release_rooms(rooms):
+    """Give back one place per (hostel_id, room_number) pair of an allocation that was moved or removed."""
+    counts = _count_rooms(rooms)
+    _adjust(counts, -1)
+    return sum(counts.values())
+
+
+def release_room(hostel_id, room_number):
+    return release_rooms([(hostel_id, room_number)])
+
+
+def return_places(per_hostel):
+    """Add per-hostel place counts to total_rooms (negative takes places): one UPDATE per distinct count."""
+    by_count = {}
+    for hostel_id, count in per_hostel.items():
+        by_count.setdefault(count, []).append(hostel_id)
+    for count, hostel_ids in by_count.items():
+        Hostel.objects.filter(id__in=hostel_ids).update(total_rooms=F("total_rooms") + count)
+    if per_hostel:
+        hostel_cache.invalidate()
+        changes.record_many(changes.HOSTEL, changes.UPDATED, [(hostel_id, None) for hostel_id in per_hostel])
+
+
+def availability(hostel_id):
+    """Free rooms and per-floor occupancy of a hostel, answered from the inventory."""
+    rooms = Room.objects.filter(hostel_id=hostel_id)
+    free = rooms.filter(occupancy__lt=F("capacity")).order_by("number").values_list("number", "capacity", "occupancy")
+    floors = rooms.values("floor").annotate(capacity=Sum("capacity"), occupancy=Sum("occupancy")).order_by("floor")
+    return {
+        "free_rooms": [
+            {"room_number": format_room_number(number), "free_places": capacity - occupancy}
+            for number, capacity, occupancy in free
+        ],
+        "floors": list(floors),
+    }
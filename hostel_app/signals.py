@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import auth_cache, changes, counters, hostel_cache, rollups
+from .rooms import seed_rooms
+from .models import ActivityLog, Allocation, Hostel
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_previous_role(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and "role" not in update_fields):
+        return
+    instance._previous_role = sender.objects.filter(pk=instance.pk).values_list("role", flat=True).first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def count_saved_user(sender, instance, created, **kwargs):
+    if created:
+        counters.bump("total_users")
+        if instance.role == "student":
+            counters.bump("total_students")
+        return
+    previous_role = instance.__dict__.pop("_previous_role", instance.role)
+    if previous_role != instance.role:
+        counters.bump("total_students", (instance.role == "student") - (previous_role == "student"))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def count_deleted_user(sender, instance, **kwargs):
+    counters.bump("total_users", -1)
+    if instance.role == "student":
+        counters.bump("total_students", -1)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    # Any change may touch the password, role or active flag; logins (last_login) are rare enough to include.
+    auth_cache.forget(instance.pk)
+
+
+@receiver(post_save, sender=Hostel)
+@receiver(post_save, sender=Allocation)
+@receiver(post_save, sender=ActivityLog)
+def count_created_row(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(_COUNTER_FOR[sender])
+
+
+@receiver(post_delete, sender=Hostel)
+@receiver(post_delete, sender=Allocation)
+@receiver(post_delete, sender=ActivityLog)
+def count_deleted_row(sender, instance, **kwargs):
+    counters.bump(_COUNTER_FOR[sender], -1)
+
+
+_COUNTER_FOR = {
+    Hostel: "total_hostels",
+    Allocation: "total_allocations",
+    ActivityLog: "total_activities",
+}
+
+
+@receiver(post_save, sender=Hostel)
+@receiver(post_delete, sender=Hostel)
+def invalidate_hostel_cache(sender, **kwargs):
+    hostel_cache.invalidate()
+
+
+@receiver(post_save, sender=Hostel)
+def seed_new_hostel_rooms(sender, instance, created, raw=False, **kwargs):
+    # A new hostel starts with one single room per place; seed_rooms adds more later.
+    if created and not raw and instance.total_rooms and instance.total_rooms > 0:
+        seed_rooms(instance.id, instance.total_rooms)
+
+
+@receiver(post_save, sender=Hostel)
+@receiver(post_save, sender=Allocation)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def record_saved_change(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the feed does not carry.
+    if raw or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    kind, owner_id = _feed_kind(sender, instance)
+    changes.record(kind, changes.CREATED if created else changes.UPDATED, instance.pk, owner_id)
+
+
+@receiver(post_delete, sender=Hostel)
+@receiver(post_delete, sender=Allocation)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def record_deleted_change(sender, instance, **kwargs):
+    kind, owner_id = _feed_kind(sender, instance)
+    changes.record(kind, changes.DELETED, instance.pk, owner_id)
+
+
+def _feed_kind(sender, instance):
+    if sender is Hostel:
+        return changes.HOSTEL, None
+    if sender is Allocation:
+        return changes.ALLOCATION, instance.student_id
+    return changes.USER, instance.pk
+
+
+@receiver(post_save, sender=Allocation)
+def count_saved_allocation(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        rollups.count_allocations([(instance.hostel_id, instance.allocated_on)])
+        instance._counted_as = (instance.hostel_id, instance.allocated_on)
+    elif update_fields is None or {"hostel", "hostel_id", "allocated_on"} & set(update_fields):
+        rollups.count_moves([instance])
+
+
+@receiver(post_delete, sender=Allocation)
+def count_deleted_allocation(sender, instance, origin=None, **kwargs):
+    # A deleted hostel takes its rollup rows with it.
+    if not isinstance(origin, Hostel):
+        rollups.count_allocations([(instance.hostel_id, instance.allocated_on)], -1)
+
+
+@receiver(post_save, sender=ActivityLog)
+def count_saved_activity(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.count_activity([(instance.action, instance.created_at)])
@@ -1,3 +1,1219 @@
-from django.test import TestCase
+"""Query budgets and response-time ceilings for the JSON API.
 
-# Create your tests here.
+Every endpoint runs against a small and a larger seeded dataset with the same
+query budget, so a view whose query count grows with the data fails here. Time
+ceilings are measured on the larger dataset; ``API_TEST_TIME_SCALE`` stretches
+them on slow machines.
+"""
+import asyncio
+import csv
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django import test
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, transaction
+from django.db.models import F, QuerySet
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import activity, admission, archive, auth_cache, changes, compression, counters, deferred, events, fastjson, matching, metrics, rollups
+from .models import ActivityHourStat, ActivityLog, Allocation, ChangeEvent, CustomUser, Hostel, HostelDayStat, HostelPreference, Room, SummaryCounter
+from .rooms import reserve_rooms, seed_rooms
+from .views import SESSION_PROFILE_KEY, _encode_cursor, _session_profile
+
+TIME_SCALE = float(os.environ.get("API_TEST_TIME_SCALE", "1"))
+READ_CEILING = 0.25
+WRITE_CEILING = 0.5
+
+
+# Summaries are written as each transaction commits, inside the test's transaction; no flusher threads.
+@override_settings(SUMMARY_FLUSH_INTERVAL=0)
+class TestCase(test.TestCase):
+    @classmethod
+    @contextmanager
+    def captureOnCommitCallbacks(cls, *, using=DEFAULT_DB_ALIAS, execute=False):
+        # Containers registered before the capture would never run; collect into new ones.
+        deferred.reset()
+        with super().captureOnCommitCallbacks(using=using, execute=execute) as callbacks:
+            yield callbacks
+
+    def setUp(self):
+        # Deltas a failed flush kept would outlive the test's rollback.
+        counters.pending.discard()
+        rollups.activity.discard()
+
+    def stop_flushers(self, *flushers):
+        # Their background threads are not started; the test flushes by hand.
+        for flusher in flushers:
+            patcher = mock.patch.object(flusher, "_ensure_worker", return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+            if isinstance(flusher, deferred.Accumulator):
+                self.addCleanup(flusher.discard)
+
+
+class ApiQueryBudgetTests(TestCase):
+    STUDENTS = 20
+    HOSTELS = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hostels = [
+            Hostel.objects.create(name=f"Hostel {i}", location="Campus", total_rooms=cls.STUDENTS)
+            for i in range(cls.HOSTELS)
+        ]
+        CustomUser.objects.bulk_create(
+            [CustomUser(username="admin", role="admin", password="!")]
+            + [CustomUser(username=f"student{i:05d}", first_name="Student", password="!") for i in range(cls.STUDENTS)]
+        )
+        cls.admin = CustomUser.objects.get(username="admin")
+        cls.students = list(CustomUser.objects.filter(role="student").order_by("username"))
+
+        # Two thirds of the students are allocated; the rest can still apply.
+        Allocation.objects.bulk_create(
+            [
+                Allocation(student=student, hostel=cls.hostels[i % cls.HOSTELS], room_number=f"R{i // cls.HOSTELS + 1:03d}")
+                for i, student in enumerate(cls.students)
+                if i % 3
+            ]
+        )
+        ActivityLog.objects.bulk_create(
+            [ActivityLog(user=cls.students[i % cls.STUDENTS], action="apply", details="seed") for i in range(cls.STUDENTS * 2)]
+        )
+        counters.recompute()
+        rollups.rebuild_allocations()
+        rollups.rebuild_activity()
+
+        cls.allocated = cls.students[1]
+        cls.unallocated = [student for i, student in enumerate(cls.students) if not i % 3]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        auth_cache.users.clear()
+
+    def call(self, budget, method, path, user=None, data=None, status=200, ceiling=READ_CEILING, clear_cache=True):
+        if user:
+            self.client.force_login(user)
+        if clear_cache:
+            cache.clear()
+        with self.assertNumQueries(budget):
+            started = time.perf_counter()
+            if method == "GET":
+                response = self.client.get(path)
+            else:
+                response = self.client.post(path, json.dumps(data or {}), content_type="application/json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, status, getattr(response, "content", b"")[:200])
+        self.assertLess(elapsed, ceiling * TIME_SCALE, f"{method} {path} took {elapsed * 1000:.0f} ms")
+        return response
+
+    def test_session_from_stored_profile(self):
+        self.client.force_login(self.allocated)
+        session = self.client.session
+        session[SESSION_PROFILE_KEY] = _session_profile(self.allocated)
+        session.save()
+        # The profile is checked against the user version held in the cache.
+        self.call(1, "GET", "/api/session/", clear_cache=False)
+
+    def test_session_revalidated(self):
+        # Session, user, then the refreshed profile written back in a savepoint.
+        self.call(5, "GET", "/api/session/", user=self.allocated)
+
+    def test_health(self):
+        self.call(1, "GET", "/api/health/")
+
+    def test_hostels(self):
+        self.call(1, "GET", "/api/hostels/", user=self.allocated)
+
+    def test_hostel_rooms(self):
+        self.call(5, "GET", f"/api/hostels/{self.hostels[0].id}/rooms/", user=self.allocated)
+
+    def test_allocation_status(self):
+        # Session, user, the stream version from the change feed, then the allocation.
+        self.call(4, "GET", "/api/status/", user=self.allocated)
+
+    def test_student_dashboard(self):
+        self.call(5, "GET", "/api/dashboard/", user=self.allocated)
+
+    def test_admin_dashboard_lists_allocations(self):
+        self.call(5, "GET", "/api/dashboard/", user=self.admin)
+
+    def test_admin_dashboard_summary(self):
+        # One page per section, the counter table and the feed version; no COUNT(*) over the tables.
+        self.call(7, "GET", "/api/admin/dashboard/", user=self.admin)
+
+    def test_admin_dashboard_section(self):
+        self.call(4, "GET", "/api/admin/dashboard/?section=allocations", user=self.admin)
+
+    def test_preferences(self):
+        self.call(3, "GET", "/api/preferences/", user=self.allocated)
+
+    def test_submit_preferences(self):
+        hostel_ids = [hostel.id for hostel in self.hostels]
+        self.call(10, "POST", "/api/preferences/", user=self.unallocated[0], data={"hostel_ids": hostel_ids}, ceiling=WRITE_CEILING)
+
+    def test_apply(self):
+        self.call(
+            13, "POST", "/api/allocate/", user=self.unallocated[0], data={"hostel_id": self.hostels[0].id}, ceiling=WRITE_CEILING
+        )
+
+    def test_apply_when_allocated(self):
+        self.call(
+            4, "POST", "/api/allocate/", user=self.allocated, data={"hostel_id": self.hostels[0].id}, status=409
+        )
+
+    def test_admin_allocate(self):
+        data = {"student_id": self.allocated.id, "hostel_id": self.hostels[1].id}
+        self.call(14, "POST", "/api/allocate/", user=self.admin, data=data, ceiling=WRITE_CEILING)
+
+    def test_admin_update_room(self):
+        allocation = Allocation.objects.filter(student=self.allocated).first()
+        self.call(
+            14,
+            "POST",
+            f"/api/admin/allocations/{allocation.id}/room/",
+            user=self.admin,
+            data={"room_number": "R900"},
+            ceiling=WRITE_CEILING,
+        )
+
+    def test_admin_bulk_allocate(self):
+        # The batch grows with the dataset; the query count must not. Capped below the
+        # ~250 rows SQLite fits in one INSERT, beyond which bulk_create splits batches.
+        items = [{"student_id": student.id, "hostel_id": self.hostels[2].id} for student in self.unallocated[:200]]
+        response = self.call(13, "POST", "/api/admin/allocations/bulk/", user=self.admin, data={"items": items}, ceiling=WRITE_CEILING)
+        self.assertEqual(response.json()["allocated"], len(items))
+
+    def test_admin_bulk_update_rooms(self):
+        # A block of rooms moves to another hostel; capped like the bulk allocation above.
+        rule = {
+            "hostel_id": self.hostels[1].id,
+            "first_room": "R001",
+            "last_room": "R040",
+            "to_hostel_id": self.hostels[3].id,
+            "to_first_room": "R501",
+        }
+        response = self.call(17, "POST", "/api/admin/allocations/rooms/", user=self.admin, data={"rule": rule}, ceiling=WRITE_CEILING)
+        self.assertGreater(response.json()["moved"], 0)
+
+    def test_admin_delete_user(self):
+        # The freed place goes back with one grouped UPDATE of total_rooms and one of the room.
+        target = self.allocated
+        self.call(17, "POST", f"/api/admin/users/{target.id}/delete/", user=self.admin, ceiling=WRITE_CEILING)
+        self.assertFalse(Allocation.objects.filter(student_id=target.id).exists())
+
+    def test_admin_bulk_delete_users(self):
+        # One batch of allocated students from one hostel: one grouped UPDATE each for rooms and total_rooms.
+        ids = [student.id for i, student in enumerate(self.students) if i % self.HOSTELS == 1 and i % 3][:4]
+        response = self.call(18, "POST", "/api/admin/users/delete/", user=self.admin, data={"user_ids": ids}, ceiling=WRITE_CEILING)
+        self.assertEqual(response.json()["users"], len(ids))
+
+    def test_analytics(self):
+        # Room totals, then three reads of the rollup tables; peak hours take two.
+        self.call(7, "GET", "/api/admin/analytics/", user=self.admin)
+
+    def test_export_allocations(self):
+        self.call(3, "GET", "/api/export/allocations.csv", user=self.admin)
+
+    def test_metrics(self):
+        self.call(2, "GET", "/api/metrics/", user=self.admin)
+
+    def test_logout(self):
+        self.call(5, "POST", "/api/logout/", user=self.allocated)
+
+    def test_change_feed(self):
+        # Replaying a tenth of the allocations, a hostel and a deleted user: one query per kind with live rows.
+        version = changes.latest()
+        touched = Allocation.objects.order_by("id")[: max(self.STUDENTS // 10, 1)]
+        ChangeEvent.objects.bulk_create(
+            [ChangeEvent(kind=changes.ALLOCATION, object_id=a.id, op=changes.UPDATED, owner_id=a.student_id) for a in touched]
+            + [
+                ChangeEvent(kind=changes.HOSTEL, object_id=self.hostels[0].id, op=changes.UPDATED),
+                ChangeEvent(kind=changes.USER, object_id=10**9, op=changes.DELETED, owner_id=10**9),
+            ]
+        )
+        response = self.call(8, "GET", f"/api/changes/?since={version}&limit=2000", user=self.admin)
+        self.assertEqual(len(response.json()["allocations"]), len(touched))
+
+    def test_change_feed_for_student(self):
+        self.call(5, "GET", f"/api/changes/?since={changes.latest()}", user=self.allocated)
+
+
+class LargeDatasetApiQueryBudgetTests(ApiQueryBudgetTests):
+    STUDENTS = 3000
+    HOSTELS = 12
+
+
+class SessionProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username="amina", password="pw", first_name="Amina")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.student)
+
+    def session(self):
+        return self.client.get("/api/session/").json()
+
+    def test_stored_profile_follows_changes_to_the_user(self):
+        self.assertEqual(set(self.session()["user"]), {"id", "username", "name", "role", "is_admin"})
+        self.assertIn(SESSION_PROFILE_KEY, self.client.session)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.role = "admin"
+            self.student.save()
+        self.assertEqual(self.session()["user"]["role"], "admin")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.set_password("changed")
+            self.student.save()
+        self.assertEqual(self.session(), {"authenticated": False})
+
+    def test_profile_from_another_password_is_not_used(self):
+        self.session()
+        session = self.client.session
+        session[SESSION_PROFILE_KEY] = {**session[SESSION_PROFILE_KEY], "auth_hash": "stale", "name": "Old"}
+        session.save()
+        self.assertEqual(self.session()["user"]["name"], "Amina")
+
+
+class AdminJsonBodyTests(TestCase):
+    BULK_PATHS = ["/api/admin/allocations/bulk/", "/api/admin/allocations/rooms/", "/api/admin/users/delete/"]
+
+    def test_bulk_endpoints_reject_non_object_bodies(self):
+        self.client.force_login(CustomUser.objects.create(username="admin", role="admin"))
+        for path in self.BULK_PATHS:
+            for body in ("[]", "[1, 2]", "7", '"items"'):
+                with self.subTest(path=path, body=body):
+                    response = self.client.post(path, body, content_type="application/json")
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {"status": "error", "message": "Invalid JSON"})
+
+
+class AuthUserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username="amina", password="pw")
+
+    def setUp(self):
+        super().setUp()
+        auth_cache.users.clear()
+        self.client.force_login(self.student)
+
+    def dashboard(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/dashboard/")
+        user_queries = [query for query in queries if query["sql"].startswith(f'SELECT "{CustomUser._meta.db_table}"."id"')]
+        return response, len(queries), len(user_queries)
+
+    def test_repeat_requests_skip_the_user_query(self):
+        _, first, user_queries = self.dashboard()
+        self.assertEqual(user_queries, 1)
+        response, second, user_queries = self.dashboard()
+        self.assertEqual((second, user_queries), (first - 1, 0))
+        self.assertEqual(response.json()["user"]["username"], "amina")
+        self.assertEqual(auth_cache.users.stats()["hits"], 1)
+
+    def test_role_password_and_deletion_reach_the_next_request(self):
+        self.dashboard()
+        self.student.role = "admin"
+        self.student.save()
+        self.assertTrue(self.dashboard()[0].json()["user"]["is_admin"])
+
+        self.student.set_password("changed")
+        self.student.save()
+        self.assertEqual(self.dashboard()[0].status_code, 401)
+
+        self.client.force_login(self.student)
+        self.dashboard()
+        self.student.delete()
+        self.assertEqual(self.dashboard()[0].status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_disabled(self):
+        _, first, _ = self.dashboard()
+        self.assertEqual(self.dashboard()[1:], (first, 1))
+        self.assertEqual(auth_cache.users.stats()["size"], 0)
+
+
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hostel = Hostel.objects.create(name="North", location="Campus", total_rooms=10)
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        cls.student = CustomUser.objects.create(username="amina", first_name="Amina")
+        cls.other = CustomUser.objects.create(username="baraka", first_name="Baraka")
+
+    def changes_since(self, version, user=None):
+        self.client.force_login(user or self.admin)
+        return self.client.get(f"/api/changes/?since={version}").json()
+
+    def test_bulk_allocation_and_delete_are_replayed(self):
+        self.client.force_login(self.admin)
+        version = self.client.get("/api/admin/dashboard/").json()["version"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/admin/allocations/bulk/",
+                json.dumps({"items": [{"student_id": self.student.id, "hostel_id": self.hostel.id}]}),
+                content_type="application/json",
+            )
+        feed = self.changes_since(version)
+        self.assertEqual([row["student__username"] for row in feed["allocations"]], ["amina"])
+        allocation_id = feed["allocations"][0]["id"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/admin/users/{self.student.id}/delete/")
+        feed = self.changes_since(feed["version"])
+        self.assertEqual(feed["deleted"]["allocations"], [allocation_id])
+        self.assertEqual(feed["deleted"]["users"], [self.student.id])
+        self.assertEqual([row["id"] for row in feed["hostels"]], [self.hostel.id])
+        self.assertEqual(self.changes_since(feed["version"])["version"], feed["version"])
+
+    def test_students_only_see_their_own_rows(self):
+        version = changes.latest()
+        with self.captureOnCommitCallbacks(execute=True):
+            Allocation.objects.create(student=self.other, hostel=self.hostel, room_number="R001")
+        feed = self.changes_since(version, user=self.student)
+        self.assertEqual(feed["allocations"], [])
+        self.assertGreater(feed["version"], version)
+
+    def test_status_stream_version_follows_the_feed(self):
+        self.client.force_login(self.student)
+        version = self.client.get("/api/status/").json()["version"]
+        self.assertEqual(self.client.get(f"/api/status/stream/?version={version}").content, b"retry: 15000\n\n")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Allocation.objects.create(student=self.other, hostel=self.hostel, room_number="R001")
+        self.assertEqual(self.client.get("/api/status/").json()["version"], version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Allocation.objects.create(student=self.student, hostel=self.hostel, room_number="R002")
+        status = self.client.get("/api/status/").json()
+        self.assertGreater(status["version"], version)
+        body = self.client.get(f"/api/status/stream/?version={version}").content.decode()
+        self.assertIn(f"id: {status['version']}\nevent: allocation\n", body)
+        self.assertIn('"room_number": "R002"', body)
+
+    def test_one_poll_serves_every_open_stream(self):
+        poller = events.Poller()
+        mine, again, theirs = asyncio.Event(), asyncio.Event(), asyncio.Event()
+        poller.watchers = {self.student.id: {mine, again}, self.other.id: {theirs}}
+        with self.settings(CHANGE_FEED_SETTLE_SECONDS=0):
+            async_to_sync(poller.poll)()
+            # Nothing new: only the feed's newest id, however many streams are open.
+            with self.assertNumQueries(1):
+                async_to_sync(poller.poll)()
+            with self.captureOnCommitCallbacks(execute=True):
+                Allocation.objects.create(student=self.student, hostel=self.hostel, room_number="R001")
+            with self.assertNumQueries(2):
+                async_to_sync(poller.poll)()
+        self.assertTrue(mine.is_set() and again.is_set())
+        self.assertFalse(theirs.is_set())
+        self.assertEqual(poller.version(self.student.id), events.allocation_version(self.student.id))
+
+    def test_pruned_version_asks_for_reload(self):
+        ChangeEvent.objects.bulk_create([ChangeEvent(kind=changes.HOSTEL, object_id=self.hostel.id, op=changes.UPDATED)] * 3)
+        first = ChangeEvent.objects.order_by("id").first().id
+        ChangeEvent.objects.filter(id__lt=first + 2).delete()
+        self.assertTrue(self.changes_since(first)["reset"])
+        self.assertFalse(self.changes_since(first + 1)["reset"])
+
+
+class AllocationExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = Hostel.objects.create(name="North", location="Campus", total_rooms=10)
+        cls.south = Hostel.objects.create(name="South", location="Campus", total_rooms=10)
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        cls.students = []
+        for day in range(1, 5):
+            student = CustomUser.objects.create(username=f"student{day}")
+            allocation = Allocation.objects.create(student=student, hostel=cls.north if day % 2 else cls.south, room_number=f"R00{day}")
+            Allocation.objects.filter(id=allocation.id).update(allocated_on=timezone.make_aware(datetime(2024, 3, day, 12)))
+            cls.students.append(student)
+
+    def export(self, user=None, **params):
+        self.client.force_login(user or self.admin)
+        return self.client.get("/api/export/allocations.csv", params)
+
+    def students_in(self, response):
+        self.assertEqual(response.status_code, 200)
+        header, *rows = csv.reader(StringIO(b"".join(response.streaming_content).decode()))
+        self.assertEqual(header, ["ID", "Student", "Hostel", "Room", "Allocated On"])
+        return [row[1] for row in rows]
+
+    def test_filters_select_the_rows(self):
+        self.assertEqual(self.students_in(self.export()), ["student4", "student3", "student2", "student1"])
+        self.assertEqual(self.students_in(self.export(hostel=self.north.id)), ["student3", "student1"])
+        # Both ends are whole days, "to" included.
+        self.assertEqual(self.students_in(self.export(**{"from": "2024-03-02", "to": "2024-03-03"})), ["student3", "student2"])
+        self.assertEqual(self.students_in(self.export(hostel=self.south.id, **{"from": "2024-03-03"})), ["student4"])
+        self.assertEqual(self.students_in(self.export(user=self.students[1], hostel=self.north.id)), [])
+        self.assertEqual(self.students_in(self.export(user=self.students[1])), ["student2"])
+
+    def test_bad_filters_are_rejected(self):
+        for params in ({"hostel": "north"}, {"from": "yesterday"}, {"to": "2024-02-30"}, {"from": "03/01/2024"}):
+            with self.subTest(**params):
+                response = self.export(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["status"], "error")
+
+
+class HostelCatalogueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hostel = Hostel.objects.create(name="North", location="Campus", total_rooms=5)
+        cls.student = CustomUser.objects.create(username="amina", first_name="Amina")
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def hostels(self, **headers):
+        return self.client.get("/api/hostels/", headers=headers)
+
+    def test_unchanged_catalogue_is_not_modified(self):
+        response = self.hostels()
+        self.assertEqual(response.status_code, 200)
+        for headers in ({"If-None-Match": response["ETag"]}, {"If-Modified-Since": response["Last-Modified"]}):
+            with self.subTest(**headers):
+                response = self.hostels(**headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+    def test_application_and_hostel_save_change_the_validator(self):
+        etag = self.hostels()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/allocate/", json.dumps({"hostel_id": self.hostel.id}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        response = self.hostels(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["hostels"][0]["total_rooms"], 4)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.hostel.refresh_from_db()
+        self.hostel.name = "North Wing"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hostel.save()
+        response = self.hostels(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["hostels"][0]["name"], "North Wing")
+
+
+class AdminDashboardPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = Hostel.objects.create(name="North", location="Campus", total_rooms=10)
+        cls.south = Hostel.objects.create(name="South", location="Campus", total_rooms=10)
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        students = [CustomUser.objects.create(username=f"student{i:02d}", first_name="Student") for i in range(7)]
+        Allocation.objects.bulk_create(
+            [
+                Allocation(student=student, hostel=cls.north if i % 2 else cls.south, room_number=f"R{i + 1:03d}")
+                for i, student in enumerate(students)
+            ]
+        )
+        # Most rows share one timestamp, so pages have to break ties on id.
+        tied = timezone.now()
+        Allocation.objects.filter(student__in=students[:5]).update(allocated_on=tied)
+        ActivityLog.objects.bulk_create(
+            [ActivityLog(user=students[i % 7], action="login" if i % 3 else "apply", created_at=tied) for i in range(11)]
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def get(self, **params):
+        return self.client.get("/api/admin/dashboard/", params)
+
+    def walk(self, section, **params):
+        rows, cursor = [], None
+        # A cursor that never runs out would repeat rows; the bound turns that into a failure.
+        for _ in range(50):
+            payload = self.get(section=section, limit=2, **params, **({"cursor": cursor} if cursor else {})).json()
+            rows.extend(payload[section])
+            cursor = payload["next_cursors"][section]
+            if not cursor:
+                return rows
+        self.fail(f"{section} pages never end")
+
+    def test_cursors_return_every_row_once_in_order(self):
+        for section, queryset in (
+            ("allocations", Allocation.objects.order_by("-allocated_on", "-id")),
+            ("activities", ActivityLog.objects.order_by("-created_at", "-id")),
+            ("users", CustomUser.objects.order_by("username", "id")),
+        ):
+            with self.subTest(section=section):
+                self.assertEqual([row["id"] for row in self.walk(section)], list(queryset.values_list("id", flat=True)))
+
+    def test_filters_and_fields_narrow_the_page(self):
+        rows = self.walk("allocations", hostel=self.north.id, fields="room_number,bogus")
+        self.assertEqual({tuple(row) for row in rows}, {("id", "room_number")})
+        self.assertEqual(
+            sorted(row["id"] for row in rows), sorted(Allocation.objects.filter(hostel=self.north).values_list("id", flat=True))
+        )
+        rows = self.walk("activities", action="apply", user="student0")
+        self.assertEqual(len(rows), ActivityLog.objects.filter(action="apply", user__username__startswith="student0").count())
+        self.assertEqual({row["action"] for row in rows}, {"apply"})
+        self.assertEqual([row["username"] for row in self.walk("users", role="admin")], ["admin"])
+
+    def test_bad_cursor_or_filter_is_rejected(self):
+        for params in (
+            {"section": "allocations", "cursor": "not a cursor"},
+            {"section": "allocations", "cursor": _encode_cursor(["yesterday", 1])},
+            {"section": "users", "cursor": _encode_cursor(["amina"])},
+            {"section": "allocations", "hostel": "north"},
+            {"section": "bogus"},
+            {"cursor": _encode_cursor(["amina", 1])},
+            {"limit": "many"},
+        ):
+            with self.subTest(**params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["status"], "error")
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        cls.student = CustomUser.objects.create(username="amina", first_name="Amina")
+
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+
+    def scrape(self):
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return {
+            name: float(value)
+            for name, value in (line.rsplit(" ", 1) for line in response.content.decode().splitlines() if not line.startswith("#"))
+        }
+
+    def test_requests_are_counted_by_view(self):
+        self.client.force_login(self.admin)
+        self.client.get("/api/hostels/")
+        samples = self.scrape()
+        requests = 'hostel_http_requests_total{view="hostels_api",method="GET",status="200"}'
+        self.assertEqual(samples[requests], 1)
+        self.assertEqual(samples['hostel_http_request_duration_seconds_count{view="hostels_api"}'], 1)
+        self.assertEqual(samples['hostel_http_request_duration_seconds_bucket{view="hostels_api",le="+Inf"}'], 1)
+        self.assertGreater(samples['hostel_db_queries_total{view="hostels_api"}'], 0)
+        self.assertGreater(samples['hostel_http_response_bytes_total{view="hostels_api"}'], 0)
+        for gauge in ("hostel_process_start_time_seconds", "hostel_activity_log_queue_depth", "hostel_auth_user_cache_size"):
+            self.assertIn(gauge, samples)
+
+        self.client.get("/api/hostels/")
+        samples = self.scrape()
+        self.assertEqual(samples[requests], 2)
+        # The first scrape is itself a request.
+        self.assertEqual(samples['hostel_http_requests_total{view="metrics_api",method="GET",status="200"}'], 1)
+
+    def test_only_admins_or_the_token_may_scrape(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        self.client.logout()
+        with self.settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/api/metrics/", headers={"Authorization": "Bearer wrong"}).status_code, 401)
+            self.assertEqual(self.client.get("/api/metrics/", headers={"Authorization": "Bearer s3cret"}).status_code, 200)
+
+
+class DeferredTests(TestCase):
+    def test_one_apply_per_transaction(self):
+        applied = []
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                deferred.pending(applied.append, list).append(1)
+                deferred.pending(applied.append, list).append(2)
+        self.assertEqual(applied, [[1, 2]])
+
+    def test_rolled_back_transaction_is_dropped(self):
+        applied = []
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                deferred.pending(applied.append, list).append(1)
+                raise ValueError
+            with transaction.atomic():
+                deferred.pending(applied.append, list).append(2)
+        self.assertEqual(applied, [[2]])
+
+
+class AdmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hostel = Hostel.objects.create(name="North", location="Campus", total_rooms=2)
+        other = Hostel.objects.create(name="South", location="Campus", total_rooms=5)
+        cls.students = [CustomUser.objects.create(username=f"student{i}") for i in range(4)]
+        Allocation.objects.create(student=cls.students[0], hostel=other, room_number="R001")
+
+    def admit(self, students):
+        tickets = [admission.Ticket(student.id) for student in students]
+        with self.captureOnCommitCallbacks(execute=True):
+            admission.admit_batch(self.hostel.id, tickets)
+        return tickets
+
+    def test_batch_is_admitted_with_one_write_of_each_kind(self):
+        with CaptureQueriesContext(connection) as queries:
+            tickets = self.admit(self.students[1:3])
+        self.assertEqual([t.outcome for t in tickets], [admission.APPLIED] * 2)
+        self.assertEqual(sorted(t.room_number for t in tickets), ["R001", "R002"])
+        self.assertEqual(
+            set(Allocation.objects.filter(hostel=self.hostel).values_list("student_id", "room_number")),
+            {(t.student_id, t.room_number) for t in tickets},
+        )
+        self.assertEqual(Hostel.objects.get(id=self.hostel.id).total_rooms, 0)
+        statements = [q["sql"] for q in queries]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "hostel_app_allocation"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "hostel_app_hostel"')]), 1)
+        self.assertEqual(ActivityLog.objects.filter(action="apply").count(), 2)
+
+    def test_allocated_students_and_overflow_are_turned_away(self):
+        students = [self.students[0], self.students[1], self.students[2], self.students[3], self.students[1]]
+        outcomes = [t.outcome for t in self.admit(students)]
+        self.assertEqual(
+            outcomes,
+            [admission.ALREADY_ALLOCATED, admission.APPLIED, admission.APPLIED, admission.FULL, admission.ALREADY_ALLOCATED],
+        )
+        self.assertFalse(Allocation.objects.filter(student=self.students[3]).exists())
+        self.assertEqual([t.outcome for t in self.admit([self.students[3]])], [admission.FULL])
+
+    def submit_concurrently(self, count):
+        batches = []
+
+        def admit_batch(hostel_id, tickets):
+            batches.append(len(tickets))
+            for ticket in tickets:
+                ticket.outcome = admission.APPLIED
+
+        with mock.patch.object(admission, "admit_batch", admit_batch):
+            threads = [threading.Thread(target=admission.submit, args=(student_id, -1)) for student_id in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        return batches
+
+    @override_settings(ADMISSION_BATCH_WINDOW_MS=200)
+    def test_concurrent_submits_share_one_batch(self):
+        self.assertEqual(self.submit_concurrently(5), [5])
+
+    @override_settings(ADMISSION_BATCH_WINDOW_MS=200, ADMISSION_MAX_BATCH=2)
+    def test_batches_are_capped(self):
+        self.assertEqual(self.submit_concurrently(5), [2, 2, 1])
+
+
+class MatchingTests(TestCase):
+    def test_students_take_their_best_hostel_with_room_in_priority_order(self):
+        a, b, c = 1, 2, 3
+        choices = {10: [a, b], 11: [a, b], 12: [a, c], 13: [b], 14: [c, a]}
+        result = matching.solve(choices, {a: 1, b: 2, c: 0}, [10, 11, 12, 13, 14])
+        self.assertEqual(result.assignments, {10: (a, 1), 11: (b, 2), 13: (b, 1)})
+        self.assertEqual(result.unmatched, [12, 14])
+        self.assertEqual(result.stats()["rank_histogram"], {1: 2, 2: 1})
+
+    def test_priority_is_earliest_submission_or_a_seeded_lottery(self):
+        now = timezone.now()
+        submitted = {10: now, 11: now - timedelta(minutes=1), 12: now}
+        self.assertEqual(matching.priority_order(submitted), [11, 10, 12])
+        self.assertEqual(matching.priority_order(submitted, seed=7), matching.priority_order(submitted, seed=7))
+
+    @override_settings(HOSTEL_PREFERENCE_WINDOW_CLOSES="")
+    def test_command_writes_the_match_within_capacity(self):
+        north = Hostel.objects.create(name="North", location="Campus", total_rooms=1)
+        south = Hostel.objects.create(name="South", location="Campus", total_rooms=1)
+        started = timezone.now() - timedelta(hours=1)
+        students = [CustomUser.objects.create(username=f"student{i}") for i in range(3)]
+        for i, student in enumerate(students):
+            HostelPreference.objects.bulk_create(
+                [
+                    HostelPreference(student=student, hostel=hostel, rank=rank, submitted_at=started + timedelta(minutes=i))
+                    for rank, hostel in enumerate((north, south), start=1)
+                ]
+            )
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("match_preferences", stdout=out)
+        self.assertIn("3 student(s): 2 matched, 1 unmatched", out.getvalue())
+        self.assertEqual(
+            set(Allocation.objects.values_list("student__username", "hostel__name", "room_number")),
+            {("student0", "North", "R001"), ("student1", "South", "R001")},
+        )
+        self.assertEqual(list(Hostel.objects.order_by("name").values_list("total_rooms", flat=True)), [0, 0])
+        self.assertEqual(counters.read()[0]["total_allocations"], 2)
+
+
+class ImportStudentsTests(TestCase):
+    def test_imported_students_log_in_and_duplicates_are_reported(self):
+        CustomUser.objects.create_user(username="current", password="old")
+        counters.recompute()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "students.csv")
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["username", "name", "password", "email", "adress", "phone_number"])
+            writer.writerow(["amina", "Amina", "first-pass", "amina@example.com", "Dodoma", "0700000001"])
+            writer.writerow(["baraka", "Baraka", "second-pass", "", "Arusha", "0700000002"])
+            writer.writerow(["amina", "Amina Again", "other", "", "", ""])
+            writer.writerow(["current", "Current", "new", "", "", ""])
+            writer.writerow(["nameless", "", "pw", "", "", ""])
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_students", path, "--workers", "2", "--chunk-size", "2", stdout=out)
+        self.assertIn("Skipped duplicate usernames: amina, current", out.getvalue())
+        self.assertIn("5 row(s)", out.getvalue())
+        self.assertIn("2 imported, 2 duplicate, 1 invalid", out.getvalue())
+
+        self.assertEqual(CustomUser.objects.get(username="amina").first_name, "Amina")
+        self.assertEqual(CustomUser.objects.get(username="baraka").email, "baraka")
+        self.assertTrue(self.client.login(username="amina", password="first-pass"))
+        self.assertTrue(self.client.login(username="baraka", password="second-pass"))
+        self.assertTrue(self.client.login(username="current", password="old"))
+        self.assertEqual(ActivityLog.objects.get().action, "import")
+        self.assertEqual(counters.read()[0], counters.compute())
+
+        report = os.path.join(directory.name, "duplicates.txt")
+        call_command("import_students", path, "--workers", "1", "--duplicates-report", report, stdout=StringIO())
+        with open(report, encoding="utf-8") as handle:
+            self.assertEqual(handle.read().split(), ["amina", "baraka", "amina", "current"])
+
+
+class AllocationUpsertTests(TestCase):
+    def test_create_replaces_the_students_allocation(self):
+        north = Hostel.objects.create(name="North", location="Campus", total_rooms=3)
+        south = Hostel.objects.create(name="South", location="Campus", total_rooms=3)
+        student = CustomUser.objects.create(username="amina")
+        first = Allocation.objects.create(student=student, hostel=north, room_number="R001")
+        second = Allocation.objects.create(student=student, hostel=south, room_number="R002")
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(list(Allocation.objects.values_list("hostel_id", "room_number")), [(south.id, "R002")])
+
+
+class RoomReservationTests(TestCase):
+    def test_free_places_are_used_before_rooms_are_added(self):
+        hostel = Hostel.objects.create(name="North", location="Campus", total_rooms=3)
+        Room.objects.filter(hostel=hostel, number=1).update(occupancy=1)
+        Room.objects.filter(hostel=hostel, number=3).update(capacity=2)
+        self.assertEqual(reserve_rooms(hostel.id, 4), ["R002", "R003", "R003", "R004"])
+        self.assertEqual(Room.objects.filter(hostel=hostel).count(), 4)
+        self.assertFalse(Room.objects.filter(hostel=hostel, occupancy__lt=F("capacity")).exists())
+
+
+class BulkRoomMoveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = Hostel.objects.create(name="North", location="Campus", total_rooms=7)
+        cls.south = Hostel.objects.create(name="South", location="Campus", total_rooms=10)
+        seed_rooms(cls.north.id, 10)
+        seed_rooms(cls.south.id, 10)
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        cls.allocations = []
+        for i in range(3):
+            student = CustomUser.objects.create(username=f"student{i}")
+            cls.allocations.append(Allocation.objects.create(student=student, hostel=cls.north, room_number=f"R00{i + 1}"))
+        Room.objects.filter(hostel=cls.north, number__lte=3).update(occupancy=1)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def post(self, data):
+        return self.client.post("/api/admin/allocations/rooms/", json.dumps(data), content_type="application/json")
+
+    def occupancy(self, hostel):
+        return dict(Room.objects.filter(hostel=hostel, occupancy__gt=0).values_list("number", "occupancy"))
+
+    def test_swap_rooms(self):
+        first, second, _ = self.allocations
+        response = self.post(
+            {"moves": [{"allocation_id": first.id, "room_number": "R002"}, {"allocation_id": second.id, "room_number": "1"}]}
+        )
+        self.assertEqual(response.json()["moved"], 2)
+        self.assertEqual(Allocation.objects.get(id=first.id).room_number, "R002")
+        self.assertEqual(Allocation.objects.get(id=second.id).room_number, "R001")
+        self.assertEqual(self.occupancy(self.north), {1: 1, 2: 1, 3: 1})
+
+    def test_conflict_changes_nothing(self):
+        logs = ActivityLog.objects.count()
+        response = self.post({"moves": [{"allocation_id": self.allocations[0].id, "room_number": "R003"}]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["conflicts"][0]["room_number"], "R003")
+        self.assertEqual(Allocation.objects.get(id=self.allocations[0].id).room_number, "R001")
+        self.assertEqual(ActivityLog.objects.count(), logs)
+
+    def test_rule_moves_block_to_other_hostel(self):
+        logs = ActivityLog.objects.count()
+        rule = {
+            "hostel_id": self.north.id,
+            "first_room": "R002",
+            "last_room": "R003",
+            "to_hostel_id": self.south.id,
+            "to_first_room": "R008",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post({"rule": rule})
+        self.assertEqual(response.json()["moved"], 2)
+        self.assertEqual(
+            sorted(Allocation.objects.filter(hostel=self.south).values_list("room_number", flat=True)), ["R008", "R009"]
+        )
+        self.assertEqual(self.occupancy(self.north), {1: 1})
+        self.assertEqual(self.occupancy(self.south), {8: 1, 9: 1})
+        self.assertEqual(Hostel.objects.get(id=self.north.id).total_rooms, 9)
+        self.assertEqual(Hostel.objects.get(id=self.south.id).total_rooms, 8)
+        self.assertEqual(ActivityLog.objects.count(), logs + 1)
+        moved = set(ChangeEvent.objects.filter(kind=changes.ALLOCATION).values_list("object_id", flat=True))
+        self.assertEqual(moved, {self.allocations[1].id, self.allocations[2].id})
+
+
+    def test_hostels_are_locked_before_rooms(self):
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def record(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "select_for_update", record):
+            self.post({"moves": [{"allocation_id": self.allocations[0].id, "room_number": "R005", "hostel_id": self.south.id}]})
+        self.assertLess(locked.index(Hostel), locked.index(Room))
+
+
+@override_settings(SUMMARY_FLUSH_INTERVAL=60)
+class SummaryCounterTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        counters.recompute()
+        self.stop_flushers(counters.pending)
+
+    def test_commits_are_summed_until_the_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Hostel.objects.create(name=f"Hostel {i}", location="Campus", total_rooms=1)
+        self.assertFalse([q for q in queries if "summarycounter" in q["sql"]])
+        self.assertEqual(counters.read()[0]["total_hostels"], 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            counters.pending.flush()
+        self.assertEqual(len([q for q in queries if q["sql"].startswith("UPDATE")]), 1)
+        self.assertEqual(SummaryCounter.objects.get(name="total_hostels").value, 3)
+        self.assertEqual(counters.read()[0], counters.compute())
+
+    def test_failed_flush_keeps_the_deltas(self):
+        counters.pending.add({"total_hostels": 2})
+        with mock.patch.object(counters.pending, "apply", side_effect=DatabaseError), self.assertLogs("hostel_app.deferred"):
+            self.assertEqual(counters.pending.flush(), 0)
+        self.assertEqual(counters.pending.pending(), {"total_hostels": 2})
+        counters.pending.flush()
+        self.assertEqual(SummaryCounter.objects.get(name="total_hostels").value, 2)
+
+
+class BulkUserDeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hostel = Hostel.objects.create(name="North", location="Campus", total_rooms=10)
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        cls.graduates = []
+        for i in range(5):
+            student = CustomUser.objects.create(username=f"graduate{i}")
+            Allocation.objects.create(student=student, hostel=cls.hostel, room_number=f"R00{i + 1}")
+            cls.graduates.append(student)
+        Allocation.objects.update(allocated_on=timezone.now() - timedelta(days=400))
+        cls.current = CustomUser.objects.create(username="current")
+        Allocation.objects.create(student=cls.current, hostel=cls.hostel, room_number="R006")
+        Room.objects.filter(hostel=cls.hostel, number__lte=6).update(occupancy=1)
+        Hostel.objects.filter(id=cls.hostel.id).update(total_rooms=4)
+        counters.recompute()
+
+    def test_command_deletes_in_batches_and_returns_places(self):
+        cutoff = (timezone.now() - timedelta(days=365)).date().isoformat()
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("delete_users", "--allocated-before", cutoff, "--batch-size", "2", stdout=out)
+        self.assertIn("Deleted 5 user(s) and 5 allocation(s), released 5 room(s)", out.getvalue())
+        self.assertEqual(list(CustomUser.objects.values_list("username", flat=True).order_by("username")), ["admin", "current"])
+        self.assertEqual(Hostel.objects.get(id=self.hostel.id).total_rooms, 9)
+        self.assertEqual(list(Room.objects.filter(occupancy__gt=0).values_list("number", flat=True)), [6])
+        self.assertEqual(counters.read()[0], counters.compute())
+        self.assertEqual(ChangeEvent.objects.filter(kind=changes.ALLOCATION, op=changes.DELETED).count(), 5)
+        self.assertEqual(ActivityLog.objects.get().action, "delete_users")
+
+    def test_api_never_deletes_the_caller(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            "/api/admin/users/delete/", json.dumps({"user_ids": [self.admin.id, self.current.id]}), content_type="application/json"
+        )
+        self.assertEqual(response.json()["users"], 1)
+        self.assertTrue(CustomUser.objects.filter(id=self.admin.id).exists())
+        self.assertEqual(self.client.post("/api/admin/users/delete/", "{}", content_type="application/json").status_code, 400)
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = Hostel.objects.create(name="North", location="Campus", total_rooms=10)
+        cls.south = Hostel.objects.create(name="South", location="Campus", total_rooms=10)
+        cls.admin = CustomUser.objects.create(username="admin", role="admin")
+        cls.students = [CustomUser.objects.create(username=f"student{i}") for i in range(6)]
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def post(self, path, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(path, json.dumps(data), content_type="application/json")
+
+    def day_stats(self):
+        return set(HostelDayStat.objects.filter(allocations__gt=0).values_list("hostel_id", "day", "allocations"))
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Allocation.objects.create(student=self.students[0], hostel=self.north, room_number="R001")
+        # Queryset updates bypass the rollups; the rebuild brings them back in step.
+        Allocation.objects.update(allocated_on=timezone.now() - timedelta(days=3))
+        rollups.rebuild_allocations()
+        with self.captureOnCommitCallbacks(execute=True):
+            # An existing allocation of the student is overwritten in place.
+            Allocation.objects.create(student=self.students[0], hostel=self.south, room_number="R002")
+        items = [{"student_id": student.id, "hostel_id": self.north.id} for student in self.students[1:4]]
+        self.post("/api/admin/allocations/bulk/", {"items": items})
+        moved = Allocation.objects.get(student=self.students[1])
+        self.post("/api/admin/allocations/rooms/", {"moves": [{"allocation_id": moved.id, "hostel_id": self.south.id, "room_number": "R009"}]})
+        self.post("/api/admin/users/delete/", {"user_ids": [self.students[2].id]})
+        with self.captureOnCommitCallbacks(execute=True):
+            Allocation.objects.filter(student=self.students[3]).delete()
+
+        incremental = self.day_stats()
+        today = timezone.localdate()
+        self.assertEqual(incremental, {(self.south.id, today, 2)})
+        rollups.rebuild_allocations(chunk_days=1)
+        self.assertEqual(self.day_stats(), incremental)
+
+    @override_settings(SUMMARY_FLUSH_INTERVAL=60)
+    def test_activity_hours_are_upserted_once_per_flush(self):
+        self.stop_flushers(counters.pending, rollups.activity)
+        with CaptureQueriesContext(connection) as queries:
+            for action in ("login", "login", "apply"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    ActivityLog.objects.create(user=self.admin, action=action)
+        self.assertFalse([q for q in queries if "activityhourstat" in q["sql"]])
+
+        with CaptureQueriesContext(connection) as queries:
+            rollups.activity.flush()
+        self.assertEqual(len([q for q in queries if "activityhourstat" in q["sql"]]), 1)
+        self.assertEqual(set(ActivityHourStat.objects.values_list("action", "entries")), {("login", 2), ("apply", 1)})
+
+    def test_activity_history_survives_archiving(self):
+        old = timezone.now() - timedelta(days=400)
+        with self.captureOnCommitCallbacks(execute=True):
+            for action in ("login", "login", "apply"):
+                ActivityLog.objects.create(user=self.admin, action=action, created_at=old)
+            ActivityLog.objects.create(user=self.admin, action="login")
+        self.assertEqual(ActivityHourStat.objects.get(action="login", hour=rollups.hour_of(old)).entries, 2)
+
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        counters.recompute()
+        with self.settings(ACTIVITY_LOG_ARCHIVE_DIR=archive_dir.name), self.captureOnCommitCallbacks(execute=True):
+            archive.archive_activity(timezone.now() - timedelta(days=200))
+        self.assertEqual(counters.read()[0]["total_activities"], ActivityLog.objects.count())
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(ActivityHourStat.objects.get(action="login", hour=rollups.hour_of(old)).entries, 2)
+        self.assertEqual(ActivityHourStat.objects.get(action="login", hour=rollups.hour_of(timezone.now())).entries, 1)
+
+        since = rollups.day_of(old)
+        response = self.client.get(f"/api/admin/analytics/?since={since}&until={since + timedelta(days=1)}").json()
+        self.assertEqual(
+            [(row["action"], row["entries"], row["total"]) for row in response["peak_hours"]], [("apply", 1, 1), ("login", 2, 2)]
+        )
+        self.assertEqual(self.client.get("/api/admin/analytics/?since=2020-01-01&until=2026-01-01").status_code, 400)
+
+
+class ActivityArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create(username="amina")
+        started = timezone.make_aware(datetime(2024, 3, 10, 12))
+        ActivityLog.objects.bulk_create(
+            [ActivityLog(user=cls.student, action="login", created_at=started + timedelta(minutes=i)) for i in range(6)]
+        )
+        cls.ids = list(ActivityLog.objects.order_by("id").values_list("id", flat=True))
+        cls.before = timezone.make_aware(datetime(2024, 4, 1))
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = archive.month_path(self.directory, 2024, 3)
+
+    def archived_ids(self):
+        return [entry["id"] for entry in archive.read(self.directory)]
+
+    def assert_whole_gzip_file(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as handle:
+            self.assertEqual({json.loads(line)["id"] for line in handle}, set(self.ids))
+
+    def test_crash_while_writing_a_batch_loses_nothing(self):
+        sync = archive._MonthWriters.sync
+        calls = []
+
+        def crash_on_second_batch(writers):
+            calls.append(1)
+            if len(calls) < 2:
+                return sync(writers)
+            for month, lines in writers.lines.items():
+                member = gzip.compress(b"".join(lines))
+                handle = writers._open(month)
+                handle.write(member[: len(member) // 2])
+                handle.flush()
+            raise RuntimeError("crash")
+
+        with mock.patch.object(archive._MonthWriters, "sync", crash_on_second_batch), self.assertRaises(RuntimeError):
+            archive.archive_activity(self.before, self.directory, batch_size=2)
+        self.assertEqual(ActivityLog.objects.count(), 4)
+        self.assertEqual(self.archived_ids(), self.ids[:2])
+
+        self.assertEqual(archive.archive_activity(self.before, self.directory, batch_size=2), {"2024-03": 4})
+        self.assertFalse(ActivityLog.objects.exists())
+        self.assertEqual(self.archived_ids(), self.ids)
+        self.assert_whole_gzip_file()
+        out = StringIO()
+        call_command("read_activity_archive", "--dir", self.directory, "--count", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "6")
+
+    def test_unfinished_member_of_an_older_run_stays_readable(self):
+        # Older runs kept one member open per month and only sync-flushed it after each batch.
+        lines = [
+            json.dumps({"id": pk, "user_id": None, "username": None, "action": "login", "details": "", "created_at": ""})
+            for pk in self.ids[:2]
+        ]
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(compressor.compress(("\n".join(lines) + "\n").encode()) + compressor.flush(zlib.Z_SYNC_FLUSH))
+        ActivityLog.objects.filter(id__in=self.ids[:2]).delete()
+        self.assertEqual(self.archived_ids(), self.ids[:2])
+
+        archive.archive_activity(self.before, self.directory)
+        self.assertEqual(self.archived_ids(), self.ids)
+        self.assert_whole_gzip_file()
+
+
+class ActivityBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create(username="amina")
+
+    def test_flush_keeps_when_each_entry_happened(self):
+        counters.recompute()
+        buffer = activity.ActivityBuffer(max_size=100)
+        self.stop_flushers(buffer)
+        started = timezone.now() - timedelta(minutes=5)
+        for i in range(3):
+            buffer.add(ActivityLog(user_id=self.student.id, action="login", details=str(i), created_at=started + timedelta(seconds=i)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(
+            list(ActivityLog.objects.order_by("details").values_list("created_at", flat=True)),
+            [started + timedelta(seconds=i) for i in range(3)],
+        )
+        self.assertEqual(counters.read()[0]["total_activities"], 3)
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_nothing_is_lost_past_the_size_threshold(self):
+        buffer = activity.ActivityBuffer(max_size=3, max_queue=10)
+        self.stop_flushers(buffer)
+        for i in range(2):
+            buffer.add(ActivityLog(user_id=self.student.id, action="login", details=str(i), created_at=timezone.now()))
+        self.assertFalse(buffer._wakeup.is_set())
+        for i in range(2, 7):
+            buffer.add(ActivityLog(user_id=self.student.id, action="login", details=str(i), created_at=timezone.now()))
+        # The flusher is woken at the threshold; entries added meanwhile wait for the same flush.
+        self.assertTrue(buffer._wakeup.is_set())
+        self.assertEqual(buffer.flush(), 7)
+        self.assertEqual(sorted(ActivityLog.objects.values_list("details", flat=True)), [str(i) for i in range(7)])
+        self.assertEqual(buffer.stats()["dropped"], 0)
+
+    @override_settings(ACTIVITY_LOG_MODE="buffered")
+    def test_buffered_log_writes_on_flush(self):
+        # The exit hook is this same flush.
+        self.stop_flushers(activity.buffer)
+        self.addCleanup(activity.buffer.flush)
+        activity.log(self.student, "login")
+        activity.log_many([(self.student.id, "apply", "North"), (None, "import", "2 rows")])
+        self.assertFalse(ActivityLog.objects.exists())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(activity.buffer.flush(), 3)
+        self.assertEqual(len([q for q in queries if q["sql"].startswith("INSERT")]), 1)
+        self.assertEqual(sorted(ActivityLog.objects.values_list("action", flat=True)), ["apply", "import", "login"])
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username="amina", password="pw")
+        Hostel.objects.bulk_create(
+            [Hostel(name=f"Hostel {i}", location="Main campus", total_rooms=3) for i in range(60)]
+        )
+
+    def test_large_json_is_gzipped_when_accepted(self):
+        self.client.force_login(self.student)
+        plain = self.client.get("/api/hostels/")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        packed = self.client.get("/api/hostels/", HTTP_ACCEPT_ENCODING="gzip;q=1, br;q=0")
+        self.assertEqual(packed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(packed.content), plain.content)
+        self.assertTrue(packed["ETag"].startswith("W/"))
+
+    def test_brotli_is_padded_like_gzip(self):
+        if compression.brotli is None:
+            self.skipTest("brotli is not installed")
+        body = json.dumps({"hostels": [f"Hostel {i}" for i in range(200)]}).encode()
+        sizes = set()
+        for _ in range(20):
+            packed = compression.compress(body, "br")
+            self.assertEqual(compression.brotli.decompress(packed), body)
+            sizes.add(len(packed))
+        self.assertGreater(len(sizes), 1)
+        streamed = b"".join(compression.compress_stream([body[:500], body[500:].decode()], "br"))
+        self.assertEqual(compression.brotli.decompress(streamed), body)
+
+    def test_small_responses_are_left_alone(self):
+        self.client.force_login(self.student)
+        response = self.client.get("/api/session/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_json_backends_agree(self):
+        payload = {"at": timezone.now(), "name": "Zanzibar ü", 1: [1.5, None]}
+        with override_settings(JSON_ENCODER="stdlib"):
+            stdlib = fastjson.dumps(payload)
+        self.assertTrue(stdlib.decode().startswith('{"at":"') and b'Z"' in stdlib)
+        if fastjson.orjson is not None:
+            self.assertEqual(fastjson._orjson_dumps(payload), stdlib)
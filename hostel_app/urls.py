@@ -1,18 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+_async = getattr(settings, "API_ASYNC_VIEWS", False)
+
 urlpatterns = [
-    path('api/session/', views.session_api, name='session_api'),
-    path('api/register/', views.register_api, name='register_api'),
-    path('api/login/', views.login_api, name='login_api'),
+    path('api/session/', views.asession_api if _async else views.session_api, name='session_api'),
+    path('api/health/', views.health_api, name='health_api'),
+    path('api/metrics/', views.metrics_api, name='metrics_api'),
+    path('api/register/', views.aregister_api if _async else views.register_api, name='register_api'),
+    path('api/login/', views.alogin_api if _async else views.login_api, name='login_api'),
     path('api/logout/', views.logout_api, name='logout_api'),
     path('api/hostels/', views.hostels_api, name='hostels_api'),
-    path('api/status/', views.allocation_status_api, name='allocation_status_api'),
+    path('api/hostels/<int:hostel_id>/rooms/', views.hostel_rooms_api, name='hostel_rooms_api'),
+    path('api/status/', views.aallocation_status_api if _async else views.allocation_status_api, name='allocation_status_api'),
+    path('api/status/stream/', views.allocation_events_api, name='allocation_events_api'),
     path('api/allocate/', views.allocate_hostel, name='allocate_api'),
-    path('api/dashboard/', views.dashboard_api, name='dashboard_api'),
+    path('api/preferences/', views.preferences_api, name='preferences_api'),
+    path('api/dashboard/', views.adashboard_api if _async else views.dashboard_api, name='dashboard_api'),
+    path('api/changes/', views.changes_api, name='changes_api'),
+    path('api/admin/analytics/', views.analytics_api, name='analytics_api'),
     path('api/admin/dashboard/', views.admin_dashboard_api, name='admin_dashboard_api'),
+    path('api/admin/users/delete/', views.admin_bulk_delete_users_api, name='admin_bulk_delete_users_api'),
     path('api/admin/users/<int:user_id>/delete/', views.admin_delete_user_api, name='admin_delete_user_api'),
     path('api/admin/allocations/<int:allocation_id>/room/', views.admin_update_room_api, name='admin_update_room_api'),
+    path('api/admin/allocations/rooms/', views.admin_bulk_update_rooms_api, name='admin_bulk_update_rooms_api'),
+    path('api/admin/allocations/bulk/', views.admin_bulk_allocate_api, name='admin_bulk_allocate_api'),
     path('api/export/allocations.csv', views.export_allocations_csv, name='export_allocations_csv'),
     path('', views.spa_page, name='spa_root'),
     path('register/', views.spa_page, name='register_page'),
@@ -1,13 +1,41 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout, get_user_model
-from .models import Hostel, Allocation, ActivityLog
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY, alogin, authenticate, login as auth_login, logout as auth_logout, get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+from .models import Hostel, Allocation, ActivityLog, HostelPreference
+from . import activity, admission, auth_cache, changes, counters, events, hostel_cache, matching, metrics, purge, rollups
+from .fastjson import JsonResponse
+from .rooms import (
+    availability,
+    claim_room,
+    claim_rooms,
+    format_room_number,
+    next_room_number,
+    overbooked_rooms,
+    parse_room_number,
+    release_rooms,
+    reserve_rooms,
+    return_places,
+)
 User = get_user_model()
-from django.db.models import F
+from django.db.models import F, Q
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
-from django.views.decorators.http import require_GET, require_POST
-from django.db import IntegrityError, OperationalError
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import never_cache
+from django.db import DatabaseError, IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date, parse_datetime
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, time, timedelta
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from collections import Counter
 import json
 import csv
 
@@ -20,33 +48,58 @@ def _effective_role(user):
     return "admin" if _is_admin_user(user) else "student"
 
 
-def _next_room_number(hostel):
-    numbers = (
-        Allocation.objects.filter(hostel=hostel)
-        .exclude(room_number__isnull=True)
-        .exclude(room_number__exact='')
-        .values_list("room_number", flat=True)
+SESSION_PROFILE_KEY = "_hostel_profile"
+SESSION_PROFILE_MAX_AGE = 300
+# Kept in the stored profile to check it is still current; never sent to the client.
+SESSION_PROFILE_CHECKS = ("checked_at", "auth_hash", "version")
+
+
+def _session_profile(user):
+    is_admin = _is_admin_user(user)
+    return {
+        "id": user.id,
+        "username": user.username,
+        "name": user.first_name,
+        "role": "admin" if is_admin else "student",
+        "is_admin": is_admin,
+        "checked_at": int(timezone.now().timestamp()),
+        "auth_hash": user.get_session_auth_hash(),
+        "version": auth_cache.user_version(user.id),
+    }
+
+
+def _profile_is_current(profile, user_id, session_hash, version):
+    # Same user, same password (session auth hash), no change to the user since, and recent enough.
+    return bool(
+        profile
+        and str(profile.get("id")) == str(user_id)
+        and session_hash
+        and constant_time_compare(str(profile.get("auth_hash", "")), session_hash)
+        and profile.get("version") == version
+        and timezone.now().timestamp() - profile.get("checked_at", 0) < SESSION_PROFILE_MAX_AGE
     )
-    max_number = 0
-    for value in numbers:
-        raw = str(value).strip().upper()
-        if raw.startswith("R"):
-            raw = raw[1:]
-        if raw.isdigit():
-            max_number = max(max_number, int(raw))
-    return f"R{max_number + 1:03d}"
+
+
+def _public_profile(profile):
+    return {key: value for key, value in profile.items() if key not in SESSION_PROFILE_CHECKS}
+
+
+def _login(request, user):
+    auth_login(request, user)
+    # Lets session_api answer from the session alone, without loading the user row.
+    request.session[SESSION_PROFILE_KEY] = _session_profile(user)
 
 
 def _log_activity(user, action, details=""):
     try:
-        ActivityLog.objects.create(user=user, action=action, details=details[:255])
+        activity.log(user, action, details)
     except Exception:
         pass
 
 
 def _latest_allocation_for_student(student):
     return (
-        Allocation.objects.select_related("hostel")
+        Allocation.objects.select_related("student", "hostel")
         .filter(student=student)
         .order_by("-allocated_on", "-id")
         .first()
@@ -74,7 +127,7 @@ def register_page(request):
             messages.error(request, 'Username already registered')
             return render(request, 'hostel_app/register.html')
         user = User.objects.create_user(username=username, email=username, password=password, first_name=name, role=role, adress=adress, phone_number=phone_number)
-        auth_login(request, user)
+        _login(request, user)
         return redirect('dashboard_page')
     return render(request, 'hostel_app/register.html')
 
@@ -88,7 +141,7 @@ def login_page(request):
             return render(request, 'hostel_app/login.html')
         user = authenticate(request, username=username, password=password)
         if user is not None:
-            auth_login(request, user)
+            _login(request, user)
             # If the user is staff/superuser, send them to the Django admin
             if _is_admin_user(user):
                 return redirect('admin:index')
@@ -139,17 +192,20 @@ def apply_page(request):
             messages.error(request, 'Selected hostel has no available rooms.')
             return render(request, 'hostel_app/apply.html', {"hostels": hostels})
 
-        # decrement total_rooms atomically to avoid race conditions
-        updated = Hostel.objects.filter(id=hostel.id, total_rooms__gt=0).update(total_rooms=F('total_rooms') - 1)
-        if not updated:
-            messages.error(request, 'Failed to reserve a room — it may have just filled up.')
-            return render(request, 'hostel_app/apply.html', {"hostels": hostels})
+        with transaction.atomic():
+            # decrement total_rooms atomically to avoid race conditions
+            updated = Hostel.objects.filter(id=hostel.id, total_rooms__gt=0).update(total_rooms=F('total_rooms') - 1)
+            if not updated:
+                messages.error(request, 'Failed to reserve a room — it may have just filled up.')
+                return render(request, 'hostel_app/apply.html', {"hostels": hostels})
+            hostel_cache.invalidate()
+            changes.record(changes.HOSTEL, changes.UPDATED, hostel.id)
 
-        # refresh hostel instance to reflect new count
-        hostel.refresh_from_db()
+            # refresh hostel instance to reflect new count
+            hostel.refresh_from_db()
 
-        # create an allocation record for this user
-        Allocation.objects.create(student=request.user, hostel=hostel, room_number='')
+            # create an allocation record for this user in the next free room
+            Allocation.objects.create(student=request.user, hostel=hostel, room_number=next_room_number(hostel.id))
         messages.success(request, f'Applied to {hostel.name}.')
         return redirect('allocation_status')
 
@@ -210,7 +266,7 @@ def register_api(request):
             adress=adress,
             phone_number=phone_number,
         )
-        auth_login(request, user)
+        _login(request, user)
         _log_activity(user, "register", "Registered account via frontend")
         return JsonResponse({"status": "success", "message": "Registered successfully"})
     except (IntegrityError, OperationalError):
@@ -235,7 +291,7 @@ def login_api(request):
         if user is None:
             return JsonResponse({"status": "error", "message": "Invalid credentials"}, status=401)
 
-        auth_login(request, user)
+        _login(request, user)
         _log_activity(user, "login", "Logged in via frontend")
         return JsonResponse(
             {
@@ -271,54 +327,335 @@ def logout_api(request):
 @require_GET
 def session_api(request):
     try:
+        # The profile stored at login answers most checks from the session and the cached
+        # user version; with a signed-cookie or cache session engine that is zero database
+        # queries. It is re-validated against the user row when the password or the user
+        # changed, and every SESSION_PROFILE_MAX_AGE seconds.
+        profile = request.session.get(SESSION_PROFILE_KEY)
+        user_id = request.session.get(SESSION_KEY)
+        if profile and user_id is not None and _profile_is_current(
+            profile, user_id, request.session.get(HASH_SESSION_KEY), auth_cache.user_version(user_id)
+        ):
+            return JsonResponse({"authenticated": True, "user": _public_profile(profile)})
+
         if not request.user.is_authenticated:
+            request.session.pop(SESSION_PROFILE_KEY, None)
             return JsonResponse({"authenticated": False})
 
-        return JsonResponse(
-            {
-                "authenticated": True,
-                "user": {
-                "id": request.user.id,
-                "username": request.user.username,
-                "name": request.user.first_name,
-                "role": _effective_role(request.user),
-                "is_admin": _is_admin_user(request.user),
-            },
-        }
-    )
+        profile = _session_profile(request.user)
+        request.session[SESSION_PROFILE_KEY] = profile
+        return JsonResponse({"authenticated": True, "user": _public_profile(profile)})
     except Exception:
         return JsonResponse({"authenticated": False})
 
 
+@never_cache
+@require_GET
+def health_api(request):
+    # For platform probes: no session, no CSRF cookie, one cheap round-trip to the database.
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        return JsonResponse({"status": "error", "database": "unavailable"}, status=503)
+    return JsonResponse({"status": "ok", "database": "ok"})
+
+
+@never_cache
+@require_GET
+def metrics_api(request):
+    if not metrics.is_enabled():
+        return JsonResponse({"status": "error", "message": "Metrics are disabled"}, status=404)
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not (token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")):
+        if not request.user.is_authenticated:
+            return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+        if not _is_admin_user(request.user):
+            return JsonResponse({"status": "error", "message": "Admin access required"}, status=403)
+
+    log_stats = activity.stats()
+    user_stats = auth_cache.users.stats()
+    gauges = {
+        "hostel_activity_log_queue_depth": ("Activity log entries waiting to be written.", log_stats["queue_depth"]),
+        "hostel_activity_log_flushed": ("Activity log entries written by the buffer.", log_stats["flushed"]),
+        "hostel_activity_log_dropped": ("Activity log entries dropped by the buffer.", log_stats["dropped"]),
+        "hostel_auth_user_cache_size": ("Users held by this process's auth cache.", user_stats["size"]),
+        "hostel_auth_user_cache_hits": ("Requests whose user came from this process's auth cache.", user_stats["hits"]),
+        "hostel_auth_user_cache_misses": ("Requests whose user was loaded from the database.", user_stats["misses"]),
+    }
+    return HttpResponse(metrics.render(gauges), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @require_GET
+@condition(etag_func=hostel_cache.etag, last_modified_func=hostel_cache.last_modified)
 def hostels_api(request):
     try:
-        hostels = list(Hostel.objects.values("id", "name", "location", "total_rooms"))
-        return JsonResponse({"status": "success", "hostels": hostels})
+        response = JsonResponse({"status": "success", "hostels": hostel_cache.hostel_list()})
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
     except OperationalError:
         return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
     except Exception:
         return JsonResponse({"status": "error", "message": "Failed to load hostels."}, status=400)
 
 
+@require_GET
+def hostel_rooms_api(request, hostel_id):
+    try:
+        if not request.user.is_authenticated:
+            return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+        hostel = Hostel.objects.filter(id=hostel_id).values("id", "name", "total_rooms").first()
+        if not hostel:
+            return JsonResponse({"status": "error", "message": "Hostel not found"}, status=404)
+        return JsonResponse({"status": "success", "hostel": hostel, **availability(hostel_id)})
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+    except Exception:
+        return JsonResponse({"status": "error", "message": "Failed to load rooms."}, status=400)
+
+
+def _allocation_status_payload(allocation):
+    if not allocation:
+        return None
+    return {
+        "hostel_name": allocation.hostel.name,
+        "room_number": allocation.room_number,
+        "allocated_on": allocation.allocated_on.isoformat(),
+    }
+
+
 @require_GET
 def allocation_status_api(request):
     try:
         if not request.user.is_authenticated:
             return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
 
+        # Read the version first so a change racing this request is still pushed to the stream.
+        version = events.allocation_version(request.user.id)
         allocation = _latest_allocation_for_student(request.user)
-        if not allocation:
-            return JsonResponse({"status": "success", "allocation": None})
+        return JsonResponse(
+            {
+                "status": "success",
+                "allocation": _allocation_status_payload(allocation),
+                "version": version,
+            }
+        )
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+    except Exception:
+        return JsonResponse({"status": "error", "message": "Failed to load allocation status."}, status=400)
+
+
+STATUS_STREAM_KEEPALIVE = 15.0
+STATUS_STREAM_MAX_AGE = 300.0
+STATUS_STREAM_WSGI_RETRY_MS = 15000
+
+
+def _sse_message(version, allocation):
+    data = json.dumps({"allocation": _allocation_status_payload(allocation), "version": version})
+    return f"id: {version}\nevent: allocation\ndata: {data}\n\n"
+
+
+async def _allocation_events(student_id, last_version):
+    loop = asyncio.get_running_loop()
+    started = last_sent = loop.time()
+    yield "retry: 3000\n\n"
+    poller = events.poller()
+    async with poller.watch(student_id) as changed:
+        # Read once after registering; from then on the shared poller says when to look again.
+        version = await events.aallocation_version(student_id)
+        while True:
+            if version > last_version:
+                last_version = version
+                allocation = await Allocation.objects.select_related("hostel").filter(student_id=student_id).afirst()
+                yield _sse_message(version, allocation)
+                last_sent = loop.time()
+            remaining = STATUS_STREAM_MAX_AGE - (loop.time() - started)
+            if remaining <= 0:
+                return
+            keepalive = STATUS_STREAM_KEEPALIVE - (loop.time() - last_sent)
+            try:
+                await asyncio.wait_for(changed.wait(), min(remaining, keepalive))
+            except TimeoutError:
+                if loop.time() - last_sent >= STATUS_STREAM_KEEPALIVE:
+                    yield ": keepalive\n\n"
+                    last_sent = loop.time()
+            changed.clear()
+            version = max(version, poller.version(student_id))
+
+
+@require_GET
+async def allocation_events_api(request):
+    """Server-sent events: one ``allocation`` message per committed change to the student's allocation.
+
+    Clients pass the ``version`` from ``/api/status/``; EventSource reconnects resume from
+    ``Last-Event-ID``. Under ASGI the connection stays open; under WSGI each request answers
+    once and asks the browser to reconnect later, so no worker is held open.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+
+    try:
+        last_version = int(request.headers.get("Last-Event-ID") or request.GET.get("version") or 0)
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "version must be a number"}, status=400)
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(_allocation_events(user.id, last_version), content_type="text/event-stream")
+    else:
+        body = f"retry: {STATUS_STREAM_WSGI_RETRY_MS}\n\n"
+        version = await events.aallocation_version(user.id)
+        if version > last_version:
+            allocation = await Allocation.objects.select_related("hostel").filter(student_id=user.id).afirst()
+            body += _sse_message(version, allocation)
+        response = HttpResponse(body, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ==== ASYNC API ====
+# With API_ASYNC_VIEWS the URLconf routes login, register, session, status and dashboard
+# here. Served by an ASGI server these wait on the database without holding a worker, and
+# password hashing runs in a bounded thread pool (hashlib releases the GIL while hashing).
+_password_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, "PASSWORD_HASH_WORKERS", 4), thread_name_prefix="password-hash"
+)
+
+
+async def _in_password_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_password_pool, func, *args)
+
+
+async def _aauthenticate(username, password):
+    user = await User.objects.filter(username=username).afirst()
+    if user is None:
+        # Hash anyway so unknown usernames take as long as wrong passwords, like ModelBackend.
+        await _in_password_pool(make_password, password)
+        return None
+    is_correct, must_update = await _in_password_pool(verify_password, password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if must_update:
+        user.password = await _in_password_pool(make_password, password)
+        await user.asave(update_fields=["password"])
+    user.backend = "django.contrib.auth.backends.ModelBackend"
+    return user
+
+
+async def _alogin(request, user):
+    await alogin(request, user)
+    await request.session.aset(SESSION_PROFILE_KEY, _session_profile(user))
+
+
+@csrf_exempt
+@require_POST
+async def alogin_api(request):
+    try:
+        data = _json_body(request)
+        if data is None:
+            return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+        username = (data.get('username') or '').strip()
+        password = data.get('password')
+        if not (username and password):
+            return JsonResponse({"status": "error", "message": "Username and password are required"}, status=400)
+
+        user = await _aauthenticate(username, password)
+        if user is None:
+            return JsonResponse({"status": "error", "message": "Invalid credentials"}, status=401)
+
+        await _alogin(request, user)
+        await sync_to_async(_log_activity)(user, "login", "Logged in via frontend")
+        return JsonResponse({"status": "success", "message": "Login success", "user": _dashboard_user(user)})
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+    except Exception:
+        return JsonResponse({"status": "error", "message": "Login failed unexpectedly."}, status=400)
+
+
+@csrf_exempt
+@require_POST
+async def aregister_api(request):
+    try:
+        data = _json_body(request)
+        if data is None:
+            return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
 
+        name = data.get('name', '').strip()
+        username = (data.get('username') or data.get('email') or '').strip()
+        password = data.get('password')
+        password2 = data.get('password2')
+        role = data.get('role', 'student')
+        adress = data.get('adress', '').strip()
+        phone_number = data.get('phone_number', '').strip()
+
+        if not (name and username and password):
+            return JsonResponse({"status": "error", "message": "Please fill all required fields"}, status=400)
+        if password2 is not None and password != password2:
+            return JsonResponse({"status": "error", "message": "Passwords do not match"}, status=400)
+        if await User.objects.filter(username=username).aexists():
+            return JsonResponse({"status": "error", "message": "Username already registered"}, status=409)
+
+        user = User(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(username),
+            first_name=name,
+            role=role,
+            adress=adress,
+            phone_number=phone_number,
+        )
+        user.password = await _in_password_pool(make_password, password)
+        await user.asave()
+        await _alogin(request, user)
+        await sync_to_async(_log_activity)(user, "register", "Registered account via frontend")
+        return JsonResponse({"status": "success", "message": "Registered successfully"})
+    except (IntegrityError, OperationalError):
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+    except Exception:
+        return JsonResponse({"status": "error", "message": "Registration failed unexpectedly."}, status=400)
+
+
+@ensure_csrf_cookie
+@require_GET
+async def asession_api(request):
+    try:
+        profile = await request.session.aget(SESSION_PROFILE_KEY)
+        user_id = await request.session.aget(SESSION_KEY)
+        if profile and user_id is not None and _profile_is_current(
+            profile, user_id, await request.session.aget(HASH_SESSION_KEY), await auth_cache.auser_version(user_id)
+        ):
+            return JsonResponse({"authenticated": True, "user": _public_profile(profile)})
+
+        current_user = await request.auser()
+        if not current_user.is_authenticated:
+            await request.session.apop(SESSION_PROFILE_KEY, None)
+            return JsonResponse({"authenticated": False})
+
+        profile = _session_profile(current_user)
+        await request.session.aset(SESSION_PROFILE_KEY, profile)
+        return JsonResponse({"authenticated": True, "user": _public_profile(profile)})
+    except Exception:
+        return JsonResponse({"authenticated": False})
+
+
+@require_GET
+async def aallocation_status_api(request):
+    try:
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+
+        version = await events.aallocation_version(user.id)
+        allocation = await (
+            Allocation.objects.select_related("hostel").filter(student_id=user.id).order_by("-allocated_on", "-id").afirst()
+        )
         return JsonResponse(
             {
                 "status": "success",
-                "allocation": {
-                    "hostel_name": allocation.hostel.name,
-                    "room_number": allocation.room_number,
-                    "allocated_on": allocation.allocated_on.isoformat(),
-                },
+                "allocation": _allocation_status_payload(allocation),
+                "version": version,
             }
         )
     except OperationalError:
@@ -327,6 +664,58 @@ def allocation_status_api(request):
         return JsonResponse({"status": "error", "message": "Failed to load allocation status."}, status=400)
 
 
+@require_GET
+async def adashboard_api(request):
+    try:
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+
+        # Read before the data so changes made while loading are replayed by /api/changes/.
+        version = await sync_to_async(changes.latest)()
+        hostels = await sync_to_async(hostel_cache.hostel_list)()
+        allocations_qs = Allocation.objects.select_related("student", "hostel").order_by("-allocated_on", "-id")
+        if _is_admin_user(user):
+            allocations = [_dashboard_allocation(allocation) async for allocation in allocations_qs]
+        else:
+            latest_allocation = await allocations_qs.filter(student_id=user.id).afirst()
+            allocations = [_dashboard_allocation(latest_allocation)] if latest_allocation else []
+
+        return JsonResponse(
+            {
+                "status": "success",
+                "user": _dashboard_user(user),
+                "hostels": hostels,
+                "allocations": allocations,
+                "version": version,
+            }
+        )
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+    except Exception:
+        return JsonResponse({"status": "error", "message": "Dashboard failed unexpectedly."}, status=400)
+
+
+def _batched_apply_response(user, hostel):
+    ticket = admission.submit(user.id, hostel.id)
+    if ticket.outcome == admission.APPLIED:
+        return JsonResponse(
+            {
+                "status": "success",
+                "message": f"Applied to {hostel.name}",
+                "room_number": ticket.room_number,
+            }
+        )
+    if ticket.outcome == admission.ALREADY_ALLOCATED:
+        return JsonResponse(
+            {"status": "error", "message": "You already have a hostel assigned or application."},
+            status=409,
+        )
+    if ticket.outcome == admission.FULL:
+        return JsonResponse({"status": "error", "message": "Selected hostel has no available rooms"}, status=409)
+    return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+
+
 @csrf_exempt
 @require_POST
 def allocate_hostel(request):
@@ -346,20 +735,30 @@ def allocate_hostel(request):
             hostel = Hostel.objects.filter(id=hostel_id).first()
             if not user or not hostel:
                 return JsonResponse({"status": "error", "message": "Invalid student or hostel"}, status=400)
-            resolved_room = (room_number or "").strip() or _next_room_number(hostel)
-            existing_allocations = Allocation.objects.filter(student=user).order_by("-allocated_on", "-id")
-
-            if existing_allocations.exists():
-                primary = existing_allocations.first()
-                primary.hostel = hostel
-                primary.room_number = resolved_room
-                primary.save(update_fields=["hostel", "room_number"])
-                removed_count = existing_allocations.exclude(id=primary.id).count()
-                if removed_count:
-                    existing_allocations.exclude(id=primary.id).delete()
-            else:
-                primary = Allocation.objects.create(student=user, hostel=hostel, room_number=resolved_room)
-                removed_count = 0
+            with transaction.atomic():
+                existing_allocations = list(
+                    Allocation.objects.filter(student=user).order_by("-allocated_on", "-id")
+                )
+                previous_rooms = [(a.hostel_id, a.room_number) for a in existing_allocations]
+                resolved_room = (room_number or "").strip()
+                if resolved_room:
+                    claim_room(hostel.id, resolved_room)
+                else:
+                    resolved_room = next_room_number(hostel.id)
+
+                if existing_allocations:
+                    primary = existing_allocations[0]
+                    primary.hostel = hostel
+                    primary.room_number = resolved_room
+                    primary.save(update_fields=["hostel", "room_number"])
+                    removed_count = len(existing_allocations) - 1
+                    if removed_count:
+                        Allocation.objects.filter(id__in=[a.id for a in existing_allocations[1:]]).delete()
+                else:
+                    primary = Allocation.objects.create(student=user, hostel=hostel, room_number=resolved_room)
+                    removed_count = 0
+
+                release_rooms(previous_rooms)
 
             _log_activity(
                 request.user,
@@ -375,20 +774,25 @@ def allocate_hostel(request):
         if not hostel:
             return JsonResponse({"status": "error", "message": "Selected hostel is invalid"}, status=400)
 
-        existing = _latest_allocation_for_student(request.user)
-        if existing:
+        if admission.is_batched():
+            return _batched_apply_response(request.user, hostel)
+
+        if Allocation.objects.filter(student=request.user).exists():
             return JsonResponse(
                 {"status": "error", "message": "You already have a hostel assigned or application."},
                 status=409,
             )
 
-        updated = Hostel.objects.filter(id=hostel.id, total_rooms__gt=0).update(total_rooms=F('total_rooms') - 1)
-        if not updated:
-            return JsonResponse({"status": "error", "message": "Selected hostel has no available rooms"}, status=409)
+        with transaction.atomic():
+            updated = Hostel.objects.filter(id=hostel.id, total_rooms__gt=0).update(total_rooms=F('total_rooms') - 1)
+            if not updated:
+                return JsonResponse({"status": "error", "message": "Selected hostel has no available rooms"}, status=409)
+            hostel_cache.invalidate()
+            changes.record(changes.HOSTEL, changes.UPDATED, hostel.id)
 
-        hostel.refresh_from_db()
-        resolved_room = _next_room_number(hostel)
-        Allocation.objects.create(student=request.user, hostel=hostel, room_number=resolved_room)
+            resolved_room = next_room_number(hostel.id)
+            # Checked above that there is no allocation to replace: insert without the upsert lookup.
+            Allocation(student=request.user, hostel=hostel, room_number=resolved_room).save(force_insert=True)
         _log_activity(request.user, "apply", f"Applied for {hostel.name} ({resolved_room})")
         return JsonResponse(
             {
@@ -402,53 +806,52 @@ def allocate_hostel(request):
     except Exception:
         return JsonResponse({"status": "error", "message": "Failed to apply hostel request."}, status=400)
 
+def _dashboard_allocation(allocation):
+    return {
+        "id": allocation.id,
+        "student": allocation.student.username,
+        "hostel": allocation.hostel.name,
+        "room_number": allocation.room_number,
+        "allocated_on": allocation.allocated_on.isoformat(),
+    }
+
+
+def _dashboard_user(user, is_admin=None):
+    if is_admin is None:
+        is_admin = _is_admin_user(user)
+    return {
+        "username": user.username,
+        "name": user.first_name,
+        "role": "admin" if is_admin else "student",
+        "is_admin": is_admin,
+    }
+
+
 @require_GET
 def dashboard_api(request):
     try:
         if not request.user.is_authenticated:
             return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
 
-        hostels = list(Hostel.objects.values("id", "name", "location", "total_rooms"))
+        # Read before the data so changes made while loading are replayed by /api/changes/.
+        version = changes.latest()
+        hostels = hostel_cache.hostel_list()
 
-        if _is_admin_user(request.user):
+        is_admin = _is_admin_user(request.user)
+        if is_admin:
             allocations_qs = Allocation.objects.select_related("student", "hostel").order_by("-allocated_on", "-id")
-            allocations = [
-                {
-                    "id": allocation.id,
-                    "student": allocation.student.username,
-                    "hostel": allocation.hostel.name,
-                    "room_number": allocation.room_number,
-                    "allocated_on": allocation.allocated_on.isoformat(),
-                }
-                for allocation in allocations_qs
-            ]
+            allocations = [_dashboard_allocation(allocation) for allocation in allocations_qs]
         else:
             latest_allocation = _latest_allocation_for_student(request.user)
-            allocations = (
-                [
-                    {
-                        "id": latest_allocation.id,
-                        "student": latest_allocation.student.username,
-                        "hostel": latest_allocation.hostel.name,
-                        "room_number": latest_allocation.room_number,
-                        "allocated_on": latest_allocation.allocated_on.isoformat(),
-                    }
-                ]
-                if latest_allocation
-                else []
-            )
+            allocations = [_dashboard_allocation(latest_allocation)] if latest_allocation else []
 
         return JsonResponse(
             {
                 "status": "success",
-                "user": {
-                "username": request.user.username,
-                "name": request.user.first_name,
-                "role": _effective_role(request.user),
-                "is_admin": _is_admin_user(request.user),
-            },
-            "hostels": hostels,
-            "allocations": allocations,
+                "user": _dashboard_user(request.user, is_admin),
+                "hostels": hostels,
+                "allocations": allocations,
+                "version": version,
             }
         )
     except OperationalError:
@@ -457,34 +860,203 @@ def dashboard_api(request):
         return JsonResponse({"status": "error", "message": "Dashboard failed unexpectedly."}, status=400)
 
 
+def _preferences_payload(student):
+    opens, closes = matching.preference_window()
+    choices = HostelPreference.objects.filter(student=student).select_related("hostel").order_by("rank")
+    return {
+        "status": "success",
+        "preferences": [
+            {"rank": choice.rank, "hostel_id": choice.hostel_id, "hostel_name": choice.hostel.name}
+            for choice in choices
+        ],
+        "window": {
+            "opens": opens.isoformat() if opens else None,
+            "closes": closes.isoformat() if closes else None,
+            "is_open": matching.preference_window_open(),
+        },
+    }
+
+
+@csrf_exempt
+def preferences_api(request):
+    try:
+        if not request.user.is_authenticated:
+            return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+        if request.method == "GET":
+            return JsonResponse(_preferences_payload(request.user))
+        if request.method != "POST":
+            return JsonResponse({"status": "error", "message": "Method not allowed"}, status=405)
+
+        if _is_admin_user(request.user):
+            return JsonResponse({"status": "error", "message": "Only students submit preferences"}, status=403)
+        if not matching.preference_window_open():
+            return JsonResponse({"status": "error", "message": "The preference window is closed"}, status=409)
+
+        data = _json_body(request)
+        hostel_ids = data.get("hostel_ids") if isinstance(data, dict) else None
+        if not isinstance(hostel_ids, list) or not all(isinstance(value, int) for value in hostel_ids):
+            return JsonResponse({"status": "error", "message": "hostel_ids must be a list of hostel ids"}, status=400)
+        if len(set(hostel_ids)) != len(hostel_ids):
+            return JsonResponse({"status": "error", "message": "Each hostel may be ranked once"}, status=400)
+        if len(hostel_ids) > settings.HOSTEL_PREFERENCE_MAX_CHOICES:
+            return JsonResponse(
+                {"status": "error", "message": f"Rank at most {settings.HOSTEL_PREFERENCE_MAX_CHOICES} hostels"},
+                status=400,
+            )
+        if Hostel.objects.filter(id__in=hostel_ids).count() != len(hostel_ids):
+            return JsonResponse({"status": "error", "message": "Unknown hostel in preferences"}, status=400)
+
+        with transaction.atomic():
+            previous = HostelPreference.objects.filter(student=request.user)
+            # Priority follows the first submission, so revising a ranking does not lose a student's place.
+            submitted_at = previous.order_by("submitted_at").values_list("submitted_at", flat=True).first()
+            submitted_at = submitted_at or timezone.now()
+            previous.delete()
+            HostelPreference.objects.bulk_create(
+                [
+                    HostelPreference(student=request.user, hostel_id=hostel_id, rank=rank, submitted_at=submitted_at)
+                    for rank, hostel_id in enumerate(hostel_ids, start=1)
+                ]
+            )
+        _log_activity(request.user, "preferences", f"Ranked {len(hostel_ids)} hostel(s)")
+        return JsonResponse(_preferences_payload(request.user))
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+    except Exception:
+        return JsonResponse({"status": "error", "message": "Failed to save preferences."}, status=400)
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    # csv.writer target that hands each formatted row straight back to the caller.
+    def write(self, value):
+        return value
+
+
+def _parse_day(value):
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _allocation_csv_rows(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(["ID", "Student", "Hostel", "Room", "Allocated On"])
+    for allocation_id, username, hostel_name, room_number, allocated_on in rows:
+        yield writer.writerow([allocation_id, username, hostel_name, room_number or "", allocated_on.isoformat()])
+
+
 @require_GET
 def export_allocations_csv(request):
     if not request.user.is_authenticated:
         return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
 
-    if _is_admin_user(request.user):
-        allocations_qs = Allocation.objects.select_related("student", "hostel").order_by("-allocated_on")
-    else:
-        allocations_qs = Allocation.objects.select_related("student", "hostel").filter(student=request.user).order_by("-allocated_on")
-
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="allocations_report.csv"'
+    allocations_qs = Allocation.objects.all()
+    if not _is_admin_user(request.user):
+        allocations_qs = allocations_qs.filter(student=request.user)
 
-    writer = csv.writer(response)
-    writer.writerow(["ID", "Student", "Hostel", "Room", "Allocated On"])
-    for allocation in allocations_qs:
-        writer.writerow(
-            [
-                allocation.id,
-                allocation.student.username,
-                allocation.hostel.name,
-                allocation.room_number or "",
-                allocation.allocated_on.isoformat(),
-            ]
+    hostel_id = request.GET.get("hostel")
+    try:
+        date_from = _parse_day(request.GET.get("from"))
+        date_to = _parse_day(request.GET.get("to"))
+        if hostel_id:
+            allocations_qs = allocations_qs.filter(hostel_id=int(hostel_id))
+    except ValueError:
+        return JsonResponse(
+            {"status": "error", "message": "hostel must be an id and from/to must be YYYY-MM-DD dates"},
+            status=400,
         )
+    if date_from:
+        allocations_qs = allocations_qs.filter(allocated_on__gte=date_from)
+    if date_to:
+        allocations_qs = allocations_qs.filter(allocated_on__lt=date_to + timedelta(days=1))
+
+    rows = (
+        allocations_qs.order_by("-allocated_on", "-id")
+        .values_list("id", "student__username", "hostel__name", "room_number", "allocated_on")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    response = StreamingHttpResponse(_allocation_csv_rows(rows), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="allocations_report.csv"'
     return response
 
 
+ADMIN_PAGE_SIZE = 50
+ADMIN_PAGE_SIZE_MAX = 200
+
+
+def _encode_cursor(values):
+    # Full-precision isoformat: DjangoJSONEncoder would truncate microseconds and skip rows.
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(raw, parse_key):
+    try:
+        key, last_id = json.loads(urlsafe_b64decode(raw.encode()))
+        key = parse_key(key)
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if key is None:
+        raise ValueError("Invalid cursor")
+    return key, last_id
+
+
+def _keyset_page(queryset, fields, key, cursor, limit, descending=False, parse_key=str):
+    # Orders by (key, id) and resumes strictly after the cursor row, so each page is an index range scan.
+    if cursor:
+        key_value, last_id = _decode_cursor(cursor, parse_key)
+        if descending:
+            queryset = queryset.filter(Q(**{f"{key}__lt": key_value}) | Q(**{key: key_value, "id__lt": last_id}))
+        else:
+            queryset = queryset.filter(Q(**{f"{key}__gt": key_value}) | Q(**{key: key_value, "id__gt": last_id}))
+
+    ordering = (f"-{key}", "-id") if descending else (key, "id")
+    rows = list(queryset.order_by(*ordering).values(*dict.fromkeys(("id", key, *fields)))[: limit + 1])
+    next_cursor = _encode_cursor([rows[limit - 1][key], rows[limit - 1]["id"]]) if len(rows) > limit else None
+    return [{field: row[field] for field in ("id", *fields)} for row in rows[:limit]], next_cursor
+
+
+def _admin_users_page(params, fields, limit):
+    queryset = User.objects.all()
+    if params.get("role"):
+        queryset = queryset.filter(role=params["role"])
+    if params.get("search"):
+        queryset = queryset.filter(Q(username__icontains=params["search"]) | Q(first_name__icontains=params["search"]))
+    return _keyset_page(queryset, fields, "username", params.get("cursor"), limit)
+
+
+def _admin_allocations_page(params, fields, limit):
+    queryset = Allocation.objects.all()
+    if params.get("hostel"):
+        queryset = queryset.filter(hostel_id=int(params["hostel"]))
+    if params.get("student"):
+        queryset = queryset.filter(student__username__icontains=params["student"])
+    return _keyset_page(queryset, fields, "allocated_on", params.get("cursor"), limit, descending=True, parse_key=parse_datetime)
+
+
+def _admin_activities_page(params, fields, limit):
+    queryset = ActivityLog.objects.all()
+    if params.get("action"):
+        queryset = queryset.filter(action=params["action"])
+    if params.get("user"):
+        queryset = queryset.filter(user__username__icontains=params["user"])
+    return _keyset_page(queryset, fields, "created_at", params.get("cursor"), limit, descending=True, parse_key=parse_datetime)
+
+
+ADMIN_DASHBOARD_SECTIONS = {
+    "users": (_admin_users_page, ("username", "first_name", "role", "is_staff")),
+    "allocations": (_admin_allocations_page, ("student__username", "hostel__name", "room_number", "allocated_on")),
+    "activities": (_admin_activities_page, ("user__username", "action", "details", "created_at")),
+}
+
+
 @require_GET
 def admin_dashboard_api(request):
     if not request.user.is_authenticated:
@@ -492,35 +1064,133 @@ def admin_dashboard_api(request):
     if not _is_admin_user(request.user):
         return JsonResponse({"status": "error", "message": "Admin access required"}, status=403)
 
-    users = list(
-        User.objects.values("id", "username", "first_name", "role", "is_staff").order_by("username")
-    )
-    allocations = list(
-        Allocation.objects.select_related("student", "hostel")
-        .values("id", "student__username", "hostel__name", "room_number", "allocated_on")
-        .order_by("-allocated_on")
-    )
-    activities = list(
-        ActivityLog.objects.select_related("user")
-        .values("id", "user__username", "action", "details", "created_at")
-        .order_by("-created_at")[:200]
-    )
+    # ?section=users|allocations|activities pages through one table; without it the first page of each is returned.
+    section = request.GET.get("section")
+    if section and section not in ADMIN_DASHBOARD_SECTIONS:
+        return JsonResponse({"status": "error", "message": "Unknown section"}, status=400)
+    sections = [section] if section else list(ADMIN_DASHBOARD_SECTIONS)
+
+    try:
+        limit = min(max(int(request.GET.get("limit") or ADMIN_PAGE_SIZE), 1), ADMIN_PAGE_SIZE_MAX)
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "limit must be a number"}, status=400)
+    if request.GET.get("cursor") and not section:
+        return JsonResponse({"status": "error", "message": "cursor requires a section"}, status=400)
+    requested_fields = {field.strip() for field in request.GET.get("fields", "").split(",") if field.strip()}
+
+    payload = {"status": "success", "next_cursors": {}, "version": changes.latest()}
+    try:
+        for name in sections:
+            load_page, default_fields = ADMIN_DASHBOARD_SECTIONS[name]
+            fields = tuple(field for field in default_fields if field in requested_fields) or default_fields
+            payload[name], payload["next_cursors"][name] = load_page(request.GET, fields, limit)
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "Invalid cursor or filter"}, status=400)
+
+    if not section:
+        payload["summary"], payload["summary_as_of"] = counters.read()
+        payload["activity_log"] = activity.stats()
+    return JsonResponse(payload)
+
+
+CHANGE_FEED_PAGE_SIZE = 500
+CHANGE_FEED_PAGE_SIZE_MAX = 2000
+CHANGE_FEED_SHAPES = {
+    changes.HOSTEL: (Hostel, ("name", "location", "total_rooms")),
+    changes.ALLOCATION: (Allocation, ADMIN_DASHBOARD_SECTIONS["allocations"][1]),
+    changes.USER: (User, ADMIN_DASHBOARD_SECTIONS["users"][1]),
+}
+
+
+@require_GET
+def changes_api(request):
+    """Hostels, allocations and users created, updated or deleted after ``?since=<version>``.
+
+    Start from the ``version`` of /api/dashboard/ or /api/admin/dashboard/. Changed rows come
+    back in the admin dashboard shapes (hostels as in /api/hostels/) and ``deleted`` lists ids
+    that are gone. Poll again with the returned ``version`` while ``has_more`` is true;
+    ``reset`` means the version is too old to replay and the client should reload.
+    Students only see hostels and their own rows.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+    try:
+        since = max(int(request.GET.get("since") or 0), 0)
+        limit = min(max(int(request.GET.get("limit") or CHANGE_FEED_PAGE_SIZE), 1), CHANGE_FEED_PAGE_SIZE_MAX)
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "since and limit must be numbers"}, status=400)
+
+    is_admin = _is_admin_user(request.user)
+    try:
+        feed, version, reset = changes.feed(since, limit, owner_id=None if is_admin else request.user.id)
+        payload = {"status": "success", "since": since, "version": version, "reset": reset, "has_more": len(feed) == limit}
+        if reset:
+            return JsonResponse(payload)
+
+        # Only the last change to each row matters; live rows are loaded with one query per kind.
+        last_op = {(event["kind"], event["object_id"]): event["op"] for event in feed}
+        payload["deleted"] = {}
+        for kind, (model, fields) in CHANGE_FEED_SHAPES.items():
+            live = [object_id for (k, object_id), op in last_op.items() if k == kind and op != changes.DELETED]
+            rows = list(model.objects.filter(id__in=live).order_by("id").values("id", *fields)) if live else []
+            found = {row["id"] for row in rows}
+            payload[f"{kind}s"] = rows
+            payload["deleted"][f"{kind}s"] = sorted(
+                object_id for (k, object_id), op in last_op.items() if k == kind and object_id not in found
+            )
+        if is_admin and feed:
+            payload["summary"], payload["summary_as_of"] = counters.read()
+        return JsonResponse(payload)
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
 
-    return JsonResponse(
-        {
-            "status": "success",
-            "summary": {
-                "total_users": User.objects.count(),
-                "total_students": User.objects.filter(role="student").count(),
-                "total_hostels": Hostel.objects.count(),
-                "total_allocations": Allocation.objects.count(),
-                "total_activities": ActivityLog.objects.count(),
-            },
-            "users": users,
-            "allocations": allocations,
-            "activities": activities,
-        }
-    )
+
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+
+
+@require_GET
+def analytics_api(request):
+    """Occupancy per hostel, allocations per day and activity per day with peak hours.
+
+    ``?since=`` and ``?until=`` (YYYY-MM-DD, inclusive) default to the last 30 days;
+    ``?hostel_id=`` narrows allocations per day. Everything but occupancy is read from
+    the rollup tables, so the cost follows the range asked for, not the history kept.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+    if not _is_admin_user(request.user):
+        return JsonResponse({"status": "error", "message": "Admin access required"}, status=403)
+
+    try:
+        until, since = _parse_day(request.GET.get("until")), _parse_day(request.GET.get("since"))
+        until = timezone.localdate(until) if until else timezone.localdate()
+        since = timezone.localdate(since) if since else until - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+        hostel_id = int(request.GET["hostel_id"]) if request.GET.get("hostel_id") else None
+    except ValueError:
+        return JsonResponse(
+            {"status": "error", "message": "since and until must be YYYY-MM-DD dates, hostel_id a number"}, status=400
+        )
+    if since > until or (until - since).days >= ANALYTICS_MAX_DAYS:
+        return JsonResponse(
+            {"status": "error", "message": f"since must be on or before until, at most {ANALYTICS_MAX_DAYS} days apart"},
+            status=400,
+        )
+
+    try:
+        return JsonResponse(
+            {
+                "status": "success",
+                "since": since,
+                "until": until,
+                "occupancy": rollups.occupancy(),
+                "allocations_per_day": rollups.allocations_per_day(since, until, hostel_id),
+                "activity_per_day": rollups.activity_per_day(since, until),
+                "peak_hours": rollups.peak_hours(since, until),
+            }
+        )
+    except OperationalError:
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
 
 
 @csrf_exempt
@@ -538,18 +1208,70 @@ def admin_delete_user_api(request, user_id):
     if target.id == request.user.id:
         return JsonResponse({"status": "error", "message": "Huwezi kujifuta mwenyewe"}, status=400)
 
-    allocations = list(Allocation.objects.select_related("hostel").filter(student=target))
-    for allocation in allocations:
-        if allocation.hostel_id:
-            Hostel.objects.filter(id=allocation.hostel_id).update(total_rooms=F("total_rooms") + 1)
-
     username = target.username
-    target.delete()
-    _log_activity(request.user, "allocate", f"Deleted user {username} and released {len(allocations)} room(s)")
+    with transaction.atomic():
+        rooms = list(Allocation.objects.filter(student=target).values_list("hostel_id", "room_number"))
+        return_places(Counter(hostel_id for hostel_id, _ in rooms if hostel_id))
+        target.delete()
+        release_rooms(rooms)
+    _log_activity(request.user, "allocate", f"Deleted user {username} and released {len(rooms)} room(s)")
 
     return JsonResponse({"status": "success", "message": f"User {username} deleted"})
 
 
+BULK_DELETE_MAX_IDS = 10000
+
+
+@csrf_exempt
+@require_POST
+def admin_bulk_delete_users_api(request):
+    """Delete users chosen by ``user_ids``, ``role`` and/or ``allocated_before`` (YYYY-MM-DD), in batches."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+    if not _is_admin_user(request.user):
+        return JsonResponse({"status": "error", "message": "Admin access required"}, status=403)
+
+    data = _json_body(request)
+    if not isinstance(data, dict):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    user_ids = data.get("user_ids") or []
+    role = data.get("role") or None
+    try:
+        if not isinstance(user_ids, list):
+            raise ValueError(user_ids)
+        user_ids = [int(user_id) for user_id in user_ids]
+        allocated_before = _parse_day(data.get("allocated_before"))
+    except (TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "user_ids must be a list of integers and allocated_before a YYYY-MM-DD date"},
+            status=400,
+        )
+    if len(user_ids) > BULK_DELETE_MAX_IDS:
+        return JsonResponse({"status": "error", "message": f"At most {BULK_DELETE_MAX_IDS} user_ids per request"}, status=400)
+    if role not in (None, "student", "admin"):
+        return JsonResponse({"status": "error", "message": "role must be student or admin"}, status=400)
+
+    try:
+        users = purge.select_users(user_ids, role, allocated_before, exclude_ids=[request.user.id])
+    except ValueError as exc:
+        return JsonResponse({"status": "error", "message": str(exc)}, status=400)
+
+    try:
+        if data.get("dry_run"):
+            return JsonResponse({"status": "success", "dry_run": True, "users": users.count()})
+        totals = purge.delete_users(users)
+    except (IntegrityError, OperationalError):
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+
+    _log_activity(
+        request.user,
+        "delete_users",
+        f"Bulk deleted {totals['users']} user(s) and released {totals['rooms_released']} room(s)",
+    )
+    return JsonResponse({"status": "success", "message": f"Deleted {totals['users']} user(s)", **totals})
+
+
 @csrf_exempt
 @require_POST
 def admin_update_room_api(request, allocation_id):
@@ -571,13 +1293,20 @@ def admin_update_room_api(request, allocation_id):
         return JsonResponse({"status": "error", "message": "Allocation not found"}, status=404)
 
     old_room = allocation.room_number or "-"
-    allocation.room_number = room_number
-    allocation.save(update_fields=["room_number"])
+    with transaction.atomic():
+        claim_room(allocation.hostel_id, room_number)
+        allocation.room_number = room_number
+        allocation.save(update_fields=["room_number"])
+
+        duplicate_allocations = list(Allocation.objects.filter(student=allocation.student).exclude(id=allocation.id))
+        removed_count = len(duplicate_allocations)
+        if removed_count:
+            Allocation.objects.filter(id__in=[a.id for a in duplicate_allocations]).delete()
 
-    duplicate_allocations = Allocation.objects.filter(student=allocation.student).exclude(id=allocation.id)
-    removed_count = duplicate_allocations.count()
-    if removed_count:
-        duplicate_allocations.delete()
+        # The new room was claimed above, so the old place is given back even when the label is unchanged.
+        released = [(a.hostel_id, a.room_number) for a in duplicate_allocations]
+        released.append((allocation.hostel_id, old_room))
+        release_rooms(released)
 
     _log_activity(
         request.user,
@@ -598,3 +1327,306 @@ def admin_update_room_api(request, allocation_id):
             },
         }
     )
+
+
+BULK_ALLOCATION_MAX_ITEMS = 10000
+
+
+def _parse_bulk_allocation_items(items):
+    # Returns (parsed, results): parsed holds valid (index, student_id, hostel_id, room) tuples,
+    # results holds one dict per item, pre-filled with errors for malformed ones.
+    parsed = []
+    results = []
+    seen_students = set()
+    for index, item in enumerate(items):
+        result = {"index": index, "status": "error"}
+        results.append(result)
+        if not isinstance(item, dict):
+            result["message"] = "Item must be an object"
+            continue
+        try:
+            student_id = int(item.get("student_id"))
+            hostel_id = int(item.get("hostel_id"))
+        except (TypeError, ValueError):
+            result["message"] = "student_id and hostel_id must be integers"
+            continue
+        result["student_id"] = student_id
+        result["hostel_id"] = hostel_id
+        if student_id in seen_students:
+            result["message"] = "Student appears more than once in this request"
+            continue
+        seen_students.add(student_id)
+        parsed.append((index, student_id, hostel_id, str(item.get("room_number") or "").strip()))
+    return parsed, results
+
+
+@csrf_exempt
+@require_POST
+def admin_bulk_allocate_api(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+    if not _is_admin_user(request.user):
+        return JsonResponse({"status": "error", "message": "Admin access required"}, status=403)
+
+    data = _json_body(request)
+    if not isinstance(data, dict):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        return JsonResponse({"status": "error", "message": "items must be a non-empty list"}, status=400)
+    if len(items) > BULK_ALLOCATION_MAX_ITEMS:
+        return JsonResponse(
+            {"status": "error", "message": f"At most {BULK_ALLOCATION_MAX_ITEMS} items per request"},
+            status=400,
+        )
+
+    parsed, results = _parse_bulk_allocation_items(items)
+
+    try:
+        with transaction.atomic():
+            students = User.objects.in_bulk({student_id for _, student_id, _, _ in parsed})
+            hostels = Hostel.objects.in_bulk({hostel_id for _, _, hostel_id, _ in parsed})
+
+            valid = []
+            for index, student_id, hostel_id, room in parsed:
+                if student_id not in students or hostel_id not in hostels:
+                    results[index]["message"] = "Invalid student or hostel"
+                    continue
+                valid.append((index, student_id, hostel_id, room))
+
+            existing = {}
+            for allocation in Allocation.objects.filter(
+                student_id__in=[student_id for _, student_id, _, _ in valid]
+            ).order_by("student_id", "-allocated_on", "-id"):
+                existing.setdefault(allocation.student_id, []).append(allocation)
+            previous_rooms = [(a.hostel_id, a.room_number) for rows in existing.values() for a in rows]
+
+            claim_rooms((hostel_id, room) for _, _, hostel_id, room in valid if room)
+            needed = {}
+            for _, _, hostel_id, room in valid:
+                if not room:
+                    needed[hostel_id] = needed.get(hostel_id, 0) + 1
+            reserved = {hostel_id: iter(reserve_rooms(hostel_id, count)) for hostel_id, count in needed.items()}
+
+            to_create, to_update, to_delete, logs = [], [], [], []
+            for index, student_id, hostel_id, room in valid:
+                resolved_room = room or next(reserved[hostel_id])
+                rows = existing.get(student_id)
+                if rows:
+                    primary = rows[0]
+                    primary.hostel_id = hostel_id
+                    primary.room_number = resolved_room
+                    to_update.append(primary)
+                    to_delete.extend(a.id for a in rows[1:])
+                else:
+                    to_create.append(Allocation(student_id=student_id, hostel_id=hostel_id, room_number=resolved_room))
+                logs.append(
+                    ActivityLog(
+                        user=request.user,
+                        action="allocate",
+                        details=f"Bulk allocated {students[student_id].username} to {hostels[hostel_id].name} ({resolved_room})"[:255],
+                    )
+                )
+                results[index].update({"status": "success", "room_number": resolved_room})
+
+            if to_delete:
+                Allocation.objects.filter(id__in=to_delete).delete()
+            Allocation.objects.bulk_update(to_update, ["hostel", "room_number"], batch_size=1000)
+            Allocation.objects.bulk_create(to_create, batch_size=1000)
+            release_rooms(previous_rooms)
+            ActivityLog.objects.bulk_create(logs, batch_size=1000)
+            # bulk_create/bulk_update skip post_save, so counters, rollups and the change feed (which drives status streams) are updated here.
+            counters.bump("total_allocations", len(to_create))
+            counters.bump("total_activities", len(logs))
+            rollups.count_allocations((a.hostel_id, a.allocated_on) for a in to_create)
+            rollups.count_moves(to_update)
+            rollups.count_activity((log.action, log.created_at) for log in logs)
+            changes.record_many(changes.ALLOCATION, changes.UPDATED, [(a.pk, a.student_id) for a in to_update])
+            changes.record_many(changes.ALLOCATION, changes.CREATED, [(a.pk, a.student_id) for a in to_create])
+    except (IntegrityError, OperationalError):
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+
+    allocated = sum(1 for result in results if result["status"] == "success")
+    return JsonResponse(
+        {
+            "status": "success",
+            "message": f"Allocated {allocated} of {len(items)} student(s)",
+            "allocated": allocated,
+            "failed": len(items) - allocated,
+            "results": results,
+        }
+    )
+
+
+def _parse_room_moves(items):
+    # Returns ({allocation_id: (hostel_id or None, room label)}, None) or (None, error message).
+    targets = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f"Item {index} must be an object"
+        try:
+            allocation_id = int(item.get("allocation_id"))
+            hostel_id = None if item.get("hostel_id") is None else int(item["hostel_id"])
+        except (TypeError, ValueError):
+            return None, f"Item {index}: allocation_id and hostel_id must be integers"
+        number = parse_room_number(item.get("room_number"))
+        if not number:
+            return None, f"Item {index}: room_number must look like R001"
+        if allocation_id in targets:
+            return None, f"Item {index}: allocation {allocation_id} appears more than once"
+        targets[allocation_id] = (hostel_id, format_room_number(number))
+    return targets, None
+
+
+def _parse_room_rule(rule):
+    # Returns ((hostel_id, first, last, to_hostel_id, to_first), None) or (None, error message).
+    if not isinstance(rule, dict):
+        return None, "rule must be an object"
+    try:
+        hostel_id = int(rule.get("hostel_id"))
+        to_hostel_id = int(rule.get("to_hostel_id") or hostel_id)
+    except (TypeError, ValueError):
+        return None, "hostel_id and to_hostel_id must be integers"
+    first = parse_room_number(rule.get("first_room"))
+    last = parse_room_number(rule.get("last_room"))
+    to_first = parse_room_number(rule.get("to_first_room")) if rule.get("to_first_room") else first
+    if not first or not last or not to_first or last < first:
+        return None, "first_room, last_room and to_first_room must look like R001, with first_room <= last_room"
+    return (hostel_id, first, last, to_hostel_id, to_first), None
+
+
+@csrf_exempt
+@require_POST
+def admin_bulk_update_rooms_api(request):
+    """Move many allocations to new rooms in one transaction, all or nothing.
+
+    Takes either ``moves`` ([{allocation_id, room_number, hostel_id?}]) or a ``rule``
+    ({hostel_id, first_room, last_room, to_hostel_id?, to_first_room?}) that moves
+    every allocation in that room range, keeping the offset between room numbers.
+    Overbooked target rooms are reported with 409 and nothing is changed.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"status": "error", "message": "Authentication required"}, status=401)
+    if not _is_admin_user(request.user):
+        return JsonResponse({"status": "error", "message": "Admin access required"}, status=403)
+
+    data = _json_body(request)
+    if not isinstance(data, dict):
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    moves, rule = data.get("moves"), data.get("rule")
+    if (moves is None) == (rule is None):
+        return JsonResponse({"status": "error", "message": "Send either moves or rule"}, status=400)
+    if moves is not None:
+        if not isinstance(moves, list) or not moves:
+            return JsonResponse({"status": "error", "message": "moves must be a non-empty list"}, status=400)
+        if len(moves) > BULK_ALLOCATION_MAX_ITEMS:
+            return JsonResponse(
+                {"status": "error", "message": f"At most {BULK_ALLOCATION_MAX_ITEMS} moves per request"},
+                status=400,
+            )
+        targets, error = _parse_room_moves(moves)
+    else:
+        rule, error = _parse_room_rule(rule)
+    if error:
+        return JsonResponse({"status": "error", "message": error}, status=400)
+
+    try:
+        with transaction.atomic():
+            fields = ("id", "student_id", "hostel_id", "room_number", "allocated_on")
+            if moves is not None:
+                allocations = list(Allocation.objects.select_for_update().filter(id__in=targets).only(*fields).order_by("id"))
+                missing = sorted(set(targets) - {allocation.id for allocation in allocations})
+                if missing:
+                    return JsonResponse(
+                        {"status": "error", "message": f"Allocation(s) not found: {', '.join(map(str, missing[:20]))}"},
+                        status=404,
+                    )
+            else:
+                source_id, first, last, destination_id, to_first = rule
+                allocations = [
+                    allocation
+                    for allocation in Allocation.objects.select_for_update().filter(hostel_id=source_id).only(*fields).order_by("id")
+                    if first <= (parse_room_number(allocation.room_number) or 0) <= last
+                ]
+                targets = {
+                    allocation.id: (destination_id, format_room_number(parse_room_number(allocation.room_number) - first + to_first))
+                    for allocation in allocations
+                }
+
+            # Hostel rows are locked before any room, in id order, like allocate, reserve and admission;
+            # claim_rooms and return_places below then find them already held.
+            hostel_ids = (
+                {hostel_id for hostel_id, _ in targets.values() if hostel_id}
+                | {a.hostel_id for a in allocations}
+                | ({source_id, destination_id} if rule is not None else set())
+            )
+            hostels = {hostel.id: hostel for hostel in Hostel.objects.select_for_update().filter(id__in=hostel_ids).order_by("id")}
+            if rule is not None and not {source_id, destination_id} <= set(hostels):
+                return JsonResponse({"status": "error", "message": "Hostel not found"}, status=404)
+            moved, leaving, per_hostel = [], [], Counter()
+            for allocation in allocations:
+                hostel_id, room_number = targets[allocation.id]
+                hostel_id = hostel_id or allocation.hostel_id
+                if hostel_id not in hostels:
+                    return JsonResponse({"status": "error", "message": f"Hostel {hostel_id} not found"}, status=400)
+                if (hostel_id, room_number) == (allocation.hostel_id, allocation.room_number):
+                    continue
+                leaving.append((allocation.hostel_id, allocation.room_number))
+                if hostel_id != allocation.hostel_id:
+                    per_hostel[allocation.hostel_id] += 1
+                    per_hostel[hostel_id] -= 1
+                allocation.hostel_id, allocation.room_number = hostel_id, room_number
+                moved.append(allocation)
+
+            arriving = [(allocation.hostel_id, allocation.room_number) for allocation in moved]
+            conflicts = overbooked_rooms(arriving, leaving)
+            if conflicts:
+                return JsonResponse(
+                    {
+                        "status": "error",
+                        "message": f"{len(conflicts)} room(s) would be over capacity; nothing was moved",
+                        "conflicts": [
+                            {
+                                "hostel_id": hostel_id,
+                                "room_number": format_room_number(number),
+                                "capacity": capacity,
+                                "occupancy": occupancy,
+                            }
+                            for hostel_id, number, capacity, occupancy in conflicts[:100]
+                        ],
+                    },
+                    status=409,
+                )
+
+            Allocation.objects.bulk_update(moved, ["hostel", "room_number"], batch_size=1000)
+            release_rooms(leaving)
+            claim_rooms(arriving)
+            return_places({hostel_id: n for hostel_id, n in per_hostel.items() if n})
+            # bulk_update skips post_save, so rollups and the change feed (which drives status streams) are updated here.
+            rollups.count_moves(moved)
+            changes.record_many(changes.ALLOCATION, changes.UPDATED, [(a.pk, a.student_id) for a in moved])
+    except (IntegrityError, OperationalError):
+        return JsonResponse({"status": "error", "message": "Database error. Hakikisha PostgreSQL ina-run."}, status=503)
+
+    if rule is not None:
+        summary = (
+            f"{hostels[source_id].name} {format_room_number(first)}-{format_room_number(last)} -> "
+            f"{hostels[destination_id].name} from {format_room_number(to_first)}"
+        )
+    else:
+        summary = f"{len({(a.hostel_id, a.room_number) for a in moved})} target room(s)"
+    _log_activity(request.user, "allocate", f"Bulk moved {len(moved)} of {len(allocations)} allocation(s): {summary}")
+
+    return JsonResponse(
+        {
+            "status": "success",
+            "message": f"Moved {len(moved)} allocation(s)",
+            "moved": len(moved),
+            "unchanged": len(allocations) - len(moved),
+            "allocations": [
+                {"id": a.id, "hostel_id": a.hostel_id, "room_number": a.room_number} for a in moved
+            ],
+        }
+    )